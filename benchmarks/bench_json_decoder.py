@@ -0,0 +1,135 @@
+"""
+Compares the JSON Decoder Backends (see massacre.json_decoder) on a Journal Corpus.
+
+Run from the Plugin Directory, preferably against a real Journal Directory:
+
+    python -m benchmarks.bench_json_decoder --journals <journal directory> [--output results.json]
+
+Only the Backends that can be imported are measured. For each of them:
+
+- decode_lines: Decoding every Line of the Corpus into a dict
+- decode_mission_accepted: Decoding every MissionAccepted-Line into a MissionRecord
+- scan: Extracting the Events of every Journal, just like the Startup Scan does
+
+The Lines are read into Memory up front (up to --max-bytes), so that only decoding is measured. The Scan reads the
+Journals from disk. The Scan Results of every Backend are compared against the Standard Library, and a Mismatch is
+reported in the Results.
+"""
+import argparse
+import json
+from pathlib import Path
+
+import massacre.json_decoder as json_decoder
+from massacre.journal_scanner import extract_mission_accepted_events_from_log
+from benchmarks.common import add_journal_arguments, environment, journal_directory, time_runs
+
+RESULT_FORMAT_VERSION = 1
+
+
+def _read_lines(log_files: list[Path], max_bytes: int) -> list[bytes]:
+    lines = []
+    read_bytes = 0
+    for log_file in log_files:
+        with open(log_file, "rb") as journal:
+            for line in journal:
+                line = line.rstrip(b"\r\n")
+                if len(line) == 0:
+                    continue
+                lines.append(line)
+                read_bytes += len(line)
+                if read_bytes >= max_bytes:
+                    return lines
+    return lines
+
+
+def _comparable_scan(log_files: list[Path]) -> list:
+    result = []
+    for log_file in log_files:
+        cmdr, missions, lifecycle_events, failed_lines, offset = extract_mission_accepted_events_from_log(log_file)
+        result.append((cmdr, [x.as_list() for x in missions], [list(x) for x in lifecycle_events], failed_lines,
+                       offset))
+    return result
+
+
+def run_benchmarks(journal_dir: Path, repeat: int, max_bytes: int) -> dict:
+    log_files = sorted(x for x in journal_dir.glob("*.log") if x.is_file())
+    lines = _read_lines(log_files, max_bytes)
+    line_bytes = sum(len(line) for line in lines)
+    mission_accepted_lines = [line for line in lines if b'"MissionAccepted"' in line]
+    corpus_bytes = sum(log_file.stat().st_size for log_file in log_files)
+
+    json_decoder.set_backend("json")
+    reference_scan = _comparable_scan(log_files)
+
+    results = {}
+    for backend in json_decoder.available_backends():
+        json_decoder.set_backend(backend)
+        decoder = json_decoder.decoder
+
+        def decode_lines():
+            for line in lines:
+                try:
+                    decoder.decode(line)
+                except ValueError:
+                    pass
+
+        def decode_mission_accepted():
+            for line in mission_accepted_lines:
+                try:
+                    decoder.decode_mission_accepted(line, None)
+                except (ValueError, KeyError, TypeError):
+                    pass
+
+        backend_results = {
+            "decode_lines": time_runs(decode_lines, repeat),
+            "decode_mission_accepted": time_runs(decode_mission_accepted, repeat),
+            "scan": time_runs(lambda: _comparable_scan(log_files), repeat),
+            "matches_stdlib": _comparable_scan(log_files) == reference_scan
+        }
+        decode_seconds = backend_results["decode_lines"]["median"]
+        backend_results["decode_lines"]["bytes_per_second"] = line_bytes / decode_seconds if decode_seconds > 0 else None
+        scan_seconds = backend_results["scan"]["median"]
+        backend_results["scan"]["bytes_per_second"] = corpus_bytes / scan_seconds if scan_seconds > 0 else None
+        results[backend] = backend_results
+    json_decoder.set_backend(None)
+
+    return {
+        "version": RESULT_FORMAT_VERSION,
+        "environment": environment(),
+        "corpus": {"directory": str(journal_dir), "files": len(log_files), "bytes": corpus_bytes,
+                   "decoded_lines": len(lines), "decoded_bytes": line_bytes,
+                   "mission_accepted_lines": len(mission_accepted_lines)},
+        "settings": {"repeat": repeat, "max_bytes": max_bytes},
+        "results": results
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the JSON Decoder Backends")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per Scenario")
+    parser.add_argument("--max-bytes", type=int, default=256 * 1024 * 1024,
+                        help="Only read this many Bytes of Lines into Memory for the decode Scenarios")
+    parser.add_argument("--output", type=Path, default=None, help="Write the Results to this File")
+    add_journal_arguments(parser)
+    args = parser.parse_args()
+
+    with journal_directory(args) as (journal_dir, corpus_summary):
+        results = run_benchmarks(journal_dir, args.repeat, args.max_bytes)
+    if corpus_summary is not None:
+        results["corpus"]["generated"] = corpus_summary
+
+    baseline = results["results"]["json"]
+    for backend, backend_results in results["results"].items():
+        speedups = ", ".join(f"{scenario} {baseline[scenario]['median'] / backend_results[scenario]['median']:.2f}x"
+                             for scenario in ["decode_lines", "decode_mission_accepted", "scan"]
+                             if backend_results[scenario]["median"] > 0)
+        mismatch = "" if backend_results["matches_stdlib"] else " RESULTS DIFFER FROM STDLIB"
+        print(f"{backend:8} {speedups}{mismatch}")
+
+    if args.output is not None:
+        with open(args.output, "w", encoding="utf8") as output_file:
+            json.dump(results, output_file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+Benchmarks the Startup Scan (see mission_aggregation_helper.get_missions_for_all_cmdrs).
+
+Run from the Plugin Directory, either against an existing Journal Directory or against a generated one
+(see journal_generator, which also lists the Arguments that shape the generated Corpus):
+
+    python -m benchmarks.bench_startup_scan --journals <journal directory> [--output results.json]
+    python -m benchmarks.bench_startup_scan --files 200 --file-size 16M [--output results.json]
+
+The following Scenarios are measured:
+
+- list_journals: Finding the Journals inside the lookback (__get_logs_after_timestamp)
+- cold_scan: No Mission Index and no Mission Snapshot, every Journal is parsed
+- index_scan: Mission Index from the previous Run, but no Mission Snapshot
+- snapshot_scan: Mission Index and Mission Snapshot from the previous Run
+- per_file: Parsing each Journal on its own, reported as Throughput per File
+
+Peak Memory is measured with tracemalloc during a separate cold Scan, so that tracing does not skew the Timings.
+Note that tracemalloc only sees the current Process, so it is measured with a sequential Scan.
+
+The Results are written as JSON. Passing the Results of a previous Run via --baseline compares the median Timings
+and exits with 1 if any Scenario got slower than the allowed --tolerance.
+"""
+import argparse
+import datetime as dt
+import json
+import logging
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import massacre.mission_aggregation_helper as mission_aggregation_helper
+from massacre.journal_scanner import extract_mission_accepted_events_from_log
+from massacre.logger_factory import logger
+from benchmarks.common import add_journal_arguments, environment, journal_directory, time_runs
+
+RESULT_FORMAT_VERSION = 1
+
+_TIMED_SCENARIOS = ["list_journals", "cold_scan", "index_scan", "snapshot_scan"]
+
+
+def _clear_cache(cache_dir: Path, keep_index: bool = False, keep_snapshot: bool = False):
+    for cache_file in cache_dir.iterdir():
+        if keep_index and cache_file.name.startswith("mission_index"):
+            continue
+        if keep_snapshot and cache_file.name.startswith("mission_snapshot"):
+            continue
+        cache_file.unlink()
+
+
+def run_benchmarks(journal_dir: Path, repeat: int, parallel: bool, lookback: dt.timedelta) -> dict:
+    mission_aggregation_helper.set_journal_location(str(journal_dir))
+    cache_dir = Path(tempfile.mkdtemp(prefix="massacre-bench-cache-"))
+    mission_aggregation_helper.set_cache_location(cache_dir)
+    timestamp = dt.date.today() - lookback
+    # Module-private, but this is exactly what should be measured
+    get_logs_after_timestamp = getattr(mission_aggregation_helper, "__get_logs_after_timestamp")
+
+    def scan():
+        mission_aggregation_helper.get_missions_for_all_cmdrs(timestamp, parallel)
+
+    try:
+        log_files = get_logs_after_timestamp(timestamp)
+        total_bytes = sum(log_file.stat().st_size for log_file in log_files)
+        results: dict = {
+            "list_journals": time_runs(lambda: get_logs_after_timestamp(timestamp), repeat),
+            "cold_scan": time_runs(scan, repeat, lambda: _clear_cache(cache_dir)),
+        }
+        # The last cold Scan left an Index and a Snapshot behind
+        results["index_scan"] = time_runs(scan, repeat, lambda: _clear_cache(cache_dir, keep_index=True))
+        results["snapshot_scan"] = time_runs(scan, repeat,
+                                         lambda: _clear_cache(cache_dir, keep_index=True, keep_snapshot=True))
+        results["cold_scan"]["bytes_per_second"] = total_bytes / results["cold_scan"]["median"] \
+            if results["cold_scan"]["median"] > 0 else None
+
+        _clear_cache(cache_dir)
+        tracemalloc.start()
+        mission_aggregation_helper.get_missions_for_all_cmdrs(timestamp, False)
+        _, peak_memory = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        results["peak_memory_bytes"] = peak_memory
+
+        per_file = []
+        for log_file in log_files:
+            size = log_file.stat().st_size
+            start = time.perf_counter()
+            extract_mission_accepted_events_from_log(log_file)
+            seconds = time.perf_counter() - start
+            per_file.append({"file": log_file.name, "bytes": size, "seconds": seconds,
+                             "bytes_per_second": size / seconds if seconds > 0 else None})
+        throughputs = [x["bytes_per_second"] for x in per_file if x["bytes_per_second"] is not None]
+        results["per_file"] = {
+            "median_bytes_per_second": statistics.median(throughputs) if len(throughputs) > 0 else None,
+            "min_bytes_per_second": min(throughputs, default=None),
+            "files": per_file
+        }
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    return {
+        "version": RESULT_FORMAT_VERSION,
+        "environment": environment(),
+        "corpus": {"directory": str(journal_dir), "files": len(log_files), "bytes": total_bytes},
+        "settings": {"repeat": repeat, "parallel": parallel, "lookback_days": lookback.days},
+        "results": results
+    }
+
+
+def compare_with_baseline(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """
+    Return a Description of every Scenario whose median Timing is more than tolerance slower than in the baseline
+    """
+    regressions = []
+    for scenario in _TIMED_SCENARIOS:
+        old = baseline.get("results", {}).get(scenario, {}).get("median")
+        new = results["results"][scenario]["median"]
+        if old is not None and old > 0 and new > old * (1 + tolerance):
+            regressions.append(f"{scenario}: {new:.4f}s, was {old:.4f}s (+{(new / old - 1) * 100:.0f}%)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Startup Scan")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per Scenario")
+    parser.add_argument("--parallel", action="store_true", help="Enable the parallel Journal Scan")
+    parser.add_argument("--lookback-days", type=int, default=14)
+    parser.add_argument("--output", type=Path, default=None, help="Write the Results to this File")
+    parser.add_argument("--baseline", type=Path, default=None, help="Results of a previous Run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Allowed Slowdown against the baseline, as a Fraction")
+    add_journal_arguments(parser)
+    args = parser.parse_args()
+
+    logger.setLevel(logging.WARNING)
+
+    with journal_directory(args) as (journal_dir, corpus_summary):
+        results = run_benchmarks(journal_dir, args.repeat, args.parallel, dt.timedelta(days=args.lookback_days))
+    if corpus_summary is not None:
+        results["corpus"]["generated"] = corpus_summary
+
+    for scenario in _TIMED_SCENARIOS:
+        print(f"{scenario:15} median {results['results'][scenario]['median']:.4f}s")
+    print(f"{'peak_memory':15} {results['results']['peak_memory_bytes'] / 1024 / 1024:.1f} MiB")
+    median_throughput = results["results"]["per_file"]["median_bytes_per_second"]
+    if median_throughput is not None:
+        print(f"{'per_file':15} median {median_throughput / 1024 / 1024:.1f} MiB/s")
+
+    if args.output is not None:
+        with open(args.output, "w", encoding="utf8") as output_file:
+            json.dump(results, output_file, indent=2)
+
+    if args.baseline is not None:
+        with open(args.baseline, "r", encoding="utf8") as baseline_file:
+            regressions = compare_with_baseline(results, json.load(baseline_file), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if len(regressions) > 0:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
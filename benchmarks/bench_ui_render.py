@@ -0,0 +1,176 @@
+"""
+Counts the Tk Calls needed to update the Table in the Main Window (see massacre.table_renderer).
+
+Run from the Plugin Directory. Tk needs a Display, e.g. run it with xvfb-run on a Server:
+
+    python -m benchmarks.bench_ui_render [--factions 5] [--updates 200] [--output results.json]
+
+Every Tcl Command issued by tkinter is counted by wrapping the Interpreter of the Root Window. The following
+Scenarios are measured, each as a Sequence of Updates on a Stack of Massacre Missions:
+
+- unchanged: The same Stack is shown again, e.g. after a Missions-Event that confirms the known Missions
+- kill_count_changed: A single Mission changes its Kill Count
+- faction_added_removed: A Mission of a new Faction is accepted and abandoned in turn, so that a Row appears and
+  disappears in the middle of the Table
+
+Each Scenario is run with the TableRenderer, which only touches the Cells that changed, and with a full Rebuild,
+which destroys every Label and creates it again like the Plugin used to. Applying the EDMC Theme is left out, as it
+is not available outside of EDMC.
+"""
+import argparse
+import json
+import random
+import statistics
+import time
+import tkinter as tk
+from pathlib import Path
+from typing import Callable
+
+from massacre.massacre_mission_data import MassacreMissionData
+from massacre.massacre_mission_state import MassacreMission
+from massacre.table_renderer import TableRenderer
+from massacre.ui_layout import GridUiSettings, Row, data_rows
+from benchmarks.common import environment
+
+RESULT_FORMAT_VERSION = 1
+
+
+class _CountingInterpreter:
+    """
+    Wraps the Tcl Interpreter of a Root Window and counts the Commands passed to it
+    """
+
+    def __init__(self, interpreter):
+        self._interpreter = interpreter
+        self.calls = 0
+
+    def call(self, *args):
+        self.calls += 1
+        return self._interpreter.call(*args)
+
+    def __getattr__(self, name):
+        return getattr(self._interpreter, name)
+
+
+def _build_stack(factions: int, seed: int) -> dict[int, MassacreMission]:
+    rnd = random.Random(seed)
+    stack: dict[int, MassacreMission] = {}
+    for mission_id in range(min(20, factions * 4)):
+        stack[mission_id] = MassacreMission("Pirates", rnd.randint(10, 60), rnd.randint(1, 8) * 1_000_000, "Target",
+                                            "Pirates", f"Faction {mission_id % factions}", rnd.random() < 0.5,
+                                            mission_id)
+    return stack
+
+
+def _scenarios(factions: int, updates: int, seed: int) -> dict[str, list[dict[int, MassacreMission]]]:
+    """
+    The Stacks shown one after another in each Scenario
+    """
+    stack = _build_stack(factions, seed)
+    rnd = random.Random(seed)
+
+    kill_count_changed = []
+    for _ in range(updates):
+        stack = dict(stack)
+        mission_id = rnd.choice(list(stack.keys()))
+        mission = stack[mission_id]
+        stack[mission_id] = MassacreMission(mission.target_faction, rnd.randint(10, 60), mission.reward,
+                                            mission.target_system, mission.target_type, mission.source_faction,
+                                            mission.is_wing, mission.id)
+        kill_count_changed.append(stack)
+
+    added = dict(stack)
+    # Sorted in between the other Factions, so that the Rows below it move
+    added[1000] = MassacreMission("Pirates", 30, 5_000_000, "Target", "Pirates", "Faction 0 New", True, 1000)
+    return {
+        "unchanged": [stack] * updates,
+        "kill_count_changed": kill_count_changed,
+        "faction_added_removed": [added if i % 2 == 0 else stack for i in range(updates)]
+    }
+
+
+def _measure(root: tk.Tk, interpreter: _CountingInterpreter, frames: list[list[Row]],
+             update: Callable[[tk.Frame, TableRenderer, list[Row]], None]) -> dict:
+    frame = tk.Frame(root)
+    frame.grid()
+    renderer = TableRenderer(frame)
+    # The first Update creates the Table in both Cases and is not measured
+    renderer.render(frames[0])
+    root.update_idletasks()
+
+    calls = []
+    timings = []
+    for rows in frames[1:]:
+        before = interpreter.calls
+        start = time.perf_counter()
+        update(frame, renderer, rows)
+        timings.append(time.perf_counter() - start)
+        calls.append(interpreter.calls - before)
+        # Let Tk process the Geometry Changes, like the Main Loop would. Not counted.
+        root.update_idletasks()
+    frame.destroy()
+    return {"tk_calls_per_update": statistics.mean(calls), "tk_calls_max": max(calls),
+            "median_seconds": statistics.median(timings), "updates": len(calls)}
+
+
+def __retained(_frame: tk.Frame, renderer: TableRenderer, rows: list[Row]):
+    renderer.render(rows)
+
+
+def __rebuild(frame: tk.Frame, _renderer: TableRenderer, rows: list[Row]):
+    for child in frame.winfo_children():
+        child.destroy()
+    TableRenderer(frame).render(rows)
+
+
+def run_benchmarks(factions: int, updates: int, seed: int) -> dict:
+    root = tk.Tk()
+    root.withdraw()
+    interpreter = _CountingInterpreter(root.tk)
+    # Widgets take the Interpreter of their Master, so everything created from now on is counted
+    root.tk = interpreter
+
+    settings = GridUiSettings(argparse.Namespace(display_delta_column=True, display_ratio_and_cr_per_kill_row=True,
+                                                 display_mission_count=True))
+    results = {}
+    try:
+        for scenario, stacks in _scenarios(factions, updates, seed).items():
+            frames = [data_rows(MassacreMissionData(stack), settings) for stack in stacks]
+            results[scenario] = {
+                "retained": _measure(root, interpreter, frames, __retained),
+                "rebuild": _measure(root, interpreter, frames, __rebuild)
+            }
+    finally:
+        root.destroy()
+
+    return {
+        "format_version": RESULT_FORMAT_VERSION,
+        "environment": environment(),
+        "settings": {"factions": factions, "updates": updates, "seed": seed},
+        "results": results
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Count the Tk Calls per UI Update")
+    parser.add_argument("--factions", type=int, default=5, help="Source Factions in the Stack")
+    parser.add_argument("--updates", type=int, default=200, help="Updates per Scenario")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, default=None, help="Write the Results to this File")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.factions, args.updates, args.seed)
+    for scenario, scenario_results in results["results"].items():
+        retained = scenario_results["retained"]
+        rebuild = scenario_results["rebuild"]
+        print(f"{scenario:22} retained {retained['tk_calls_per_update']:7.1f} Tk Calls "
+              f"({retained['median_seconds'] * 1000:.2f} ms), rebuild {rebuild['tk_calls_per_update']:7.1f} Tk Calls "
+              f"({rebuild['median_seconds'] * 1000:.2f} ms)")
+
+    if args.output is not None:
+        with open(args.output, "w", encoding="utf8") as output_file:
+            json.dump(results, output_file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Helpers shared by the Benchmarks
+"""
+import argparse
+import datetime as dt
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Iterator, Optional
+
+from benchmarks.journal_generator import add_corpus_arguments, corpus_spec_from_arguments, generate_corpus
+
+
+def time_runs(function: Callable[[], None], repeat: int, prepare: Optional[Callable[[], None]] = None) -> dict:
+    """
+    Run function repeat times and return the Timings in Seconds. prepare is run before each Run, but not timed.
+    """
+    timings = []
+    for _ in range(repeat):
+        if prepare is not None:
+            prepare()
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return {"min": min(timings), "median": statistics.median(timings), "max": max(timings), "runs": timings}
+
+
+def environment() -> dict:
+    return {
+        "created": dt.datetime.now(tz=dt.timezone.utc).isoformat(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count()
+    }
+
+
+def add_journal_arguments(parser: argparse.ArgumentParser):
+    """
+    Either an existing Journal Directory, or the Shape of a Corpus to generate (see journal_generator)
+    """
+    parser.add_argument("--journals", type=Path, default=None,
+                        help="Existing Journal Directory. If not provided, a Corpus is generated.")
+    add_corpus_arguments(parser)
+
+
+@contextmanager
+def journal_directory(args: argparse.Namespace) -> Iterator[tuple[Path, Optional[dict]]]:
+    """
+    Yield the Journal Directory to benchmark and, if it has been generated, the Summary of the generated Corpus.
+    A generated Corpus is removed afterwards.
+    """
+    if args.journals is not None:
+        yield args.journals, None
+        return
+
+    generated_dir = Path(tempfile.mkdtemp(prefix="massacre-bench-journals-"))
+    try:
+        yield generated_dir, generate_corpus(generated_dir, corpus_spec_from_arguments(args))
+    finally:
+        shutil.rmtree(generated_dir, ignore_errors=True)
@@ -0,0 +1,235 @@
+"""
+Generates Directories of synthetic Journals for the Benchmarks (see bench_startup_scan).
+
+Run from the Plugin Directory:
+
+    python -m benchmarks.journal_generator <output directory> [--files 50] [--cmdrs 2] [--file-size 8M]
+                                           [--mission-density 0.002] [--days 14] [--seed 0]
+
+Each Journal belongs to a single CMDR and starts just like a real one (Fileheader, Commander, LoadGame, Missions).
+The Rest is a Mix of noisy Events (Music, ReceiveText, ShipTargeted, Bounty, Scan, ...) and Mission Lifecycle Events.
+MissionAccepted-Events use the same Fields and roughly the same Size as the ones written by the Game. Every accepted
+Mission is later redirected, completed, abandoned or failed, or simply left open. The Modification Times of the
+Journals are spread across the last days, just like a real Journal Directory.
+
+Apart from the Timestamps, which are relative to now, the Output only depends on the Arguments. Two Runs with the same
+Seed produce the same Corpus.
+"""
+import argparse
+import datetime as dt
+import os
+import random
+from dataclasses import dataclass, asdict
+from pathlib import Path
+
+_SIZE_SUFFIXES = {"K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}
+_AVERAGE_LINE_SIZE = 300
+
+_FACTIONS = ["Blue Mafia", "Hudson Syndicate", "Sirius Corporation", "Alliance Party of Lave", "Nova Paresa Purple",
+             "Chamunda Crimson Dynamic Corp", "Bureau of Pleiades Aid", "Kadrusa United Holdings"]
+_TARGET_FACTIONS = ["Pirates of Bhritzameno", "HIP 12345 Crimson Gang", "Orrere Nobles"]
+_SYSTEMS = ["Bhritzameno", "HIP 12345", "Orrere", "Lave", "Diaso", "Leesti"]
+
+# Templates of Events that do not matter for the Plugin, with their relative Frequency.
+# %(ts)s is the Timestamp, %(n)d a random Number.
+_NOISE_EVENTS = [
+    (30, '{ "timestamp":"%(ts)s", "event":"Music", "MusicTrack":"Combat_Dogfight" }'),
+    (20, '{ "timestamp":"%(ts)s", "event":"ReceiveText", "From":"$ShipName_Police_Federation;", '
+         '"From_Localised":"System Authority Vessel", "Message":"$Police_StartPatrol%(n)02d;", '
+         '"Message_Localised":"Commencing patrol. Please stay out of our way.", "Channel":"npc" }'),
+    (20, '{ "timestamp":"%(ts)s", "event":"ShipTargeted", "TargetLocked":true, "Ship":"python", '
+         '"Ship_Localised":"Python", "ScanStage":3, "PilotName":"$npc_name_decorate:#name=Dread Pirate %(n)d;", '
+         '"PilotName_Localised":"Dread Pirate %(n)d", "PilotRank":"Deadly", "ShieldHealth":100.000000, '
+         '"HullHealth":100.000000, "Faction":"Pirates of Bhritzameno", "LegalStatus":"Wanted", "Bounty":%(n)d00 }'),
+    (15, '{ "timestamp":"%(ts)s", "event":"Bounty", "Rewards":[ { "Faction":"Blue Mafia", "Reward":%(n)d00 } ], '
+         '"Target":"python", "Target_Localised":"Python", "TotalReward":%(n)d00, "VictimFaction":"Pirates of '
+         'Bhritzameno", "SharedWithOthers":1 }'),
+    (5, '{ "timestamp":"%(ts)s", "event":"FSDTarget", "Name":"HIP %(n)d", "SystemAddress":%(n)d0817, '
+        '"StarClass":"K", "RemainingJumpsInRoute":1 }'),
+    (5, '{ "timestamp":"%(ts)s", "event":"Scan", "ScanType":"AutoScan", "BodyName":"HIP %(n)d A 1", "BodyID":%(n)d, '
+        '"Parents":[ {"Star":0} ], "StarSystem":"HIP %(n)d", "SystemAddress":%(n)d0817, "DistanceFromArrivalLS":'
+        '%(n)d.123, "TidalLock":false, "TerraformState":"", "PlanetClass":"Icy body", "Atmosphere":"", '
+        '"AtmosphereType":"None", "Volcanism":"", "MassEM":0.012345, "Radius":1234567.000000, '
+        '"SurfaceGravity":0.321000, "SurfaceTemperature":45.678900, "SurfacePressure":0.000000, "Landable":true, '
+        '"Materials":[ { "Name":"sulphur", "Percent":26.123 }, { "Name":"carbon", "Percent":21.987 }, '
+        '{ "Name":"phosphorus", "Percent":14.123 }, { "Name":"iron", "Percent":10.456 }, '
+        '{ "Name":"nickel", "Percent":7.123 } ], "Composition":{ "Ice":0.812, "Rock":0.165, "Metal":0.021 }, '
+        '"SemiMajorAxis":123456789012.000000, "Eccentricity":0.001, "OrbitalInclination":0.123, '
+        '"Periapsis":123.456, "OrbitalPeriod":12345678.000000, "RotationPeriod":123456.000000, '
+        '"AxialTilt":0.123, "WasDiscovered":true, "WasMapped":false }'),
+]
+
+_MISSION_ACCEPTED = (
+    '{ "timestamp":"%(ts)s", "event":"MissionAccepted", "Faction":"%(faction)s", '
+    '"Name":"Mission_Massacre_Conflict_CivilWar", "LocalisedName":"Kill %(target_faction)s faction Pirates", '
+    '"TargetType":"$MissionUtil_FactionTag_Pirate;", "TargetType_Localised":"Pirates", '
+    '"TargetFaction":"%(target_faction)s", "KillCount":%(kill_count)d, "DestinationSystem":"%(system)s", '
+    '"DestinationStation":"Jameson Memorial", "Expiry":"%(expiry)s", "Wing":%(wing)s, "Influence":"++", '
+    '"Reputation":"++", "Reward":%(reward)d, "MissionID":%(mission_id)d }'
+)
+_MISSION_REDIRECTED = (
+    '{ "timestamp":"%(ts)s", "event":"MissionRedirected", "MissionID":%(mission_id)d, '
+    '"Name":"Mission_Massacre_Conflict_CivilWar", "NewDestinationStation":"Jameson Memorial", '
+    '"NewDestinationSystem":"Shinrarta Dezhra", "OldDestinationStation":"", "OldDestinationSystem":"%(system)s" }'
+)
+_MISSION_FINISHED = (
+    '{ "timestamp":"%(ts)s", "event":"%(event)s", "Name":"Mission_Massacre_Conflict_CivilWar", '
+    '"MissionID":%(mission_id)d }'
+)
+_HEADER = (
+    '{ "timestamp":"%(ts)s", "event":"Fileheader", "part":1, "language":"English/UK", "Odyssey":true, '
+    '"gameversion":"4.0.0.1700", "build":"r290157/r0 " }\n'
+    '{ "timestamp":"%(ts)s", "event":"Commander", "FID":"F%(n)d", "Name":"%(cmdr)s" }\n'
+    '{ "timestamp":"%(ts)s", "event":"LoadGame", "FID":"F%(n)d", "Commander":"%(cmdr)s", "Horizons":true, '
+    '"Odyssey":true, "Ship":"Python", "ShipID":1, "ShipName":"", "ShipIdent":"", "FuelLevel":32.000000, '
+    '"FuelCapacity":32.000000, "GameMode":"Open", "Credits":1%(n)d000, "Loan":0, "language":"English/UK", '
+    '"gameversion":"4.0.0.1700", "build":"r290157/r0 " }\n'
+)
+
+
+@dataclass
+class CorpusSpec:
+    """
+    Shape of a generated Journal Directory
+    """
+    files: int = 50
+    cmdrs: int = 2
+    file_size: int = 8 * 1024 * 1024
+    """Approximate Size of each Journal in Bytes"""
+    mission_density: float = 0.002
+    """Share of Lines that are MissionAccepted-Events. The same Share again is redirected or finished Missions."""
+    days: int = 14
+    """The Modification Times of the Journals are spread across this many Days before now"""
+    seed: int = 0
+
+
+def parse_size(value: str) -> int:
+    """
+    Parse a Size like 512K, 8M or 2G
+    """
+    value = value.strip().upper().rstrip("B")
+    if value[-1:] in _SIZE_SUFFIXES:
+        return int(float(value[:-1]) * _SIZE_SUFFIXES[value[-1]])
+    return int(value)
+
+
+def _format_timestamp(timestamp: dt.datetime) -> str:
+    return timestamp.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def generate_corpus(directory: Path, spec: CorpusSpec) -> dict:
+    """
+    Write a synthetic Journal Directory. Returns a Summary of what has been written.
+    """
+    directory.mkdir(parents=True, exist_ok=True)
+    rng = random.Random(spec.seed)
+    noise_weights = [weight for weight, _ in _NOISE_EVENTS]
+    noise_templates = [template for _, template in _NOISE_EVENTS]
+    cmdrs = [f"Synthetic CMDR {i}" for i in range(spec.cmdrs)]
+    open_missions: dict[str, list[tuple[int, str]]] = {cmdr: [] for cmdr in cmdrs}
+
+    now = dt.datetime.now(tz=dt.timezone.utc).replace(microsecond=0)
+    first_session = now - dt.timedelta(days=spec.days)
+    session_spacing = dt.timedelta(days=spec.days) / max(spec.files, 1)
+    next_mission_id = 900_000_000
+    summary = {"files": 0, "bytes": 0, "lines": 0, "missions_accepted": 0, "missions_finished": 0}
+
+    for file_index in range(spec.files):
+        cmdr = cmdrs[file_index % len(cmdrs)] if len(cmdrs) > 0 else ""
+        session_start = first_session + session_spacing * file_index
+        timestamp = session_start
+        journal = directory / f"Journal.{session_start.strftime('%Y-%m-%dT%H%M%S')}.01.log"
+
+        # Spread the Lines across most of the Time until the next Session starts
+        line_spacing = session_spacing * 0.9 / max(spec.file_size // _AVERAGE_LINE_SIZE, 1)
+        written = 0
+        lines = []
+        header = _HEADER % {"ts": _format_timestamp(timestamp), "n": file_index, "cmdr": cmdr}
+        active = ", ".join(f'{{ "MissionID":{mission_id}, "Name":"Mission_Massacre_Conflict_CivilWar", '
+                           f'"PassengerMission":false, "Expires":86400 }}'
+                           for mission_id, _ in open_missions.get(cmdr, []))
+        header += f'{{ "timestamp":"{_format_timestamp(timestamp)}", "event":"Missions", "Active":[ {active} ], ' \
+                  f'"Failed":[  ], "Complete":[  ] }}\n'
+        lines.append(header)
+        written += len(header)
+        summary["lines"] += 4
+
+        with open(journal, "w", encoding="utf8", newline="\n") as journal_file:
+            while written < spec.file_size:
+                timestamp += line_spacing
+                ts = _format_timestamp(timestamp.replace(microsecond=0))
+                roll = rng.random()
+                missions = open_missions.setdefault(cmdr, [])
+
+                if roll < spec.mission_density:
+                    mission_id = next_mission_id
+                    next_mission_id += 1
+                    system = rng.choice(_SYSTEMS)
+                    expiry = timestamp.replace(microsecond=0) + dt.timedelta(hours=rng.randint(12, 7 * 24))
+                    line = _MISSION_ACCEPTED % {
+                        "ts": ts, "faction": rng.choice(_FACTIONS), "target_faction": rng.choice(_TARGET_FACTIONS),
+                        "kill_count": rng.randint(8, 60), "system": system, "expiry": _format_timestamp(expiry),
+                        "wing": rng.choice(["true", "false"]), "reward": rng.randint(5, 50) * 1_000_000,
+                        "mission_id": mission_id
+                    }
+                    missions.append((mission_id, system))
+                    summary["missions_accepted"] += 1
+                elif roll < 2 * spec.mission_density and len(missions) > 0:
+                    mission_id, system = missions.pop(rng.randrange(len(missions)))
+                    event = rng.choices(["MissionCompleted", "MissionAbandoned", "MissionFailed"], [85, 10, 5])[0]
+                    line = ""
+                    if event == "MissionCompleted":
+                        line = _MISSION_REDIRECTED % {"ts": ts, "mission_id": mission_id, "system": system} + "\n"
+                    line += _MISSION_FINISHED % {"ts": ts, "event": event, "mission_id": mission_id}
+                    summary["missions_finished"] += 1
+                else:
+                    template = rng.choices(noise_templates, noise_weights)[0]
+                    line = template % {"ts": ts, "n": rng.randint(10, 99999)}
+
+                line += "\n"
+                summary["lines"] += line.count("\n")
+                lines.append(line)
+                written += len(line)
+                if len(lines) >= 4096:
+                    journal_file.write("".join(lines))
+                    lines.clear()
+            journal_file.write("".join(lines))
+
+        modification_time = (timestamp.timestamp(), timestamp.timestamp())
+        os.utime(journal, modification_time)
+        summary["files"] += 1
+        summary["bytes"] += journal.stat().st_size
+
+    summary["spec"] = asdict(spec)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic Journals for the Benchmarks")
+    parser.add_argument("directory", type=Path, help="Directory the Journals are written to")
+    add_corpus_arguments(parser)
+    args = parser.parse_args()
+    summary = generate_corpus(args.directory, corpus_spec_from_arguments(args))
+    print(f"Wrote {summary['files']} Journals ({summary['bytes']} Bytes, {summary['missions_accepted']} Missions) "
+          f"to {args.directory}")
+
+
+def add_corpus_arguments(parser: argparse.ArgumentParser):
+    defaults = CorpusSpec()
+    parser.add_argument("--files", type=int, default=defaults.files, help="Amount of Journals")
+    parser.add_argument("--cmdrs", type=int, default=defaults.cmdrs, help="Amount of CMDRs the Journals belong to")
+    parser.add_argument("--file-size", type=parse_size, default=defaults.file_size,
+                        help="Approximate Size of each Journal, e.g. 512K, 8M or 1G")
+    parser.add_argument("--mission-density", type=float, default=defaults.mission_density,
+                        help="Share of Lines that are MissionAccepted-Events")
+    parser.add_argument("--days", type=int, default=defaults.days,
+                        help="Spread the Journals across this many Days before now")
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+
+
+def corpus_spec_from_arguments(args: argparse.Namespace) -> CorpusSpec:
+    return CorpusSpec(args.files, args.cmdrs, args.file_size, args.mission_density, args.days, args.seed)
+
+
+if __name__ == "__main__":
+    main()
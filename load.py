@@ -1,19 +1,40 @@
 import os
+import threading
 import tkinter
 from typing import Any, Optional
 from os.path import basename, dirname
 
-from massacre.mission_aggregation_helper import get_missions_for_all_cmdrs
+from massacre.mission_aggregation_helper import build_index_worker, build_journal_header_worker, \
+    build_partition_worker, build_resolver_worker, build_warm_start_worker, checkpoint_mission_state, \
+    take_warm_start, use_mission_database
+from massacre.mission_database import MissionDatabase
+from massacre.checkpoint_writer import CheckpointWriter
+from massacre.warm_start import WarmStart
 
 from massacre.ui import ui
 from massacre.logger_factory import logger
-from massacre.massacre_settings import configuration, build_settings_ui, push_new_changes
+from massacre.metrics import metrics
+from massacre.diagnostic_recorder import DUMP_CHAT_COMMAND, recorder
+from massacre.massacre_settings import STARTUP_MODE_SETTINGS, configuration, build_settings_ui, push_new_changes
 from massacre.version_check import build_worker
+from massacre.mission_repository import MISSION_EVENTS
+from massacre.mission_record import MissionRecord
 
 import massacre.integrations.main as integrations
 
 plugin_name = os.path.basename(os.path.dirname(__file__))
 selected_cmdr: Optional[str] = None
+shutdown = threading.Event()
+"""
+Set by plugin_stop. Background Workers stop reading Journals once it is set.
+"""
+checkpoint_writer = CheckpointWriter(checkpoint_mission_state)
+metrics.register_source("checkpoint_writer", checkpoint_writer.counters)
+
+CHECKPOINT_SHUTDOWN_TIMEOUT = 10
+"""
+Seconds plugin_stop waits for the last Checkpoint to be written
+"""
 
 
 def plugin_app(parent: tkinter.Frame) -> tkinter.Frame:
@@ -26,6 +47,8 @@ def plugin_app(parent: tkinter.Frame) -> tkinter.Frame:
 
 def plugin_start3(_: str) -> str:
     logger.info("Stating Massacre Plugin")
+    metrics.set_enabled(configuration.diagnostics_enabled)
+    configuration.config_changed_listeners.append(lambda config: metrics.set_enabled(config.diagnostics_enabled))
 
     if configuration.check_updates:
         logger.info("Starting Update Check in new Thread...")
@@ -39,44 +62,143 @@ def plugin_start3(_: str) -> str:
     else:
         logger.info("Skipping Update Check. Disabled in Settings")
 
-    # Building Mission Index
+    # Upper Bound of how far back Journals are read. The Mission Index shortens this to the oldest Journal
+    # that still holds an open Mission.
     import datetime as dt
-    mission_uuid_to_mission_lookup = get_missions_for_all_cmdrs(dt.date.today() - dt.timedelta(weeks=2))
-    logger.info(f"Found Missions for {len(mission_uuid_to_mission_lookup)} CMDRs (completed, finished, failed, etc)")
+    lookback = dt.date.today() - dt.timedelta(weeks=2)
     from massacre.mission_repository import set_new_repo
-    set_new_repo(mission_uuid_to_mission_lookup)
+
+    enabled_modes = [name for setting, name in STARTUP_MODE_SETTINGS.items() if getattr(configuration, setting)]
+    if len(enabled_modes) > 1:
+        logger.warning(f"Only one of {', '.join(enabled_modes)} can be used. Using {enabled_modes[0]}, ignoring the "
+                       f"others.")
+
+    if configuration.lazy_mission_resolution:
+        # No Mission Index. Active Missions are looked up in a separate Thread once the Missions-Event arrives.
+        logger.info("Lazy Mission Resolution is enabled. Skipping Mission Index")
+        set_new_repo({})
+        from massacre.mission_repository import mission_repository
+        if mission_repository is not None:
+            mission_repository.set_mission_resolver(
+                lambda cmdr, mission_ids, callback:
+                build_resolver_worker(cmdr, mission_ids, lookback, callback, shutdown).start())
+        ui.notify_indexing_done()
+    elif configuration.per_cmdr_mission_partitions:
+        # Only the Commander-Events are read on Start. The Missions of a CMDR are read in a separate Thread once the
+        # CMDR logs in. Until then the Mission Repository buffers all Events.
+        logger.info("Per-CMDR Mission Partitions are enabled. Only reading the Commander of each Journal")
+        set_new_repo({})
+        from massacre.mission_repository import mission_repository
+        if mission_repository is not None:
+            idle_minutes = configuration.partition_idle_minutes
+            parallel = configuration.parallel_journal_scan
+            mission_repository.set_partition_loader(
+                lambda cmdr, callback: build_partition_worker(cmdr, lookback, parallel, callback, shutdown).start(),
+                dt.timedelta(minutes=idle_minutes) if idle_minutes > 0 else None)
+
+        def notify_ui_on_headers_read(journals_per_cmdr: dict[str, list]):
+            logger.info(f"Found Journals for {len(journals_per_cmdr)} CMDRs")
+            ui.notify_indexing_done()
+
+        build_journal_header_worker(lookback, notify_ui_on_headers_read, shutdown).start()
+    else:
+        # Building Mission Index in a separate Thread. Until it is done the Mission Repository buffers all Events
+        if configuration.mission_database:
+            logger.info("Keeping the Mission State in the Mission Database")
+            use_mission_database(MissionDatabase())
+        else:
+            logger.info("Keeping the Mission State in the Mission Snapshot")
+        set_new_repo()
+        from massacre.mission_repository import mission_repository
+        if mission_repository is not None:
+            # Only the full Mission State is checkpointed. The lazy one only knows about the active Missions.
+            mission_repository.set_checkpoint_handler(checkpoint_writer.request)
+
+        def notify_repo_on_index_built(mission_uuid_to_mission_lookup: dict[str, dict[int, MissionRecord]]):
+            logger.info(f"Found Missions for {len(mission_uuid_to_mission_lookup)} CMDRs "
+                        f"(completed, finished, failed, etc)")
+            from massacre.mission_repository import mission_repository
+            if mission_repository is not None:
+                mission_repository.notify_about_mission_data(mission_uuid_to_mission_lookup)
+            ui.notify_indexing_done()
+
+        thread = build_index_worker(lookback, configuration.parallel_journal_scan,
+                                    ui.notify_indexing_progress, notify_repo_on_index_built, shutdown)
+        thread.start()
+
+    __restore_warm_start()
 
     logger.info("Awaiting CMDR Name to start building Mission Index")
     return basename(dirname(__file__))
 
 
-def journal_entry(cmdr: str, _is_beta: bool, _system: str,
-                  _station: str, entry: dict[str, Any], _state: dict[str, Any]):
-    if entry["event"] == "Missions":
-        # Fetch the currently active missions and pass them to the Mission Registry
-        active_mission_uuids = map(lambda x: int(x["MissionID"]), entry["Active"])
-        from massacre.mission_repository import set_active_uuids
-        set_active_uuids(list(active_mission_uuids), cmdr)
-
-    elif entry["event"] == "MissionAccepted":
-        # A new mission has been accepted. The Mission Repository should be notified about this
+def __restore_warm_start():
+    """
+    Show the active Missions saved by the last plugin_stop right away, then replay whatever has been written to the
+    Journals since in the background. The Missions-Event replaces both once it arrives.
+    """
+    from massacre.mission_repository import mission_repository
+    warm_start = WarmStart.load()
+    if warm_start is None or mission_repository is None:
+        return
+    mission_repository.notify_about_restored_missions(warm_start.cmdr,
+                                                      warm_start.active_missions.get(warm_start.cmdr, {}))
+
+    def notify_repo_on_reconciled(active_missions: dict[int, MissionRecord]):
         from massacre.mission_repository import mission_repository
         if mission_repository is not None:
-            mission_repository.notify_about_new_mission_accepted(entry, cmdr)
+            mission_repository.notify_about_restored_missions(warm_start.cmdr, active_missions)
+
+    build_warm_start_worker(warm_start, notify_repo_on_reconciled, shutdown).start()
+
+
+def plugin_stop():
+    logger.info("Stopping Massacre Plugin")
+    shutdown.set()
+    from massacre.mission_repository import mission_repository
+    if mission_repository is None:
+        return
+    mission_repository.checkpoint()
+    if not checkpoint_writer.wait_until_written(CHECKPOINT_SHUTDOWN_TIMEOUT):
+        logger.warning("Timed out writing the last Checkpoint of the Mission State")
+
+    cmdr = mission_repository.snapshot().cmdr
+    if cmdr is None:
+        # Nothing is known about the active Missions. Keep the previous Warm Start.
+        return
+    # Only the Massacre Missions are shown, so only they are kept
+    from massacre.massacre_mission_state import is_massacre_mission
+    active_missions = {
+        cmdr_name: {mission_id: mission for mission_id, mission in missions.items() if is_massacre_mission(mission)}
+        for cmdr_name, missions in mission_repository.active_missions_per_cmdr().items()
+    }
+    take_warm_start(cmdr, active_missions).save()
+
 
-    elif entry["event"] in ["MissionAbandoned", "MissionCompleted"]:  # TODO: What about MissionRedirected?
-        # Mission has been completed or failed -> It is no longer active
-        mission_uuid = entry["MissionID"]
+def journal_entry(cmdr: str, _is_beta: bool, _system: str,
+                  _station: str, entry: dict[str, Any], _state: dict[str, Any]):
+    if entry["event"] in MISSION_EVENTS:
+        # Missions-, MissionAccepted- and all other Mission Lifecycle Events are handled by the Mission
+        # Repository. It buffers them if the Mission Index is still being built.
+        recorder.record("journal_event", {"cmdr": cmdr, "entry": entry})
         from massacre.mission_repository import mission_repository
         if mission_repository is not None:
-            mission_repository.notify_about_mission_gone(mission_uuid)
+            try:
+                mission_repository.notify_about_journal_event(entry, cmdr)
+            except Exception:
+                recorder.dump_on_exception(f"{entry['event']}-Event")
+                raise
+    elif entry["event"] == "SendText" and entry.get("Message", "").strip() == DUMP_CHAT_COMMAND:
+        recorder.dump(f"{DUMP_CHAT_COMMAND} Chat Command")
 
     # Pass through the Event to any Integration that needs it
     for integration in integrations.get_all_active():
         try:
-           integration.notify_new_event(entry)
+            with metrics.timed(f"integration.{integration.get_name()}.notify_new_event"):
+                integration.notify_new_event(entry)
         except Exception as e:
             logger.exception(e)
+            recorder.dump_on_exception(f"Integration {integration.get_name()}")
     
 
 
@@ -0,0 +1,76 @@
+"""
+This Module contains the Writer that takes Checkpoints of the Mission State off the Main Thread.
+
+The Mission Repository asks for a Checkpoint on every Missions-Event and after every few other Lifecycle Events, while
+holding the Repository Lock. Writing it (see mission_aggregation_helper.checkpoint_mission_state) rewrites the whole
+Snapshot and looks at every Journal, so it is handed to a Thread of its own instead. The Repository passes a Copy of
+the State, which is not modified afterwards, along with when it was requested (time.monotonic_ns). The Journal Marks
+measured while writing one Checkpoint are only used by a later Checkpoint of a State copied after that.
+
+If more Checkpoints are requested while one is being written, only the most recent of them is written afterwards.
+"""
+import threading
+import time
+from typing import Callable, Optional
+
+from massacre.logger_factory import logger
+from massacre.mission_lifecycle import MissionLifecycle
+
+
+class CheckpointWriter:
+    """
+    Writes the requested Checkpoints one after another on the Checkpoint Thread. Counts how many were requested and
+    written.
+    """
+
+    def __init__(self, write: Callable[[MissionLifecycle, int], None]):
+        self._write = write
+        self._condition = threading.Condition()
+        self._pending: Optional[tuple[MissionLifecycle, int]] = None
+        self._writing = False
+        self._thread: Optional[threading.Thread] = None
+        self._requested = 0
+        self._written = 0
+
+    def counters(self) -> dict[str, int]:
+        with self._condition:
+            return {"requested": self._requested, "written": self._written,
+                    "merged": self._requested - self._written - (1 if self._pending is not None else 0) -
+                              (1 if self._writing else 0)}
+
+    def request(self, lifecycle: MissionLifecycle):
+        """
+        Write a Checkpoint of the provided State. Returns right away. The State must not be modified afterwards.
+        """
+        with self._condition:
+            self._requested += 1
+            self._pending = (lifecycle, time.monotonic_ns())
+            if self._thread is None:
+                self._thread = threading.Thread(target=self.__run)
+                self._thread.name = "Massacre Checkpoint"
+                self._thread.daemon = True
+                self._thread.start()
+            self._condition.notify_all()
+
+    def wait_until_written(self, timeout: Optional[float] = None) -> bool:
+        """
+        Block until every requested Checkpoint has been written, e.g. on Shutdown. Returns False on Timeout.
+        """
+        with self._condition:
+            return self._condition.wait_for(lambda: self._pending is None and not self._writing, timeout)
+
+    def __run(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._pending is not None)
+                (lifecycle, requested_at_ns), self._pending = self._pending, None
+                self._writing = True
+            try:
+                self._write(lifecycle, requested_at_ns)
+            except Exception:
+                logger.exception("Failed to checkpoint the Mission State")
+            finally:
+                with self._condition:
+                    self._writing = False
+                    self._written += 1
+                    self._condition.notify_all()
@@ -0,0 +1,110 @@
+"""
+This Module contains the Diagnostic Recorder: a bounded Ring Buffer of what happened recently, i.e. the Journal Events
+passed to the Mission Repository, the Changes of the active Missions and every new Stack Snapshot.
+
+Recording only keeps a Reference to each Entry. The Entries are immutable, or not modified after they have been passed
+on (like the Journal Events of EDMC), so nothing is copied or serialized while playing. The Buffer is only written to
+a File on Demand:
+
+- when something goes wrong (see dump_on_exception), at most once every few Minutes
+- from the Diagnostics Section of the Settings
+- with the "!massacre-dump" Chat Command, just like "!stack" for the Overlay
+
+This replaces dumping the whole Massacre Mission State as JSON on every Update.
+"""
+import datetime as dt
+import json
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any, NamedTuple, Optional
+
+from massacre.logger_factory import logger
+from massacre.metrics import diagnostics_file_location
+
+RECORDER_CAPACITY = 256
+"""
+How many Entries are kept. Older ones are dropped.
+"""
+
+AUTOMATIC_DUMP_INTERVAL = dt.timedelta(minutes=5)
+"""
+Failures often come in Bursts. Only the first of them within this Interval writes a File.
+"""
+
+DUMP_CHAT_COMMAND = "!massacre-dump"
+
+
+class RecordedEntry(NamedTuple):
+    recorded_at_ns: int
+    kind: str
+    payload: Any
+    """Serialized with its as_dict Method, if it has one"""
+
+
+def _serialize(payload: Any) -> Any:
+    as_dict = getattr(payload, "as_dict", None)
+    if callable(as_dict):
+        return as_dict()
+    return payload
+
+
+class DiagnosticRecorder:
+    """
+    Keeps the last RECORDER_CAPACITY Entries. Safe to be used from any Thread.
+    """
+
+    def __init__(self, capacity: int = RECORDER_CAPACITY):
+        self._entries: deque[RecordedEntry] = deque(maxlen=capacity)
+        self._last_automatic_dump_ns: Optional[int] = None
+
+    def record(self, kind: str, payload: Any):
+        """
+        Keep a Reference to the Payload. It must not be modified afterwards.
+        """
+        self._entries.append(RecordedEntry(time.time_ns(), kind, payload))
+
+    def entries(self) -> list[RecordedEntry]:
+        # deque.copy does not release the GIL, so it can not see an Entry appended by another Thread halfway
+        return list(self._entries.copy())
+
+    def dump(self, reason: str, location: Optional[Path] = None) -> Path:
+        """
+        Write all Entries to a JSON File and return where it has been written to.
+
+        :param reason: Why the Entries are dumped, e.g. the Exception that occurred
+        :param location: Defaults to a new File in metrics.diagnostics_file_location
+        """
+        if location is None:
+            stamp = dt.datetime.now().strftime("%Y%m%d-%H%M%S")
+            location = diagnostics_file_location / f"events-{stamp}.json"
+        entries = [{
+            "recorded_at": dt.datetime.fromtimestamp(entry.recorded_at_ns / 1e9, tz=dt.timezone.utc).isoformat(),
+            "kind": entry.kind,
+            "payload": _serialize(entry.payload)
+        } for entry in self.entries()]
+        with open(location, "w", encoding="utf8") as dump_file:
+            json.dump({"created": dt.datetime.now(tz=dt.timezone.utc).isoformat(), "reason": reason,
+                       "entries": entries}, dump_file, indent=2, default=str)
+        logger.info(f"Dumped {len(entries)} recent Events to {location}")
+        return location
+
+    def dump_on_exception(self, context: str) -> Optional[Path]:
+        """
+        Dump the Entries after an Exception, unless that has already happened within AUTOMATIC_DUMP_INTERVAL.
+        Never raises, as it is called while an Exception is being handled.
+        """
+        now_ns = time.monotonic_ns()
+        if self._last_automatic_dump_ns is not None and \
+                now_ns - self._last_automatic_dump_ns < AUTOMATIC_DUMP_INTERVAL.total_seconds() * 1e9:
+            return None
+        self._last_automatic_dump_ns = now_ns
+        try:
+            return self.dump(f"Exception in {context}")
+        except Exception:
+            logger.exception("Failed to dump recent Events")
+            return None
+
+
+recorder = DiagnosticRecorder()
+"""The Recorder used by the whole Plugin"""
@@ -0,0 +1,104 @@
+"""
+Headless Mode: Tracks Massacre Stacks without EDMC, e.g. on Replay- or Monitoring-Machines.
+
+Run from the Plugin Directory:
+
+    python -m massacre.headless <journal directory> [--interval 1.0] [--once]
+
+The Mission Index is built from the Journal Directory just like on Plugin Start. Afterwards the newest Journal is
+followed (see journal_follower) and its Events are passed to the Mission Repository, replacing EDMC's Event Pump.
+Whenever the Stack changes, it is printed to stdout.
+"""
+import argparse
+import datetime as dt
+import time
+from pathlib import Path
+from typing import Optional
+
+import massacre.mission_repository
+from massacre.logger_factory import logger
+from massacre.journal_follower import JournalFollower
+from massacre.mission_aggregation_helper import checkpoint_mission_state, get_missions_for_all_cmdrs, \
+    set_journal_location, use_mission_database
+from massacre.mission_database import MissionDatabase
+from massacre.massacre_mission_data import MassacreMissionData
+from massacre.stack_snapshot import StackSnapshot, stack_snapshot_listeners
+
+
+def _format_stack(data: MassacreMissionData) -> list[str]:
+    """
+    Plain-Text Version of the Table displayed in the UI
+    """
+    if data.target_sum == 0:
+        return ["No Massacre Missions."]
+
+    lines = [f"{'Faction':30} {'Kills':>5} {'Reward (Wing)':>15}"]
+    for faction in sorted(data.faction_to_count_lookup.keys()):
+        faction_state = data.faction_to_count_lookup[faction]
+        reward = "{:.1f} ({:.1f})".format(float(faction_state.reward) / 1_000_000,
+                                          float(faction_state.shareable_reward) / 1_000_000)
+        lines.append(f"{faction:30} {faction_state.killcount:>5} {reward:>15}")
+    reward_sum = "{:.1f} ({:.1f})".format(float(data.reward) / 1_000_000, float(data.shareable_reward) / 1_000_000)
+    lines.append(f"{'Sum':30} {data.stack_height:>5} {reward_sum:>15}")
+    lines.append(f"Mission Count: {data.mission_count}/20")
+    lines.extend(data.warnings)
+    return lines
+
+
+_printed_version: Optional[int] = None
+
+
+def _print_stack(snapshot: StackSnapshot):
+    global _printed_version
+    if snapshot.version == _printed_version:
+        # The Stack has not changed
+        return
+    _printed_version = snapshot.version
+    print("\n".join(_format_stack(snapshot.data)), flush=True)
+
+
+def run(journal_dir: Path, interval: float, once: bool, lookback: dt.timedelta = dt.timedelta(weeks=2),
+        database: bool = False):
+    set_journal_location(str(journal_dir))
+    if database:
+        use_mission_database(MissionDatabase())
+    massacre.mission_repository.set_new_repo(get_missions_for_all_cmdrs(dt.date.today() - lookback))
+    if massacre.mission_repository.mission_repository is not None:
+        massacre.mission_repository.mission_repository.set_checkpoint_handler(checkpoint_mission_state)
+    stack_snapshot_listeners.append(_print_stack)
+
+    follower = JournalFollower(journal_dir)
+    cmdr: Optional[str] = None
+
+    while True:
+        for entry in follower.poll():
+            event = entry.get("event")
+            if event == "Commander":
+                cmdr = str(entry["Name"])
+                logger.info(f"Following Journal {follower.current_journal} for CMDR {cmdr}")
+            elif event in massacre.mission_repository.MISSION_EVENTS and cmdr is not None:
+                repository = massacre.mission_repository.mission_repository
+                if repository is not None:
+                    repository.notify_about_journal_event(entry, cmdr)
+        if once:
+            return
+        time.sleep(interval)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Track Massacre Stacks without EDMC")
+    parser.add_argument("journal_dir", type=Path, help="Directory containing the Journal Files")
+    parser.add_argument("--interval", type=float, default=1.0, help="Seconds between two Polls of the Journal")
+    parser.add_argument("--once", action="store_true", help="Read the current Journal once and exit")
+    parser.add_argument("--database", action="store_true",
+                        help="Keep the Mission State in the SQLite Mission Database instead of the Snapshot File")
+    args = parser.parse_args()
+
+    try:
+        run(args.journal_dir, args.interval, args.once, database=args.database)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,7 @@ This is a basic example on how to create an Integration to Interact with EDMC-Ma
 import threading
 from massacre import logger_factory, massacre_settings, ui
 from massacre.integrations.integration import Integration
+from massacre.stack_snapshot import StackSnapshot, stack_snapshot_listeners
 import queue
 import tkinter as tk
 import myNotebook as nb
@@ -67,12 +68,12 @@ class ExampleIntegration(Integration):
         # Import anything that is not expected to be on every machine
         # inside the scope of a function, not at the top.
 
-        from massacre.ui import MassacreMissionData
         while True:
             try:
 
                 ### Blocking 
-                entry: MassacreMissionData = self.__message_queue.get()
+                # Stack Snapshots are immutable, so they can be read here without copying them
+                entry = self.__message_queue.get().data
 
                 as_dict = {
                     "shareable": entry.shareable_reward,
@@ -97,6 +98,13 @@ class ExampleIntegration(Integration):
     def notify_initialize(self):
         if not self.is_running and self.__config.is_active:
             self.__start_thread()
+            stack_snapshot_listeners.append(self.__handle_new_stack_snapshot)
+
+    def __handle_new_stack_snapshot(self, snapshot: StackSnapshot):
+        """
+        Invoked on the Main Thread. Anything slow is left to the Worker Thread.
+        """
+        self.__message_queue.put(snapshot)
 
 
 
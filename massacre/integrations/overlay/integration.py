@@ -2,7 +2,7 @@ from typing import Optional
 from massacre import massacre_settings, ui
 from massacre.integrations.integration import Integration
 from massacre.integrations.overlay.overlay import Overlay
-from massacre.massacre_mission_state import massacre_mission_listeners
+from massacre.stack_snapshot import StackSnapshot, latest_stack_snapshot, stack_snapshot_listeners
 from massacre.logger_factory import logger
 import tkinter as tk
 import myNotebook as nb
@@ -74,12 +74,15 @@ class OverlayIntegration(Integration):
         if self.__config.overlay_enabled and self.__overlay is None:
             self.__overlay = Overlay(self.__config)
 
-            def handle_new_massacre_mission_state(data: dict[int, ui.MassacreMission]):
-                data_view = ui.MassacreMissionData(data)
+            def handle_new_stack_snapshot(snapshot: StackSnapshot):
                 if self.__overlay is not None:
-                    self.__overlay.notify_about_new_massacre_mission_state(data_view)
+                    self.__overlay.notify_about_new_stack_snapshot(snapshot)
             
-            massacre_mission_listeners.append(handle_new_massacre_mission_state)
+            stack_snapshot_listeners.append(handle_new_stack_snapshot)
+            # The Stack might already be known if the Overlay is enabled later on
+            snapshot = latest_stack_snapshot()
+            if snapshot is not None:
+                handle_new_stack_snapshot(snapshot)
 
 
 
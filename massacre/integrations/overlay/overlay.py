@@ -1,7 +1,10 @@
-from typing import Optional
+import time
+from typing import NamedTuple, Optional
 
 from massacre.logger_factory import logger
-from massacre.ui import MassacreMissionData
+from massacre.metrics import metrics
+from massacre.massacre_mission_data import MassacreMissionData
+from massacre.stack_snapshot import StackSnapshot
 
 
 
@@ -55,9 +58,38 @@ def _display_waiting_for_missions():
     return ["Massacre Plugin is ready."]
 
 
+TTL_REFRESH_INTERVAL = 5.0
+"""
+Lines that have not changed are only sent again to keep them on Screen at most this often (Seconds), so that spamming
+"!stack" does not flood the Overlay.
+"""
+
+LINE_HEIGHT = 20
+
+_CLEAR_TTL = 1
+"""
+A Line is cleared by sending it without Text. The TTL only matters if the Overlay ignores empty Messages.
+"""
+
+
+class _SentLine(NamedTuple):
+    text: str
+    sent_at: float
+    ttl: int
+
+    def is_visible(self, now: float) -> bool:
+        return now - self.sent_at < self.ttl
+
+
+def _message_id(index: int) -> str:
+    return f'massacre-line-{index * LINE_HEIGHT}'
+
+
 class Overlay:
     def _create_overlay(self):
         self.__overlay = None
+        # The TTL might have changed, so everything is sent again on the next Update
+        self.__last_ttl_refresh = float("-inf")
         if self.__config.overlay_enabled:
             try:
                 import edmcoverlay # pyright: ignore
@@ -68,6 +100,11 @@ class Overlay:
     def __init__(self, config):
         self.__config = config
         self.__data: Optional[MassacreMissionData] = None
+        self.__data_version: Optional[int] = None
+        self.__sent_lines: dict[int, _SentLine] = {}
+        """
+        The last Frame sent to the Overlay, by Line. Kept when the Overlay is recreated, as the Lines stay on Screen.
+        """
         self._create_overlay()
                 
     def __bool__(self):
@@ -77,6 +114,13 @@ class Overlay:
         self._create_overlay()
         self.update_overlay()
     
+    def notify_about_new_stack_snapshot(self, snapshot: StackSnapshot):
+        if snapshot.version == self.__data_version:
+            # Already sent to the Overlay
+            return
+        self.__data_version = snapshot.version
+        self.notify_about_new_massacre_mission_state(snapshot.data)
+
     def notify_about_new_massacre_mission_state(self, data: Optional[MassacreMissionData]):
         self.__data = data
         self.update_overlay()
@@ -91,7 +135,16 @@ class Overlay:
             return
 
         logger.info("Updating Overlay...")
+        with metrics.timed("overlay.update"):
+            self.__update_overlay()
+        logger.info("Overlay Update done")
 
+    def __update_overlay(self):
+        """
+        Only send the Lines that changed, or that are no longer on Screen. Lines that are left over from a longer
+        previous Frame are cleared. Unchanged Lines are sent again to reset their TTL at most every
+        TTL_REFRESH_INTERVAL.
+        """
         lines = []
         if self.__data is None:
             pass
@@ -100,17 +153,33 @@ class Overlay:
         else:
             lines = _display_data(self.__data)
 
-        line_y = 0
-        for line in lines:
-            self.__overlay.send_message(f'massacre-line-{line_y}',
+        now = time.monotonic()
+        ttl = self.__config.overlay_ttl
+        refresh_ttl = len(lines) > 0 and now - self.__last_ttl_refresh >= TTL_REFRESH_INTERVAL
+        if refresh_ttl:
+            self.__last_ttl_refresh = now
+
+        # The whole Frame is worked out first and then sent in one go
+        batch: list[tuple[int, str, int]] = []
+        for index, line in enumerate(lines):
+            sent_line = self.__sent_lines.get(index)
+            if refresh_ttl or sent_line is None or sent_line.text != line or not sent_line.is_visible(now):
+                batch.append((index, line, ttl))
+        for index in [x for x in self.__sent_lines.keys() if x >= len(lines)]:
+            if self.__sent_lines.pop(index).is_visible(now):
+                batch.append((index, "", _CLEAR_TTL))
+
+        for index, line, line_ttl in batch:
+            self.__overlay.send_message(_message_id(index),
                                         line,
                                         'green',
                                         0,
-                                        line_y,
-                                        ttl=self.__config.overlay_ttl)
-            line_y+=20
-        
-        logger.info("Overlay Update done")
+                                        index * LINE_HEIGHT,
+                                        ttl=line_ttl)
+            if line != "":
+                self.__sent_lines[index] = _SentLine(line, now, line_ttl)
+        metrics.increment("overlay.messages", len(batch))
+        logger.info(f"Sent {len(batch)} of {len(lines)} Lines to the Overlay")
 
 
 
@@ -0,0 +1,77 @@
+"""
+This Module contains a tail-follow Reader for the Journal Directory.
+
+It remembers a Byte Offset per Journal and only parses what has been appended since the last poll. Once the Game
+starts a new Journal, the old one is read to its end and the Reader continues with the new one.
+Like journal_scanner, this Module only depends on the Standard Library.
+"""
+from pathlib import Path
+from typing import Optional
+
+import massacre.json_decoder as json_decoder
+from massacre.journal_scanner import LogCursor
+
+
+class JournalFollower:
+    """
+    Follows the newest Journal in a Directory, similar to `tail -f`.
+    """
+
+    def __init__(self, journal_dir: Path, offsets: Optional[dict[str, int]] = None):
+        """
+        :param offsets: Offsets per Journal Path to continue from, as returned by offsets. Journals without an
+                        Offset are read from the start.
+        """
+        self._journal_dir = journal_dir
+        self._offsets: dict[str, int] = dict(offsets) if offsets is not None else {}
+        self._cursor: Optional[LogCursor] = None
+
+    @property
+    def offsets(self) -> dict[str, int]:
+        """
+        Journal Path -> Offset up to which the Journal has been read
+        """
+        return dict(self._offsets)
+
+    @property
+    def current_journal(self) -> Optional[Path]:
+        return self._cursor.file_path if self._cursor is not None else None
+
+    def __find_newest_journal(self) -> Optional[Path]:
+        journals = [x for x in self._journal_dir.glob("Journal.*.log") if x.is_file()]
+        if len(journals) == 0:
+            return None
+        return max(journals, key=lambda x: (x.stat().st_mtime, x.name))
+
+    def __read(self, cursor: LogCursor) -> list[dict]:
+        events = []
+        try:
+            for line in cursor.read_lines():
+                try:
+                    events.append(json_decoder.decoder.decode(line))
+                except ValueError:
+                    # Invalid JSON or invalid UTF-8. Skip the Line, just like the Scan does.
+                    pass
+        except OSError:
+            # Journal was removed or cannot be opened right now. The Offset stays where it is.
+            pass
+        self._offsets[str(cursor.file_path)] = cursor.offset
+        return events
+
+    def poll(self) -> list[dict]:
+        """
+        Return all Events appended since the last poll, in the Order they were written.
+        Detects if the Game has rotated to a new Journal.
+        """
+        events = []
+        newest_journal = self.__find_newest_journal()
+
+        if self._cursor is not None:
+            # Drain the current Journal first. On Rotation the Game writes its last Lines before starting a new one.
+            events.extend(self.__read(self._cursor))
+
+        if newest_journal is not None and newest_journal != self.current_journal:
+            self._cursor = LogCursor(newest_journal, self._offsets.get(str(newest_journal), 0))
+            events.extend(self.__read(self._cursor))
+
+        return events
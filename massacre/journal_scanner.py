@@ -0,0 +1,352 @@
+"""
+This Module contains the Logic to extract Missions from Journal Files.
+
+It intentionally only depends on the Standard Library (no EDMC Modules, no Logger), so that it can be imported by
+Worker Processes which do not run inside EDMC. Lines are decoded by json_decoder, which uses a faster Decoder if one
+happens to be installed.
+"""
+import os
+import sys
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+from typing import BinaryIO, Callable, Iterator, NamedTuple, Optional, Union
+
+import massacre.json_decoder as json_decoder
+from massacre.mission_lifecycle import FINISHING_EVENTS, MissionLifecycleEvent
+from massacre.mission_record import MissionRecord
+
+ScanResult = tuple[str, list[MissionRecord], list[MissionLifecycleEvent], int, int]
+"""
+CMDR of the Journal, all MissionAccepted-Events in the Journal, all other Mission Lifecycle Events in the Journal,
+the amount of Lines that could not be parsed and the Offset up to which the Journal has been read (see LogCursor).
+"""
+
+_MIN_FILES_FOR_POOL = 4
+"""Below this many Journals a Pool is never worth it"""
+_MIN_BYTES_FOR_POOL = 16 * 1024 * 1024
+"""Below this many Bytes the Pool Spin-Up costs more than it saves"""
+_BYTES_PER_WORKER = 8 * 1024 * 1024
+"""Each additional Worker should at least have this many Bytes to chew on"""
+_MAX_WORKERS = 8
+
+
+_CHUNK_SIZE = 1024 * 1024
+"""Journals are read in Chunks of this many Bytes"""
+_HEADER_CHUNK_SIZE = 64 * 1024
+"""The Commander-Event is at the very start of a Journal, so smaller Chunks are used when only looking for it"""
+_COMMANDER_MARKER = b'"Commander"'
+_MISSION_ACCEPTED_MARKER = b'"MissionAccepted"'
+_SCANNED_LIFECYCLE_EVENTS = ("MissionRedirected",) + FINISHING_EVENTS
+_EVENT_MARKERS = (_COMMANDER_MARKER, _MISSION_ACCEPTED_MARKER) + \
+    tuple(f'"{event}"'.encode("utf8") for event in _SCANNED_LIFECYCLE_EVENTS)
+"""
+Only Lines containing one of these Byte Patterns can be a Commander- or Mission Lifecycle Event.
+Any other Line is skipped without decoding it. Lines that merely contain a marker (e.g. LoadGame has a
+"Commander"-Key) are decoded and then dropped by the regular event check.
+"""
+
+
+def _find_candidate_lines(buffer: bytes, end: int, markers: tuple[bytes, ...] = _EVENT_MARKERS,
+                          start: int = 0) -> list[tuple[int, bytes]]:
+    """
+    Return all Lines in buffer[start:end] that contain one of the markers, in the Order they appear in, together
+    with their Position in the buffer. start must be the beginning of a Line.
+    """
+    line_starts: dict[int, int] = {}
+    for marker in markers:
+        position = buffer.find(marker, start, end)
+        while position != -1:
+            line_start = buffer.rfind(b"\n", 0, position) + 1
+            line_end = buffer.find(b"\n", position, end)
+            if line_end == -1:
+                line_end = end
+            line_starts[line_start] = line_end
+            position = buffer.find(marker, line_end, end)
+    return [(start, buffer[start:line_starts[start]]) for start in sorted(line_starts.keys())]
+
+
+class LogCursor:
+    """
+    Remembers up to which Byte a Journal has been read, so that the next read only covers Bytes appended since.
+
+    Only Lines terminated by a Line Break count as read. A Line the Game is still writing stays in front of the
+    Cursor and is read again once it is complete. Journals are append-only, so the Offset stays valid as long as
+    the Journal does not shrink.
+    """
+
+    def __init__(self, file_path: Path, offset: int = 0):
+        self.file_path = file_path
+        self.offset = offset
+        self.tail = b""
+        """Bytes behind the last Line Break as of the last read"""
+
+    def __iter_chunks(self, chunk_size: int) -> Iterator[tuple[int, bytes, int]]:
+        """
+        Yield (Offset of the buffer, buffer, end) for each Chunk, where buffer[:end] only contains complete Lines.
+        The Offset is advanced past these Lines before they are yielded.
+        """
+        with open(self.file_path, "rb") as log_file:
+            log_file.seek(self.offset)
+            carry = b""
+            while True:
+                chunk = log_file.read(chunk_size)
+                if not chunk:
+                    break
+                buffer = carry + chunk
+                end = buffer.rfind(b"\n") + 1
+                if end == 0:
+                    carry = buffer
+                    continue
+                buffer_offset = self.offset
+                self.offset += end
+                carry = buffer[end:]
+                yield buffer_offset, buffer, end
+            self.tail = carry
+
+    def read_candidate_lines(self, markers: tuple[bytes, ...] = _EVENT_MARKERS,
+                             chunk_size: int = _CHUNK_SIZE) -> Iterator[tuple[int, bytes]]:
+        """
+        Yield all complete Lines appended since the last read that contain one of the markers,
+        together with their Offset in the Journal
+        """
+        for buffer_offset, buffer, end in self.__iter_chunks(chunk_size):
+            for start, line in _find_candidate_lines(buffer, end, markers):
+                yield buffer_offset + start, line
+
+    def read_lines(self, chunk_size: int = _CHUNK_SIZE) -> Iterator[bytes]:
+        """
+        Yield all complete, non-empty Lines appended since the last read
+        """
+        for _, buffer, end in self.__iter_chunks(chunk_size):
+            for line in buffer[:end].split(b"\n"):
+                if line.strip():
+                    yield line
+
+
+def _iter_candidate_lines_backwards(log_file: BinaryIO, markers: tuple[bytes, ...],
+                                    chunk_size: int = _CHUNK_SIZE) -> Iterator[tuple[int, bytes]]:
+    """
+    Same as LogCursor.read_candidate_lines, but starts at the end of the Journal. The newest Line is yielded first.
+    """
+    log_file.seek(0, os.SEEK_END)
+    position = log_file.tell()
+    carry = b""
+    while position > 0:
+        read_size = min(chunk_size, position)
+        position -= read_size
+        log_file.seek(position)
+        buffer = log_file.read(read_size) + carry
+        start = 0
+        if position > 0:
+            # Everything up to the first Line Break might be the tail of a Line that starts in the previous Chunk
+            start = buffer.find(b"\n") + 1
+            if start == 0:
+                carry = buffer
+                continue
+        for line_start, line in reversed(_find_candidate_lines(buffer, len(buffer), markers, start)):
+            yield position + line_start, line
+        carry = buffer[:start]
+
+
+class CommanderEvent(NamedTuple):
+    """A Commander-Event. It names the CMDR of all Events after it."""
+    name: str
+
+
+JournalEvent = Union[CommanderEvent, MissionRecord, MissionLifecycleEvent]
+
+
+def _decode_event(journal_path: str, line_offset: int, line: bytes) -> Optional[JournalEvent]:
+    """
+    Decode a candidate Line. Returns None if the Line merely contains a marker. Raises if the Line is not valid.
+    """
+    if _MISSION_ACCEPTED_MARKER in line:
+        # Typed Decode straight into the Record, if the Decoder supports it
+        mission = json_decoder.decoder.decode_mission_accepted(line, (journal_path, line_offset))
+        if mission is not None:
+            return mission
+    line_as_json = json_decoder.decoder.decode(line)
+    event = line_as_json["event"]
+    if event == "Commander":
+        return CommanderEvent(str(line_as_json["Name"]))
+    if event == "MissionAccepted":
+        return MissionRecord.from_event(line_as_json, (journal_path, line_offset))
+    if event in _SCANNED_LIFECYCLE_EVENTS:
+        return MissionLifecycleEvent(event, int(line_as_json["MissionID"]), line_offset)
+    return None
+
+
+def iter_journal_events(cursor: LogCursor) -> Iterator[Optional[JournalEvent]]:
+    """
+    Yield the Commander- and Mission Lifecycle Events appended since the last read of the Cursor, in the Order they
+    were written. A Line that could not be parsed is yielded as None, so the caller can count them.
+
+    Only one Chunk of the Journal is held in Memory at a time.
+    """
+    journal_path = str(cursor.file_path)
+    for line_offset, line in cursor.read_candidate_lines():
+        try:
+            event = _decode_event(journal_path, line_offset, line)
+        except Exception:
+            yield None
+            continue
+        if event is not None:
+            yield event
+
+    # Last Line without a Line Break. Most likely truncated, in which case it fails to decode. It stays in front
+    # of the Cursor either way, so a later Scan from the returned Offset sees it again once it is complete.
+    for line_start, line in _find_candidate_lines(cursor.tail, len(cursor.tail)):
+        try:
+            event = _decode_event(journal_path, cursor.offset + line_start, line)
+        except Exception:
+            yield None
+            continue
+        if event is not None:
+            yield event
+
+
+def extract_mission_accepted_events_from_log(file_path: Path, offset: int = 0) -> ScanResult:
+    """
+    Return all Mission-Accepted events and all other Mission Lifecycle Events in this file, as well as the CMDR for
+    this log. If the log does not contain a CMDR, "" is returned
+
+    :param offset: Only read the Bytes behind this Offset, as returned by a previous Scan of the same File
+    """
+    cmdr = ""
+    return_list: list[MissionRecord] = []
+    lifecycle_events: list[MissionLifecycleEvent] = []
+    failed_lines = 0
+
+    cursor = LogCursor(file_path, offset)
+    for event in iter_journal_events(cursor):
+        if event is None:
+            failed_lines += 1
+        elif isinstance(event, CommanderEvent):
+            cmdr = event.name
+        elif isinstance(event, MissionRecord):
+            return_list.append(event)
+        else:
+            lifecycle_events.append(event)
+
+    return cmdr, return_list, lifecycle_events, failed_lines, cursor.offset
+
+
+def read_cmdr_from_log(file_path: Path) -> str:
+    """
+    Return the CMDR of this log by only reading up to its Commander-Event.
+    If the log does not contain a CMDR, "" is returned
+    """
+    for _, line in LogCursor(file_path).read_candidate_lines((_COMMANDER_MARKER,), _HEADER_CHUNK_SIZE):
+        try:
+            line_as_json = json_decoder.decoder.decode(line)
+            if line_as_json["event"] == "Commander":
+                return str(line_as_json["Name"])
+        except Exception:
+            pass
+    return ""
+
+
+def find_end_of_last_line(file_path: Path) -> int:
+    """
+    Return the Offset right behind the last Line Break of this log, i.e. where a LogCursor reading the whole log
+    would stop. Only the end of the log is read.
+    """
+    with open(file_path, "rb") as log_file:
+        log_file.seek(0, os.SEEK_END)
+        position = log_file.tell()
+        while position > 0:
+            read_size = min(_HEADER_CHUNK_SIZE, position)
+            position -= read_size
+            log_file.seek(position)
+            line_break = log_file.read(read_size).rfind(b"\n")
+            if line_break != -1:
+                return position + line_break + 1
+    return 0
+
+
+def find_mission_accepted_events_in_log(file_path: Path, mission_ids: set[int]) -> dict[int, MissionRecord]:
+    """
+    Look for the MissionAccepted-Events of the provided Mission IDs. The Journal is read backwards, starting at its
+    end, and reading stops as soon as all Missions have been found.
+
+    If a Mission was accepted multiple times, the latest MissionAccepted-Event is returned.
+    """
+    found: dict[int, MissionRecord] = {}
+    if len(mission_ids) == 0:
+        return found
+
+    journal_path = str(file_path)
+    with open(file_path, "rb") as current_log_file:
+        for line_offset, line in _iter_candidate_lines_backwards(current_log_file, (_MISSION_ACCEPTED_MARKER,)):
+            try:
+                mission = json_decoder.decoder.decode_mission_accepted(line, (journal_path, line_offset))
+            except Exception:
+                continue
+            if mission is None:
+                continue
+            if mission.mission_id in mission_ids and mission.mission_id not in found:
+                found[mission.mission_id] = mission
+                if len(found) == len(mission_ids):
+                    break
+    return found
+
+
+def pick_worker_count(file_count: int, total_bytes: int, cpu_count: Optional[int] = None) -> int:
+    """
+    Heuristic on how many Workers should be used to scan the Journals.
+    1 means that the Journals should be scanned sequentially.
+    """
+    if file_count < _MIN_FILES_FOR_POOL or total_bytes < _MIN_BYTES_FOR_POOL:
+        return 1
+    if cpu_count is None:
+        cpu_count = os.cpu_count() or 1
+    return max(1, min(cpu_count, file_count, total_bytes // _BYTES_PER_WORKER, _MAX_WORKERS))
+
+
+def __build_executor(worker_count: int) -> Executor:
+    """
+    Processes are only used when running from Source. A frozen EDMC Build would start a new EDMC Instance for each
+    Worker Process, so a Thread Pool is used there instead.
+    """
+    if getattr(sys, "frozen", False):
+        return ThreadPoolExecutor(max_workers=worker_count, thread_name_prefix="Massacre Journal Scan")
+    return ProcessPoolExecutor(max_workers=worker_count)
+
+
+def scan_journals(log_files: list[Path], worker_count: int,
+                  progress: Optional[Callable[[int], None]] = None,
+                  offsets: Optional[list[int]] = None) -> Iterator[ScanResult]:
+    """
+    Scan all provided Journals and yield the Results as soon as they are available. The Results are in the same
+    Order as the provided Files, regardless of if the Journals are scanned in parallel or not. This allows the
+    Events to be applied in the Order they were written, without waiting for the whole Scan.
+
+    A worker_count of 1 scans the Journals sequentially, one at a time. Errors of the Pool are raised to the caller,
+    which is expected to fall back to a sequential Scan of the remaining Journals.
+
+    :param progress: Invoked with the amount of scanned Journals after each Journal
+    :param offsets: Offset per Journal to continue reading from. Every Journal is read from the start if not provided
+    """
+    if offsets is None:
+        offsets = [0] * len(log_files)
+    scanned = 0
+
+    if worker_count <= 1:
+        for log_file, offset in zip(log_files, offsets):
+            result = extract_mission_accepted_events_from_log(log_file, offset)
+            scanned += 1
+            if progress is not None:
+                progress(scanned)
+            yield result
+        return
+
+    executor = __build_executor(worker_count)
+    try:
+        for result in executor.map(extract_mission_accepted_events_from_log, log_files, offsets):
+            scanned += 1
+            if progress is not None:
+                progress(scanned)
+            yield result
+    finally:
+        # If the caller stops early, the Journals that have not been picked up by a Worker yet are not scanned
+        executor.shutdown(wait=True, cancel_futures=True)
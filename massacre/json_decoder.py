@@ -0,0 +1,136 @@
+"""
+This Module contains the JSON Decoder used to parse Journal Lines.
+
+The Decoder of the Standard Library is always available. If msgspec or orjson can be imported, they are used instead,
+as they decode Journal Lines several times faster. EDMC does not ship either of them, but they might be available when
+running from Source, in Headless Mode or in the Benchmarks.
+
+msgspec additionally decodes MissionAccepted-Events straight into the Fields kept by MissionRecord, without building
+a dict of all of their Fields first.
+
+The Backend can be forced with the MASSACRE_JSON_DECODER Environment Variable ("msgspec", "orjson" or "json").
+Worker Processes inherit it, so they use the same Backend.
+
+Like journal_scanner, this Module only depends on the Standard Library. The faster Decoders are optional.
+"""
+import json
+import os
+from typing import Any, Callable, Optional
+
+from massacre.mission_record import MISSION_ACCEPTED_KEYS, MissionRecord, MissionSource
+
+BACKEND_ENVIRONMENT_VARIABLE = "MASSACRE_JSON_DECODER"
+
+_PREFERRED_BACKENDS = ("msgspec", "orjson", "json")
+"""Fastest first"""
+
+
+class JsonDecoder:
+    """
+    Decodes single Journal Lines. All Backends raise a ValueError for Lines that are not valid JSON or not UTF-8.
+    """
+    name = "json"
+
+    def decode(self, line: bytes) -> Any:
+        return json.loads(line.decode("utf8"))
+
+    def decode_mission_accepted(self, line: bytes, source: MissionSource) -> Optional[MissionRecord]:
+        """
+        Decode a Line that is expected to be a MissionAccepted-Event. Returns None if it is a different Event.
+        """
+        event = self.decode(line)
+        if event["event"] != "MissionAccepted":
+            return None
+        return MissionRecord.from_event(event, source)
+
+
+class _OrjsonDecoder(JsonDecoder):
+    name = "orjson"
+
+    def __init__(self):
+        import orjson
+        self._loads = orjson.loads
+
+    def decode(self, line: bytes) -> Any:
+        # orjson.JSONDecodeError is a ValueError
+        return self._loads(line)
+
+
+class _MsgspecDecoder(JsonDecoder):
+    name = "msgspec"
+
+    def __init__(self):
+        import msgspec
+        # Only the Fields kept by MissionRecord are decoded, all others are skipped. They are typed as Any and are
+        # optional, so that the same Lines are accepted as by the other Backends.
+        mission_accepted_event = msgspec.defstruct(
+            "MissionAcceptedEvent", [("event", str)] + [(key, Any, None) for key in MISSION_ACCEPTED_KEYS]
+        )
+        self._decode = msgspec.json.Decoder().decode
+        self._decode_mission_accepted = msgspec.json.Decoder(mission_accepted_event).decode
+        self._error = msgspec.DecodeError
+
+    def decode(self, line: bytes) -> Any:
+        try:
+            return self._decode(line)
+        except self._error as e:
+            raise ValueError(str(e)) from e
+
+    def decode_mission_accepted(self, line: bytes, source: MissionSource) -> Optional[MissionRecord]:
+        try:
+            event = self._decode_mission_accepted(line)
+        except self._error as e:
+            raise ValueError(str(e)) from e
+        if event.event != "MissionAccepted":
+            return None
+        return MissionRecord.from_values([getattr(event, key) for key in MISSION_ACCEPTED_KEYS], source)
+
+
+_BACKENDS: dict[str, Callable[[], JsonDecoder]] = {
+    "msgspec": _MsgspecDecoder,
+    "orjson": _OrjsonDecoder,
+    "json": JsonDecoder
+}
+
+
+def available_backends() -> list[str]:
+    """
+    Names of all Backends that can be used in this Environment, fastest first
+    """
+    backends = []
+    for name in _PREFERRED_BACKENDS:
+        try:
+            _BACKENDS[name]()
+            backends.append(name)
+        except ImportError:
+            pass
+    return backends
+
+
+def __pick_decoder(name: Optional[str]) -> JsonDecoder:
+    if name is not None and name != "":
+        # An explicitly requested Backend that is not available is an Error, not something to silently fall back from
+        return _BACKENDS[name]()
+    for backend in _PREFERRED_BACKENDS:
+        try:
+            return _BACKENDS[backend]()
+        except ImportError:
+            continue
+    return JsonDecoder()
+
+
+try:
+    decoder: JsonDecoder = __pick_decoder(os.environ.get(BACKEND_ENVIRONMENT_VARIABLE))
+    """The Decoder used for all Journal Lines"""
+except (KeyError, ImportError):
+    # A misconfigured Environment must not keep the Plugin from loading
+    decoder = __pick_decoder(None)
+
+
+def set_backend(name: Optional[str]):
+    """
+    Switch the Backend of this Process, e.g. for Benchmarks. None picks the fastest available Backend.
+    Raises KeyError for an unknown and ImportError for an unavailable Backend.
+    """
+    global decoder
+    decoder = __pick_decoder(name)
@@ -2,7 +2,13 @@ from pathlib import Path
 import logging
 import os
 from os.path import basename, dirname
-import config
+
+try:
+    import config
+    _app_name = config.appname
+except ImportError:
+    # Not running inside EDMC, see massacre.headless
+    _app_name = "EDMarketConnector"
 
 _plugin_name = basename(Path(dirname(__file__)).parent)
 
@@ -11,7 +17,7 @@ def __build_logger_for_module() -> logging.Logger:
     """
     Create the logger for this Plugin in accordance with the EDMC Docs
     """
-    logger_name = f'{config.appname}.{_plugin_name}'
+    logger_name = f'{_app_name}.{_plugin_name}'
     _logger = logging.getLogger(logger_name)
 
     if not _logger.hasHandlers():
@@ -0,0 +1,103 @@
+"""
+This Module contains the single Queue through which all UI and Overlay Updates reach the Tk Main Loop.
+
+Tk Widgets must only be touched from the Main Thread, but Updates are produced on the Mission Index Thread, the
+Version Check Thread and by Journal Events. Instead of every Producer hopping over on its own, they post a Callable
+here. The Queue is drained on the Main Loop, after a single <<MassacreDispatch>> Event has been generated for any
+Amount of queued Callables.
+
+Until a Widget is attached (e.g. in Headless Mode), posted Callables run right away on the posting Thread.
+"""
+import queue
+import threading
+import tkinter as tk
+from typing import Callable, Optional
+
+from massacre.diagnostic_recorder import recorder
+from massacre.logger_factory import logger
+
+_DISPATCH_EVENT = "<<MassacreDispatch>>"
+
+
+class MainThreadDispatcher:
+    def __init__(self):
+        self._queue: "queue.SimpleQueue[Callable[[], None]]" = queue.SimpleQueue()
+        self._widget: Optional[tk.Misc] = None
+        self._lock = threading.Lock()
+        self._signalled = False
+        """Whether a Dispatch Event is on its way. Any further Callables are drained along with it."""
+
+    def attach(self, widget: tk.Misc):
+        """
+        Drain the Queue on the Main Loop of the provided Widget from now on. Must be called from the Main Thread.
+        """
+        widget.bind(_DISPATCH_EVENT, lambda _: self.drain())
+        self._widget = widget
+        self.drain()
+
+    @staticmethod
+    def is_main_thread() -> bool:
+        return threading.current_thread() is threading.main_thread()
+
+    def post(self, callback: Callable[[], None]):
+        """
+        Run the Callable on the Main Loop, after everything posted before it. Safe to be called from any Thread.
+        """
+        if self._widget is None:
+            self.__run(callback)
+            return
+        self._queue.put(callback)
+        with self._lock:
+            if self._signalled:
+                return
+            self._signalled = True
+        try:
+            if self.is_main_thread():
+                self._widget.after_idle(self.drain)
+            else:
+                self._widget.event_generate(_DISPATCH_EVENT)
+        except tk.TclError:
+            # The Widget is gone, EDMC is shutting down. The next Post signals again, in case it was only a Hiccup.
+            logger.warning("Failed to dispatch to the Main Loop. Queued Updates are delayed until the next one.")
+            with self._lock:
+                self._signalled = False
+
+    def post_after(self, delay_ms: int, callback: Callable[[], None]):
+        """
+        Run the Callable on the Main Loop once delay_ms have passed, or on the next Idle Tick if it is 0.
+        Safe to be called from any Thread.
+        """
+        def schedule():
+            if self._widget is None:
+                self.__run(callback)
+            elif delay_ms > 0:
+                self._widget.after(delay_ms, lambda: self.__run(callback))
+            else:
+                self._widget.after_idle(lambda: self.__run(callback))
+        self.post(schedule)
+
+    def drain(self):
+        """
+        Run everything that has been posted so far. Called on the Main Loop.
+        Anything posted while draining signals again, so that a busy Producer can not starve the Main Loop.
+        """
+        with self._lock:
+            self._signalled = False
+            pending = self._queue.qsize()
+        for _ in range(pending):
+            try:
+                callback = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            self.__run(callback)
+
+    @staticmethod
+    def __run(callback: Callable[[], None]):
+        try:
+            callback()
+        except Exception:
+            logger.exception("Dispatched Update failed")
+            recorder.dump_on_exception("Main Loop Update")
+
+
+dispatcher = MainThreadDispatcher()
@@ -0,0 +1,373 @@
+"""
+This Module contains the "data-view" of all Massacre Missions that is displayed in the UI and the Overlay.
+
+It does not depend on Tk, so that it can also be used outside of EDMC (see massacre.headless).
+"""
+import heapq
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Iterable, Mapping, Optional
+
+from massacre.massacre_mission_state import MassacreMission
+
+
+class MassacreMissionData:
+    """
+    Creates a "data-view" for the UI from all massacre missions. Will be used to create a table-like UI
+    Done to split the calculations from the UI.
+    Read-only once built, so that it can be shared between Threads (see stack_snapshot).
+    """
+
+    @dataclass(frozen=True)
+    class FactionState:
+        killcount: int
+        reward: int 
+        shareable_reward: int
+
+
+    def __init__(self, massacre_state: dict[int, MassacreMission],
+                 aggregator: Optional["MassacreMissionAggregator"] = None):
+        """
+        :param aggregator: Running Totals of exactly these Missions (see MassacreMissionAggregator). If not provided,
+                           they are summed up from scratch.
+        """
+        # The Massacre Mission State is no longer written to the Log on every Update. Each Stack Snapshot is kept by
+        # the Diagnostic Recorder instead, and only written to a File on Demand (see diagnostic_recorder).
+        if aggregator is None:
+            aggregator = MassacreMissionAggregator()
+            aggregator.sync(massacre_state)
+        self.warnings: tuple[str, ...] = tuple(aggregator.warnings())
+        self.faction_to_count_lookup: Mapping[str, MassacreMissionData.FactionState] = \
+            MappingProxyType(aggregator.faction_states())
+        self.stack_height = aggregator.stack_height
+        """
+        The highest amount of kills needed per faction in this stack.
+        """
+        self.before_stack_height = aggregator.before_stack_height
+        """
+        The SECOND-highest amount of kills needed per faction in this stack.
+        This is used for the delta-Column of the highest Stack to show the negative
+        delta towards the second-highest stack.
+        """
+        self.target_sum = aggregator.target_sum
+        """
+        The amount of total mission kills (not total required kills (see stack_height))
+        """
+        self.reward = aggregator.reward
+        """
+        How much the player should expect in Wing- and Non-Wing Missions
+        """
+        self.shareable_reward = aggregator.shareable_reward
+        """
+        How much the player should expect in Wing-Missions
+        """
+        self.mission_count = aggregator.mission_count
+        """
+        How many (massacre) missions does the user currently have.
+        """
+
+
+@dataclass
+class _FactionTotals:
+    """
+    Running Totals of all Missions handed out by one Faction
+    """
+    killcount: int = 0
+    reward: int = 0
+    shareable_reward: int = 0
+    missions: int = 0
+    """How many Missions are counted towards this Faction"""
+
+
+class _FirstSeenOrder:
+    """
+    Distinct Values (e.g. Source Factions) in the Order they are first seen when iterating the Missions by Position,
+    kept up to date as Missions are added and removed instead of being sorted for every Data-View.
+
+    Each Value keeps a Min-Heap of the Positions of its Missions, so that its first Position is always on top. Entries
+    of removed Missions are only dropped once they reach the top (or when the Heap is rebuilt, see __compact).
+    Adding a Mission at the End and removing any Mission but the first of its Value is O(log k), k being the Missions
+    of that Value. Only when a Value appears before the End, or its first Mission is removed, the Value is moved,
+    which is linear in the Number of distinct Values (a handful of Factions or Systems), never in the Missions.
+    """
+
+    def __init__(self):
+        self._entries: dict[int, tuple[int, str]] = {}
+        """Mission ID -> (Position, Value) of every Mission that is counted"""
+        self._missions_of: dict[str, set[int]] = {}
+        self._positions: dict[str, list[tuple[int, int]]] = {}
+        """Value -> Min-Heap of (Position, Mission ID). The Top is always a counted Mission."""
+        self._order: dict[str, None] = {}
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def __iter__(self):
+        return iter(self._order)
+
+    def add(self, mission_id: int, position: int, value: str):
+        self._entries[mission_id] = (position, value)
+        missions = self._missions_of.get(value)
+        if missions is None:
+            self._missions_of[value] = {mission_id}
+            self._positions[value] = [(position, mission_id)]
+            self.__place(value, position)
+            return
+        missions.add(mission_id)
+        heap = self._positions[value]
+        is_first = position < heap[0][0]
+        heapq.heappush(heap, (position, mission_id))
+        if is_first:
+            # A replaced Mission keeps its Position, so it may be seen before the others of its Value
+            self.__place(value, position)
+
+    def remove(self, mission_id: int):
+        position, value = self._entries.pop(mission_id)
+        missions = self._missions_of[value]
+        missions.discard(mission_id)
+        if len(missions) == 0:
+            del self._missions_of[value]
+            del self._positions[value]
+            del self._order[value]
+            return
+        heap = self._positions[value]
+        if heap[0] != (position, mission_id):
+            # Not the first Mission of its Value. The Entry is dropped once it reaches the Top.
+            if len(heap) > 2 * len(missions) + 8:
+                self.__compact(value)
+            return
+        heapq.heappop(heap)
+        while self._entries.get(heap[0][1]) != (heap[0][0], value):
+            heapq.heappop(heap)
+        self.__place(value, heap[0][0])
+
+    def __first_position(self, value: str) -> int:
+        return self._positions[value][0][0]
+
+    def __place(self, value: str, first_position: int):
+        """
+        Put the Value where its first Position belongs. Usually that is the End.
+        """
+        self._order.pop(value, None)
+        if len(self._order) == 0 or self.__first_position(next(reversed(self._order))) < first_position:
+            self._order[value] = None
+            return
+        order: dict[str, None] = {}
+        for other in self._order:
+            if value not in order and self.__first_position(other) > first_position:
+                order[value] = None
+            order[other] = None
+        order.setdefault(value)
+        self._order = order
+
+    def __compact(self, value: str):
+        heap = [(self._entries[x][0], x) for x in self._missions_of[value]]
+        heapq.heapify(heap)
+        self._positions[value] = heap
+
+
+class MassacreMissionAggregator:
+    """
+    Keeps the Figures of MassacreMissionData as running Totals, so that adding, changing or removing a single Mission
+    only updates what that Mission contributes, instead of summing up all Missions again.
+
+    - The Kill Counts of all Factions are counted per distinct Value, and kept in a Max-Heap whose Entries are dropped
+      lazily once no Faction has that Value anymore. The highest two are taken from its Top in O(log n) amortized.
+    - Factions, Target Factions, Types and Systems are kept in the Order they are first seen (see _FirstSeenOrder).
+      A Warning is needed as soon as there is more than one Target Faction, Type or System.
+
+    The Missions are ordered like the Dict passed to MassacreMissionData (the Order they were first seen in), so that
+    Warnings and Factions are listed in the same Order as if they were summed up from scratch. Building a Data-View
+    is linear in the Number of Factions and Target Values, not in the Number of Missions.
+
+    Not thread-safe. Whoever owns the Aggregator has to make sure it is only used by one thread at a time.
+    """
+
+    def __init__(self):
+        self._missions: dict[int, tuple[int, MassacreMission]] = {}
+        """Mission ID -> (Position, Mission). The Position only ever grows, see sync"""
+        self._next_position = 0
+        self._factions: dict[str, _FactionTotals] = {}
+        self._faction_order = _FirstSeenOrder()
+        self._factions_per_kill_count: dict[int, int] = {}
+        self._kill_count_heap: list[int] = []
+        """Negated Kill Counts, so that the highest is on Top. May hold Values no Faction has anymore."""
+        self._target_factions = _FirstSeenOrder()
+        self._target_types = _FirstSeenOrder()
+        self._target_systems = _FirstSeenOrder()
+        self.target_sum = 0
+        self.reward = 0
+        self.shareable_reward = 0
+
+    @property
+    def mission_count(self) -> int:
+        return len(self._missions)
+
+    @property
+    def stack_height(self) -> int:
+        highest, _ = self.__highest_kill_counts()
+        return max(highest, 0) if highest is not None else 0
+
+    @property
+    def before_stack_height(self) -> int:
+        _, second = self.__highest_kill_counts()
+        if second is None or second <= 0:
+            # No other Faction, or all others have no Kills left. All at max Value.
+            return self.stack_height
+        return second
+
+    def put(self, mission: MassacreMission):
+        """
+        Add a Mission, or replace the Mission with the same ID. A replaced Mission keeps its Position.
+        """
+        known = self._missions.get(mission.id)
+        if known is None:
+            position = self._next_position
+            self._next_position += 1
+        else:
+            position = known[0]
+            self.__subtract(known[1])
+        self._missions[mission.id] = (position, mission)
+        self.__add(mission, position)
+
+    def remove(self, mission_id: int):
+        """
+        Remove a Mission. Does nothing if it is not known.
+        """
+        known = self._missions.pop(mission_id, None)
+        if known is not None:
+            self.__subtract(known[1])
+
+    def apply(self, changes: Iterable[tuple[int, Optional[MassacreMission]]]) -> bool:
+        """
+        Apply Changes in the Order they were made to the Missions: (Mission ID, the new Mission, or None if it has been
+        removed). A Mission that has been removed and added again moves to the End, just like in a Dict.
+
+        Returns whether anything has been applied.
+        """
+        changed = False
+        for mission_id, mission in changes:
+            if mission is None:
+                self.remove(mission_id)
+            else:
+                self.put(mission)
+            changed = True
+        return changed
+
+    def sync(self, massacre_state: Mapping[int, MassacreMission]) -> bool:
+        """
+        Bring the Aggregator in line with the provided Missions. Only Missions that are new, gone, or have been
+        replaced by another Object are applied, everything else is left as it is. This has to look at every Mission,
+        so apply is used whenever the Changes themselves are known.
+
+        Returns whether anything has been applied.
+        """
+        changed = False
+        for mission_id in [x for x in self._missions.keys() if x not in massacre_state]:
+            self.remove(mission_id)
+            changed = True
+        last_position = -1
+        for mission_id, mission in massacre_state.items():
+            known = self._missions.get(mission_id)
+            if known is not None and known[0] < last_position:
+                # Removed and added again since the last Sync, so it is at the End of the Dict now
+                self.remove(mission_id)
+                known = None
+            if known is None or known[1] is not mission:
+                self.put(mission)
+                changed = True
+            last_position = self._missions[mission_id][0]
+        return changed
+
+    def faction_states(self) -> dict[str, "MassacreMissionData.FactionState"]:
+        """
+        A Copy of the Totals of each Faction, ordered by their first Mission
+        """
+        return {
+            faction: MassacreMissionData.FactionState(totals.killcount, totals.reward, totals.shareable_reward)
+            for faction, totals in ((x, self._factions[x]) for x in self._faction_order)
+        }
+
+    def warnings(self) -> list[str]:
+        warnings: list[str] = []
+        for label, values in (("Target Factions", self._target_factions), ("Target Types", self._target_types),
+                              ("Target Systems", self._target_systems)):
+            if len(values) > 1:
+                warnings.append(f"Multiple {label}: {', '.join(values)}!")
+        return warnings
+
+    def __add(self, mission: MassacreMission, position: int):
+        faction = self._factions.get(mission.source_faction)
+        if faction is None:
+            faction = _FactionTotals()
+            self._factions[mission.source_faction] = faction
+        else:
+            self.__forget_kill_count(faction.killcount)
+        faction.missions += 1
+        faction.killcount += mission.count
+        faction.reward += mission.reward
+        # Only wing missions are considered for shareable rewards
+        if mission.is_wing:
+            faction.shareable_reward += mission.reward
+            self.shareable_reward += mission.reward
+        self.__remember_kill_count(faction.killcount)
+        self.target_sum += mission.count
+        self.reward += mission.reward
+
+        self._faction_order.add(mission.id, position, mission.source_faction)
+        self._target_factions.add(mission.id, position, mission.target_faction)
+        self._target_types.add(mission.id, position, mission.target_type)
+        self._target_systems.add(mission.id, position, mission.target_system)
+
+    def __subtract(self, mission: MassacreMission):
+        faction = self._factions[mission.source_faction]
+        self.__forget_kill_count(faction.killcount)
+        faction.missions -= 1
+        faction.killcount -= mission.count
+        faction.reward -= mission.reward
+        if mission.is_wing:
+            faction.shareable_reward -= mission.reward
+            self.shareable_reward -= mission.reward
+        if faction.missions == 0:
+            del self._factions[mission.source_faction]
+        else:
+            self.__remember_kill_count(faction.killcount)
+        self.target_sum -= mission.count
+        self.reward -= mission.reward
+
+        for order in (self._faction_order, self._target_factions, self._target_types, self._target_systems):
+            order.remove(mission.id)
+
+    def __remember_kill_count(self, kill_count: int):
+        factions = self._factions_per_kill_count.get(kill_count, 0)
+        if factions == 0:
+            heapq.heappush(self._kill_count_heap, -kill_count)
+        self._factions_per_kill_count[kill_count] = factions + 1
+
+    def __forget_kill_count(self, kill_count: int):
+        factions = self._factions_per_kill_count[kill_count] - 1
+        if factions == 0:
+            # Its Entry in the Heap is dropped once it reaches the Top
+            del self._factions_per_kill_count[kill_count]
+            if len(self._kill_count_heap) > 2 * len(self._factions_per_kill_count) + 8:
+                self._kill_count_heap = [-x for x in self._factions_per_kill_count.keys()]
+                heapq.heapify(self._kill_count_heap)
+        else:
+            self._factions_per_kill_count[kill_count] = factions
+
+    def __highest_kill_counts(self) -> tuple[Optional[int], Optional[int]]:
+        """
+        The highest and the second-highest distinct Kill Count of all Factions, None if there is no such Value
+        """
+        heap = self._kill_count_heap
+        while len(heap) > 0 and -heap[0] not in self._factions_per_kill_count:
+            heapq.heappop(heap)
+        if len(heap) == 0:
+            return None, None
+        highest = -heapq.heappop(heap)
+        # Duplicates of the highest Value are dropped as well, it is pushed back once
+        while len(heap) > 0 and (-heap[0] == highest or -heap[0] not in self._factions_per_kill_count):
+            heapq.heappop(heap)
+        second = -heap[0] if len(heap) > 0 else None
+        heapq.heappush(heap, -highest)
+        return highest, second
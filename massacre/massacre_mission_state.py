@@ -1,17 +1,23 @@
 """
 This Module contains a subset of all active missions which only contain Massacre Missions
 """
-from typing import Callable
+import threading
+from typing import Callable, Mapping, NamedTuple, Optional
+from massacre.diagnostic_recorder import recorder
 from massacre.logger_factory import logger
+from massacre.metrics import metrics
+from massacre.mission_record import MissionRecord
 from dataclasses import dataclass
 
 import massacre.mission_repository
+from massacre.mission_repository import ActiveMissionsDelta
+from massacre.update_coalescer import UpdateCoalescer
 
-@dataclass
+@dataclass(frozen=True)
 class MassacreMission:
     """
     Class defining a Massacre Mission.
-    This class is used in the UI to generate a data view
+    This class is used in the UI to generate a data view. Immutable, so that it can be shared between Threads.
     """
     target_faction: str 
     count: int
@@ -36,64 +42,138 @@ class MassacreMission:
         return as_dict
 
 
-def __build_from_event(event: dict) -> MassacreMission:
+def __build_from_event(event: MissionRecord) -> MassacreMission:
     """
-    Build a Massacre Mission from a MissionAccepted-Event
+    Build a Massacre Mission from a MissionAccepted-Event (see MissionRecord)
     """
-    target_faction: str = event["TargetFaction"]
-    count: int = event["KillCount"]
-    reward: int = event["Reward"]
-    target_system: str = event["DestinationSystem"]
-    target_type: str = event["TargetType"]
-    source_faction: str = event["Faction"]
-    mission_id: int = event["MissionID"]
-    wing: bool = event["Wing"]
     return MassacreMission(
-            target_faction, 
-            count, 
-            reward, 
-            target_system, 
-            target_type, 
-            source_faction, 
-            wing, 
-            mission_id
+            event.target_faction,
+            event.kill_count,
+            event.reward,
+            event.destination_system,
+            event.target_type,
+            event.faction,
+            event.wing,
+            event.mission_id
         )
 
 
-massacre_mission_listeners: list[Callable[[dict[int, MassacreMission]], None]] = []
+class MassacreMissionChanges(NamedTuple):
+    """
+    What has been done to the Massacre Missions since the previous Flush of the Update Coalescer
+    """
+    sequence: int
+    """Grows by one with every Flush. A Listener that sees a Gap has missed the Changes of an earlier Flush."""
+    changes: tuple[tuple[int, Optional[MassacreMission]], ...]
+    """
+    (Mission ID, the new Mission, or None if it has been removed), in the Order they were made. Applied one after
+    another to the Massacre Missions of the previous Flush, they result in the Massacre Missions of this Flush.
+    """
+
+
+# Callback: (massacre missions, changes since the previous flush) -> void
+massacre_mission_listeners: list[Callable[[dict[int, MassacreMission], MassacreMissionChanges], None]] = []
 
 _massacre_mission_store: dict[int, MassacreMission] = {}
+_pending_changes: list[tuple[int, Optional[MassacreMission]]] = []
+"""The Changes made to the Store since the last Flush"""
+_flush_sequence = 0
+_store_lock = threading.Lock()
+"""
+The Store is updated by the Repository's Listeners, after the Repository Lock has been released. They are only ever
+run by one Thread at a time (see MissionRepository._deliver_notifications), but the Store is read when the Update
+Coalescer flushes, possibly on another Thread
+"""
 
 
-def __is_mission_a_massacre_mission(name: str, target_type: str) -> bool:
+def __is_mission_a_massacre_mission(name: Optional[str], target_type: Optional[str]) -> bool:
     """This is the filter-Function defining if a Mission is considered a Massacre-Mission"""
-    return name.startswith("Mission_Massacre") and "OnFoot" not in name and target_type
+    return name is not None and name.startswith("Mission_Massacre") and "OnFoot" not in name \
+        and bool(target_type)
+
+
+def is_massacre_mission(mission: MissionRecord) -> bool:
+    return __is_mission_a_massacre_mission(mission.name, mission.target_type)
+
+
+_classification_cache: dict[int, tuple[MissionRecord, Optional[MassacreMission]]] = {}
+"""
+Mission ID -> (Record, Massacre Mission built from it, or None if it is not a Massacre Mission).
+An Entry is dropped once the Mission is no longer active, and rebuilt if the Repository passes a different Record.
+Only used by the Repository's Listeners, which are run by one Thread at a time, not under the Repository Lock.
+"""
+
+
+def __classify(mission: MissionRecord) -> Optional[MassacreMission]:
+    """
+    The Massacre Mission for this Record, or None if it is not a Massacre Mission. Records are immutable, so the
+    Result is cached for as long as the Repository passes the same Record.
+    """
+    cached = _classification_cache.get(mission.mission_id)
+    if cached is not None and cached[0] is mission:
+        return cached[1]
+    massacre_mission: Optional[MassacreMission] = None
+    if __is_mission_a_massacre_mission(mission.name, mission.target_type):
+        massacre_mission = __build_from_event(mission)
+    _classification_cache[mission.mission_id] = (mission, massacre_mission)
+    return massacre_mission
 
 
-def __handle_new_missions_state(data: dict[int, dict]):
+def __handle_active_missions_delta(delta: ActiveMissionsDelta, _active_missions: Mapping[int, MissionRecord]):
     """
-    Callback used by the Mission Repository to notify this Module about new Missions. This module
-    will then filter out non-massacre missions.
+    Callback used by the Mission Repository to notify this Module about changed Missions. Only the Missions in the
+    Delta are looked at, and only those with a new Record are classified again. Non-Massacre Missions are filtered
+    out. Unchanged Massacre Missions keep their Object, so that the Aggregator in the UI can skip them.
 
-    :param data: All missions for this Commander (not just Massacre Missions)
+    :param delta: Changes to the active missions for this Commander (not just Massacre Missions)
     """
-    # Go through all Missions, check if they are Massacre Missions
-    logger.info(f"Received a new Missions State with {len(data)} Missions.")
-    relevant_mission_events = []
-    for mission in data.values():
-        if __is_mission_a_massacre_mission(mission["Name"], mission.get('TargetType', None)):
-            relevant_mission_events.append(mission)
-    logger.info(f"{len(relevant_mission_events)} of found Missions are Massacre Missions")
-    relevant_missions = map(__build_from_event, relevant_mission_events)
-
-    # Push new Mission State to the Massacre Mission Store
-    _massacre_mission_store.clear()
-    for mission in relevant_missions:
-        _massacre_mission_store[mission.id] = mission
-
-    # Emit Event
+    logger.info(f"Received a Missions Delta with {len(delta.added)} added, {len(delta.removed)} removed and "
+                f"{len(delta.changed)} changed Missions.")
+    recorder.record("active_missions_delta", delta)
+    with _store_lock:
+        for mission_id in delta.removed:
+            __remove_from_store(mission_id)
+            _classification_cache.pop(mission_id, None)
+        for missions in (delta.added, delta.changed):
+            for mission in missions.values():
+                massacre_mission = __classify(mission)
+                if massacre_mission is None:
+                    __remove_from_store(mission.mission_id)
+                elif _massacre_mission_store.get(mission.mission_id) is not massacre_mission:
+                    _massacre_mission_store[mission.mission_id] = massacre_mission
+                    _pending_changes.append((mission.mission_id, massacre_mission))
+    logger.info(f"{len(_massacre_mission_store)} of the active Missions are Massacre Missions")
+
+    # The Listeners are run once the Burst is over, see update_coalescer
+    update_coalescer.mark_dirty()
+
+
+def __remove_from_store(mission_id: int):
+    """
+    Must be called with the Store Lock held
+    """
+    if _massacre_mission_store.pop(mission_id, None) is not None:
+        _pending_changes.append((mission_id, None))
+
+
+def __emit_massacre_mission_state():
+    global _flush_sequence
+    # The Store may still be updated from the Mission Index Thread while the Listeners run
+    with _store_lock:
+        massacre_missions = dict(_massacre_mission_store)
+        _flush_sequence += 1
+        changes = MassacreMissionChanges(_flush_sequence, tuple(_pending_changes))
+        _pending_changes.clear()
     for listener in massacre_mission_listeners:
-        listener(_massacre_mission_store)
+        listener(massacre_missions, changes)
+
+
+update_coalescer = UpdateCoalescer(__emit_massacre_mission_state, "Massacre Mission State")
+"""
+Merges Bursts of Mission Updates, so that the massacre_mission_listeners run once per Burst. Flushes right away until
+a Scheduler is set (see UI.schedule_update).
+"""
+metrics.register_source("update_coalescer", update_coalescer.counters)
 
 
-massacre.mission_repository.active_missions_changed_event_listeners.append(__handle_new_missions_state)
+massacre.mission_repository.active_missions_delta_listeners.append(__handle_active_missions_delta)
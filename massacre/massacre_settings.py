@@ -3,7 +3,10 @@ A wrapper around EDMCs Configuration
 """
 import os
 from massacre.logger_factory import logger
+from massacre.metrics import metrics
+from massacre.diagnostic_recorder import recorder
 from massacre.version_check import download_url
+from pathlib import Path
 from typing import Callable, Optional
 from config import config
 import tkinter as tk
@@ -72,6 +75,69 @@ class Configuration:
     def display_mission_count(self, value: bool):
         config.set(f"{self.plugin_name}.display_mission_count", value)
 
+    #######################################
+    @property
+    def parallel_journal_scan(self):
+        return config.get_bool(f"{self.plugin_name}.parallel_journal_scan", default=False)
+
+    @parallel_journal_scan.setter
+    def parallel_journal_scan(self, value: bool):
+        config.set(f"{self.plugin_name}.parallel_journal_scan", value)
+
+    #######################################
+    @property
+    def lazy_mission_resolution(self):
+        return config.get_bool(f"{self.plugin_name}.lazy_mission_resolution", default=False)
+
+    @lazy_mission_resolution.setter
+    def lazy_mission_resolution(self, value: bool):
+        config.set(f"{self.plugin_name}.lazy_mission_resolution", value)
+
+    #######################################
+    @property
+    def mission_database(self):
+        return config.get_bool(f"{self.plugin_name}.mission_database", default=False)
+
+    @mission_database.setter
+    def mission_database(self, value: bool):
+        config.set(f"{self.plugin_name}.mission_database", value)
+
+    #######################################
+    @property
+    def per_cmdr_mission_partitions(self):
+        return config.get_bool(f"{self.plugin_name}.per_cmdr_mission_partitions", default=False)
+
+    @per_cmdr_mission_partitions.setter
+    def per_cmdr_mission_partitions(self, value: bool):
+        config.set(f"{self.plugin_name}.per_cmdr_mission_partitions", value)
+
+    #######################################
+    @property
+    def partition_idle_minutes(self):
+        return config.get_int(f"{self.plugin_name}.partition_idle_minutes", default=30)
+
+    @partition_idle_minutes.setter
+    def partition_idle_minutes(self, value: int):
+        config.set(f"{self.plugin_name}.partition_idle_minutes", value)
+
+    #######################################
+    @property
+    def update_coalescing_ms(self):
+        return config.get_int(f"{self.plugin_name}.update_coalescing_ms", default=100)
+
+    @update_coalescing_ms.setter
+    def update_coalescing_ms(self, value: int):
+        config.set(f"{self.plugin_name}.update_coalescing_ms", value)
+
+    #######################################
+    @property
+    def diagnostics_enabled(self):
+        return config.get_bool(f"{self.plugin_name}.diagnostics_enabled", default=False)
+
+    @diagnostics_enabled.setter
+    def diagnostics_enabled(self, value: bool):
+        config.set(f"{self.plugin_name}.diagnostics_enabled", value)
+
     #######################################
     def __init__(self, plugin_name: str):
        self.plugin_name = plugin_name
@@ -94,14 +160,51 @@ class Configuration:
             self.overlay_ttl = data['overlay_ttl'].get()
         if "display_mission_count" in keys:
             self.display_mission_count = data['display_mission_count'].get()
+        if "parallel_journal_scan" in keys:
+            self.parallel_journal_scan = data['parallel_journal_scan'].get()
+        if "lazy_mission_resolution" in keys:
+            self.lazy_mission_resolution = data['lazy_mission_resolution'].get()
+        if "update_coalescing_ms" in keys:
+            self.update_coalescing_ms = self.__read_number(data['update_coalescing_ms'], self.update_coalescing_ms,
+                                                           "Update Coalescing")
+        if "mission_database" in keys:
+            self.mission_database = data['mission_database'].get()
+        if "per_cmdr_mission_partitions" in keys:
+            self.per_cmdr_mission_partitions = data['per_cmdr_mission_partitions'].get()
+        if "partition_idle_minutes" in keys:
+            self.partition_idle_minutes = self.__read_number(data['partition_idle_minutes'],
+                                                             self.partition_idle_minutes, "Partition Idle Timeout")
+        if "diagnostics_enabled" in keys:
+            self.diagnostics_enabled = data['diagnostics_enabled'].get()
 
         for listener in self.config_changed_listeners:
             listener(self)
+
+    @staticmethod
+    def __read_number(variable: tk.Variable, previous: int, label: str) -> int:
+        """
+        Read a Number typed into an Entry. If it is empty or not a Number, the previous Value is kept.
+        """
+        try:
+            return variable.get()
+        except tk.TclError:
+            logger.warning(f"{label} is not a Number. Keeping {previous}")
+            return previous
         
 
 configuration = Configuration(plugin_name)
 
 
+STARTUP_MODE_SETTINGS = {
+    "lazy_mission_resolution": "Lazy Mission Resolution",
+    "per_cmdr_mission_partitions": "Per-CMDR Mission Partitions",
+    "mission_database": "Mission Database"
+}
+"""
+Settings that change how the Missions are read on Start. Only one of them can be enabled (see load.plugin_start3). If
+a Config has more than one of them, the first one in this Order is used.
+"""
+
 __setting_changes: dict[str, tk.Variable] = {}
 """
 Changes made in the Prefs-UI are stored here. If EDMC notifies the plugin that changes have been applied values from
@@ -118,6 +221,49 @@ def push_new_changes():
     __setting_changes.clear()
 
 
+def __select_startup_mode(setting: str):
+    """
+    Uncheck the other Startup Modes once one of them is checked, see STARTUP_MODE_SETTINGS
+    """
+    if not __setting_changes[setting].get():
+        return
+    for other in STARTUP_MODE_SETTINGS.keys():
+        if other != setting:
+            __setting_changes[other].set(0)
+
+
+def __build_diagnostics_ui(frame: tk.Frame, title_offset: int, checkbox_offset: int):
+    """
+    Recent Timings of each Stage (see metrics), and a Button to save all of them for a Bug Report
+    """
+    nb.Label(frame, text="Diagnostics", pady=10, padx=title_offset).grid(sticky=tk.W)
+    nb.Checkbutton(frame, text="Record Timings (for Bug Reports)", variable=__setting_changes["diagnostics_enabled"])\
+        .grid(columnspan=2, sticky=tk.W, padx=checkbox_offset)
+
+    summary = metrics.summary()
+    if len(summary) == 0:
+        summary = ["Nothing recorded yet."]
+    nb.Label(frame, text="\n".join(summary), justify=tk.LEFT).grid(columnspan=2, sticky=tk.W, padx=checkbox_offset)
+
+    status = tk.StringVar(value="")
+
+    def dump(save: Callable[[], Path]):
+        try:
+            status.set(f"Saved to {save()}")
+        except OSError as e:
+            logger.exception("Failed to save Diagnostics")
+            status.set(f"Failed to save Diagnostics: {e}")
+
+    dump_frame = nb.Frame(frame)
+    nb.Button(dump_frame, text="Save Diagnostics to File", command=lambda: dump(metrics.dump))\
+        .grid(column=0, row=0, sticky=tk.W)
+    nb.Button(dump_frame, text="Save recent Events to File",
+              command=lambda: dump(lambda: recorder.dump("Settings")))\
+        .grid(column=1, row=0, sticky=tk.W, padx=checkbox_offset)
+    nb.Label(dump_frame, textvariable=status).grid(column=0, row=1, columnspan=2, sticky=tk.W)
+    dump_frame.grid(columnspan=2, sticky=tk.W, padx=checkbox_offset)
+
+
 def build_settings_ui(root: nb.Notebook) -> tk.Frame:
     """
     Builds the UI for the Prefs-Tab for this Plugin.
@@ -138,6 +284,20 @@ def build_settings_ui(root: nb.Notebook) -> tk.Frame:
         tk.IntVar(value=configuration.display_ratio_and_cr_per_kill_row)
     __setting_changes["display_mission_count"] = \
         tk.IntVar(value=configuration.display_mission_count)
+    __setting_changes["parallel_journal_scan"] = \
+        tk.IntVar(value=configuration.parallel_journal_scan)
+    __setting_changes["lazy_mission_resolution"] = \
+        tk.IntVar(value=configuration.lazy_mission_resolution)
+    __setting_changes["update_coalescing_ms"] = \
+        tk.IntVar(value=configuration.update_coalescing_ms)
+    __setting_changes["mission_database"] = \
+        tk.IntVar(value=configuration.mission_database)
+    __setting_changes["per_cmdr_mission_partitions"] = \
+        tk.IntVar(value=configuration.per_cmdr_mission_partitions)
+    __setting_changes["partition_idle_minutes"] = \
+        tk.IntVar(value=configuration.partition_idle_minutes)
+    __setting_changes["diagnostics_enabled"] = \
+        tk.IntVar(value=configuration.diagnostics_enabled)
 
 
     nb.Label(frame, text="UI Settings", pady=10).grid(sticky=tk.W, padx=title_offset)
@@ -153,10 +313,38 @@ def build_settings_ui(root: nb.Notebook) -> tk.Frame:
     ]
     for entry in ui_settings_checkboxes:
         entry.grid(columnspan=2, padx=checkbox_offset, sticky=tk.W)
+    coalescing_frame = nb.Frame(frame)
+    nb.Label(coalescing_frame, text="Merge Updates within (Milliseconds, 0 = when idle):")\
+        .grid(column=0, row=0, sticky=tk.W)
+    nb.Entry(coalescing_frame, textvariable=__setting_changes["update_coalescing_ms"])\
+        .grid(column=1, row=0, sticky=tk.W, padx=checkbox_offset)
+    coalescing_frame.grid(columnspan=2, sticky=tk.W, padx=checkbox_offset)
  
     nb.Label(frame, text="Other", pady=10, padx=title_offset).grid(sticky=tk.W)
     nb.Checkbutton(frame, text="Check for Updates on Start", variable=__setting_changes["check_updates"])\
         .grid(columnspan=2, sticky=tk.W, padx=checkbox_offset)
+    nb.Checkbutton(frame, text="Scan Journals in parallel on Start (helps with many large Journals)",
+                   variable=__setting_changes["parallel_journal_scan"])\
+        .grid(columnspan=2, sticky=tk.W, padx=checkbox_offset)
+    nb.Checkbutton(frame, text="Only read the Journals needed to find active Missions (applies on next Start)",
+                   variable=__setting_changes["lazy_mission_resolution"],
+                   command=lambda: __select_startup_mode("lazy_mission_resolution"))\
+        .grid(columnspan=2, sticky=tk.W, padx=checkbox_offset)
+    nb.Checkbutton(frame, text="Keep Missions in a SQLite Database instead of a JSON File (applies on next Start)",
+                   variable=__setting_changes["mission_database"],
+                   command=lambda: __select_startup_mode("mission_database"))\
+        .grid(columnspan=2, sticky=tk.W, padx=checkbox_offset)
+    nb.Checkbutton(frame, text="Only read the Missions of the CMDR that is logged in (applies on next Start)",
+                   variable=__setting_changes["per_cmdr_mission_partitions"],
+                   command=lambda: __select_startup_mode("per_cmdr_mission_partitions"))\
+        .grid(columnspan=2, sticky=tk.W, padx=checkbox_offset)
+    idle_frame = nb.Frame(frame)
+    nb.Label(idle_frame, text="Forget the Missions of other CMDRs after (Minutes):").grid(column=0, row=0, sticky=tk.W)
+    nb.Entry(idle_frame, textvariable=__setting_changes["partition_idle_minutes"])\
+        .grid(column=1, row=0, sticky=tk.W, padx=checkbox_offset)
+    idle_frame.grid(columnspan=2, sticky=tk.W, padx=checkbox_offset)
+
+    __build_diagnostics_ui(frame, title_offset, checkbox_offset)
     nb.Label(frame, text="", pady=10).grid()
     
 
@@ -0,0 +1,199 @@
+"""
+This Module contains the Metrics Registry: Counters and Latency Histograms for each Stage of the Plugin (e.g. the
+Journal Scan, UI Updates or Integrations), shown in the Diagnostics Section of the Settings and dumped to a File for
+Bug Reports.
+
+Recording is off by default (see Configuration.diagnostics_enabled). While it is off, timing a Stage costs a single
+Attribute Check and returns a shared Context Manager that does nothing.
+
+Like journal_scanner, this Module only depends on the Standard Library.
+"""
+import bisect
+import contextlib
+import datetime as dt
+import json
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Callable, ContextManager, Optional
+
+from massacre.logger_factory import logger
+
+RECENT_SAMPLES = 512
+"""
+p50 and p99 are taken from this many most recent Samples of a Stage, so that they reflect the current Session
+"""
+
+_BUCKET_BOUNDS_NS = [1_000 << i for i in range(26)]
+"""
+Upper Bounds of the Histogram Buckets: 1µs, 2µs, 4µs … ~34s. Anything slower ends up in a last, open Bucket.
+"""
+
+_NO_OP = contextlib.nullcontext()
+
+diagnostics_file_location = Path(__file__).parent.parent
+"""
+Diagnostics are dumped into the Plugin Directory, next to the Mission Index
+"""
+
+
+class LatencyHistogram:
+    """
+    Latencies of a single Stage. Counts every Sample in a Bucket and keeps the most recent ones for Percentiles.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+        self.buckets = [0] * (len(_BUCKET_BOUNDS_NS) + 1)
+        self.recent: deque[int] = deque(maxlen=RECENT_SAMPLES)
+
+    def record(self, duration_ns: int):
+        self.count += 1
+        self.total_ns += duration_ns
+        self.max_ns = max(self.max_ns, duration_ns)
+        self.buckets[bisect.bisect_left(_BUCKET_BOUNDS_NS, duration_ns)] += 1
+        self.recent.append(duration_ns)
+
+    def percentile(self, fraction: float) -> Optional[int]:
+        """
+        The Latency below which the provided Fraction of the recent Samples lie. None if there are none.
+        """
+        if len(self.recent) == 0:
+            return None
+        ordered = sorted(self.recent)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    def as_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "mean_ms": self.total_ns / self.count / 1e6 if self.count > 0 else None,
+            "max_ms": self.max_ns / 1e6,
+            "recent_p50_ms": _to_ms(self.percentile(0.5)),
+            "recent_p99_ms": _to_ms(self.percentile(0.99)),
+            "buckets": {(f"<={bound // 1000}us" if i < len(_BUCKET_BOUNDS_NS) else "slower"): count
+                        for i, (bound, count) in enumerate(zip(_BUCKET_BOUNDS_NS + [0], self.buckets)) if count > 0}
+        }
+
+
+def _to_ms(duration_ns: Optional[int]) -> Optional[float]:
+    return duration_ns / 1e6 if duration_ns is not None else None
+
+
+class _Timer:
+    __slots__ = ("_registry", "_name", "_start")
+
+    def __init__(self, registry: "MetricsRegistry", name: str):
+        self._registry = registry
+        self._name = name
+        self._start = 0
+
+    def __enter__(self):
+        self._start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *_):
+        self._registry.record(self._name, time.perf_counter_ns() - self._start)
+        return False
+
+
+class MetricsRegistry:
+    """
+    Counters and Latency Histograms by Name. Safe to be used from any Thread.
+    Names are dotted, with the Stage first, e.g. "journal_scan.journals".
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self._lock = threading.Lock()
+        self._counters: dict[str, int] = {}
+        self._histograms: dict[str, LatencyHistogram] = {}
+        self._sources: dict[str, Callable[[], dict[str, int]]] = {}
+
+    def set_enabled(self, enabled: bool):
+        if enabled != self.enabled:
+            logger.info(f"Diagnostics {'enabled' if enabled else 'disabled'}")
+        self.enabled = enabled
+
+    def increment(self, name: str, amount: int = 1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    def record(self, name: str, duration_ns: int):
+        if not self.enabled:
+            return
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = LatencyHistogram()
+                self._histograms[name] = histogram
+            histogram.record(duration_ns)
+
+    def timed(self, name: str) -> ContextManager:
+        """
+        Time the Block inside the returned Context Manager as a Sample of the Stage with the provided Name
+        """
+        if not self.enabled:
+            return _NO_OP
+        return _Timer(self, name)
+
+    def register_source(self, name: str, source: Callable[[], dict[str, int]]):
+        """
+        Counters that are kept elsewhere (e.g. by the Update Coalescer). They are read whenever the Metrics are shown
+        or dumped, whether Recording is enabled or not.
+        """
+        self._sources[name] = source
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = {name: histogram.as_dict() for name, histogram in self._histograms.items()}
+        for source_name, source in self._sources.items():
+            try:
+                for name, value in source().items():
+                    counters[f"{source_name}.{name}"] = value
+            except Exception:
+                logger.exception(f"Failed to read the Metrics of {source_name}")
+        return {"enabled": self.enabled, "counters": dict(sorted(counters.items())),
+                "latencies": dict(sorted(histograms.items()))}
+
+    def summary(self) -> list[str]:
+        """
+        One Line per Stage and Counter, for the Diagnostics Section of the Settings
+        """
+        snapshot = self.snapshot()
+        lines = []
+        for name, histogram in snapshot["latencies"].items():
+            lines.append(f"{name}: {histogram['count']}x, p50 {histogram['recent_p50_ms']:.2f} ms, "
+                         f"p99 {histogram['recent_p99_ms']:.2f} ms, max {histogram['max_ms']:.2f} ms")
+        for name, value in snapshot["counters"].items():
+            lines.append(f"{name}: {value}")
+        return lines
+
+    def dump(self, location: Optional[Path] = None) -> Path:
+        """
+        Write all Metrics to a JSON File and return where it has been written to.
+
+        :param location: Defaults to a new File in diagnostics_file_location
+        """
+        if location is None:
+            stamp = dt.datetime.now().strftime("%Y%m%d-%H%M%S")
+            location = diagnostics_file_location / f"diagnostics-{stamp}.json"
+        with open(location, "w", encoding="utf8") as diagnostics_file:
+            json.dump({"created": dt.datetime.now(tz=dt.timezone.utc).isoformat(), **self.snapshot()},
+                      diagnostics_file, indent=2)
+        logger.info(f"Dumped Diagnostics to {location}")
+        return location
+
+
+metrics = MetricsRegistry()
+"""The Registry used by the whole Plugin"""
@@ -1,89 +1,658 @@
-import json
+import os
+import threading
+import time
 import datetime as dt
 from pathlib import Path
-from config import config
+from typing import Callable, Iterator, Optional
+import massacre.mission_database
+import massacre.mission_index
+import massacre.mission_snapshot
+import massacre.warm_start
+from massacre.diagnostic_recorder import recorder
 from massacre.logger_factory import logger
+from massacre.metrics import metrics
+from massacre.mission_database import HISTORY_RETENTION, MissionDatabase
+from massacre.mission_index import JournalIndexEntry, MissionIndex
+from massacre.mission_lifecycle import CmdrMissionState, MissionLifecycle, MissionLifecycleEvent
+from massacre.mission_record import MissionRecord
+from massacre.mission_snapshot import JournalMark, MissionSnapshot
+from massacre.warm_start import WarmStart
+from massacre.journal_scanner import ScanResult, find_end_of_last_line, find_mission_accepted_events_in_log, \
+    pick_worker_count, read_cmdr_from_log, scan_journals
 
-file_location: str
+try:
+    from config import config
+except ImportError:
+    # Not running inside EDMC, see massacre.headless. The Journal Location is set via set_journal_location instead.
+    config = None
 
-if hasattr(config, 'get_str'):
-    # noinspection SpellCheckingInspection
-    file_location = config.get_str("journaldir")
-else:
-    # noinspection SpellCheckingInspection
-    file_location = config.get("journaldir") #type: ignore
-if file_location is None or file_location == "":
-    file_location = config.default_journal_dir
+file_location: str = ""
+
+if config is not None:
+    if hasattr(config, 'get_str'):
+        # noinspection SpellCheckingInspection
+        file_location = config.get_str("journaldir")
+    else:
+        # noinspection SpellCheckingInspection
+        file_location = config.get("journaldir") #type: ignore
+    if file_location is None or file_location == "":
+        file_location = config.default_journal_dir
+
+
+def set_journal_location(location: str):
+    """
+    Override the Journal Location taken from the EDMC Config
+    """
+    global file_location
+    file_location = location
+
+
+def set_cache_location(directory: Path):
+    """
+    Store the Mission Index, the Mission Snapshot, the Mission Database and the Warm Start in the provided Directory
+    instead of the Plugin Directory
+    """
+    massacre.mission_index.index_file_location = directory / massacre.mission_index.index_file_location.name
+    massacre.mission_snapshot.snapshot_file_location = directory / massacre.mission_snapshot.snapshot_file_location.name
+    massacre.mission_database.database_file_location = \
+        directory / massacre.mission_database.database_file_location.name
+    massacre.warm_start.warm_start_file_location = directory / massacre.warm_start.warm_start_file_location.name
+
+
+_mission_database: Optional[MissionDatabase] = None
+"""
+If set, the Mission State is stored in this Database instead of the Mission Snapshot File. See use_mission_database
+"""
+
+
+def use_mission_database(database: Optional[MissionDatabase]):
+    """
+    Store the Mission State in the provided SQLite Database (see mission_database) instead of the Mission Snapshot
+    File. None switches back to the Snapshot File.
+    """
+    global _mission_database
+    _mission_database = database
+
+
+def get_mission_database() -> Optional[MissionDatabase]:
+    return _mission_database
+
+
+def __load_snapshot(now: dt.datetime) -> Optional[MissionSnapshot]:
+    if _mission_database is not None:
+        return _mission_database.load_snapshot(now)
+    return MissionSnapshot.load()
+
+
+def __save_snapshot(snapshot: MissionSnapshot):
+    if _mission_database is not None:
+        _mission_database.save_snapshot(snapshot)
+    else:
+        snapshot.save()
 
 
 def __get_logs_after_timestamp(timestamp: dt.date) -> list[Path]:
-    logs_after_timestamp = []
+    logs_after_timestamp: list[Path] = []
 
     for log_file in Path(file_location).glob("*.log"):
         if not log_file.is_file():
             continue
         if timestamp < dt.datetime.fromtimestamp(log_file.stat().st_mtime, tz=dt.timezone.utc).date():
             logs_after_timestamp.append(log_file)
+    # Oldest Journal first, so that the Events are applied in the Order they were written
+    logs_after_timestamp.sort(key=lambda x: (x.stat().st_mtime, x.name))
     logger.debug(f"Loaded {len(logs_after_timestamp)} Logs for all CMDRs")
     return logs_after_timestamp
 
 
-def __extract_mission_accepted_events_from_log(file_path: Path) -> tuple[str, list[dict]]:
+ScannedJournal = tuple[str, list[MissionRecord], list[MissionLifecycleEvent], int]
+"""
+CMDR, MissionAccepted-Events, other Mission Lifecycle Events and Offset read up to, see journal_scanner.ScanResult
+"""
+
+StopCondition = Callable[[MissionLifecycle], bool]
+"""
+Asked after each Journal has been folded. Returning True stops the Scan early.
+"""
+
+
+def __scan_journals(log_files: list[Path], offsets: list[int], parallel: bool,
+                    progress: Optional[Callable[[int], None]] = None) -> Iterator[ScannedJournal]:
     """
-    Return all Mission-Accepted events in this file, as well as the CMDR for this log.
-    If the log does not contain a CMDR, "" is returned
+    Scan the provided Journals from the provided Offsets, optionally spreading them across a Worker Pool.
+    The Results are yielded in the Order of the provided Files, as soon as they are available.
     """
-    cmdr = ""
-    return_list = []
+    worker_count = 1
+    if parallel and len(log_files) > 0:
+        total_bytes = sum(log_file.stat().st_size for log_file in log_files)
+        worker_count = pick_worker_count(len(log_files), total_bytes)
+        logger.info(f"Scanning {len(log_files)} Journals ({total_bytes} Bytes) with {worker_count} Workers")
 
-    with open(file_path, "r", encoding="utf8") as current_log_file:
-        line = current_log_file.readline()
-        while line != "":
-            try:
-                line_as_json = json.loads(line)
-                if line_as_json["event"] == "Commander":
-                    cmdr = str(line_as_json["Name"])
-                if line_as_json["event"] == "MissionAccepted":
-                    return_list.append(line_as_json)
-            except Exception:
-                logger.warning(f"Failed to open File {file_path}. Skipping...")
-            finally:
-                line = current_log_file.readline()
-        return cmdr, return_list
+    def to_scanned_journal(log_file: Path, result: ScanResult) -> ScannedJournal:
+        cmdr, events, lifecycle_events, failed_lines, offset = result
+        metrics.increment("journal_scan.journals")
+        if failed_lines > 0:
+            metrics.increment("journal_scan.failed_lines", failed_lines)
+            logger.warning(f"Failed to parse {failed_lines} Lines in File {log_file}. Skipped them.")
+        return cmdr, events, lifecycle_events, offset
+
+    scanned = 0
+    try:
+        for result in scan_journals(log_files, worker_count, progress, offsets):
+            yield to_scanned_journal(log_files[scanned], result)
+            scanned += 1
+    except Exception:
+        if worker_count <= 1:
+            raise
+        logger.exception("Parallel Journal Scan failed. Falling back to sequential Scan")
+
+        def on_scanned(count: int):
+            if progress is not None:
+                progress(scanned + count)
+
+        # Everything that has already been yielded is kept, only the Rest is scanned again
+        remaining_files = log_files[scanned:]
+        for log_file, result in zip(remaining_files, scan_journals(remaining_files, 1, on_scanned,
+                                                                    offsets[scanned:])):
+            yield to_scanned_journal(log_file, result)
+
+
+def __fold_journals(timestamp: dt.date, now: dt.datetime, parallel: bool,
+                    progress: Optional[Callable[[int, int], None]], stop: Optional[StopCondition],
+                    only_journals: Optional[set[Path]] = None) \
+        -> tuple[MissionLifecycle, dict[str, JournalMark], bool]:
+    """
+    Fold all Journals after the provided timestamp into a new Mission State, oldest first.
+    Only Journals that are new or changed since the last start are parsed. Everything else comes from the Index.
+    Each Journal is folded as soon as it is available, so its Events are only held by the Index.
+
+    If only_journals is provided, all other Journals are skipped. Their Index Entries are kept as they are.
+
+    Returns the State, the Journal Marks and whether all Journals have been folded.
+    """
+    index = MissionIndex.load()
+    derived_timestamp = index.lookback_for_open_missions(now)
+    if derived_timestamp is not None and derived_timestamp > timestamp:
+        logger.info(f"Only reading Journals after {derived_timestamp}. Older Journals hold no open Missions")
+        timestamp = derived_timestamp
+    log_files = __get_logs_after_timestamp(timestamp)
+    if only_journals is not None:
+        log_files = [log_file for log_file in log_files if log_file in only_journals]
+    journals_with_entries: list[tuple[Path, os.stat_result, Optional[JournalIndexEntry], int]] = []
+    files_to_parse: list[tuple[Path, int]] = []
+
+    for log_file in log_files:
+        stat = log_file.stat()
+        entry = index.lookup(log_file, stat)
+        resumed_from = 0
+        if entry is None:
+            # A Journal that has only grown is parsed from where it was left off
+            resumed_from = index.resumable_offset(log_file, stat)
+            files_to_parse.append((log_file, resumed_from))
+        journals_with_entries.append((log_file, stat, entry, resumed_from))
+
+    def on_parsed(parsed: int):
+        if progress is not None:
+            progress(parsed, len(files_to_parse))
+
+    on_parsed(0)
+
+    # The Scan yields in the Order of files_to_parse, which is the Order of log_files
+    scanned_journals = __scan_journals([log_file for log_file, _ in files_to_parse],
+                                       [offset for _, offset in files_to_parse], parallel, on_parsed)
+    lifecycle = MissionLifecycle()
+    journals: dict[str, JournalMark] = {}
+    completed = True
+    try:
+        for log_file, stat, entry, resumed_from in journals_with_entries:
+            if entry is None:
+                cmdr, events, lifecycle_events, offset = next(scanned_journals)
+                entry = index.update(log_file, stat, cmdr, events, lifecycle_events, offset, resumed_from)
+            lifecycle.apply_journal(entry.cmdr, entry.events, entry.lifecycle_events)
+            journals[str(log_file)] = (entry.offset, entry.cmdr)
+            if stop is not None and stop(lifecycle) and len(journals) < len(log_files):
+                logger.info(f"Stopped folding Journals early after {len(journals)} of {len(log_files)} Journals")
+                completed = False
+                break
+    finally:
+        scanned_journals.close()
+
+    logger.info(f"Parsed {len(files_to_parse)} of {len(log_files)} Journals. The Rest was taken from the Mission Index")
+    if completed and only_journals is None:
+        index.retain_only(log_files)
+    index.save()
+    return lifecycle, journals, completed
+
+
+def __replay_snapshot(snapshot: MissionSnapshot, parallel: bool, progress: Optional[Callable[[int, int], None]],
+                      stop: Optional[StopCondition]) -> tuple[dict[str, JournalMark], bool]:
+    """
+    Apply everything that has been written to the Journals since the Snapshot was taken to its Mission State.
+    Returns the new Journal Marks and whether all Journals have been replayed.
+    """
+    # Journals are filtered with "lookback < modification date", so go back one more day
+    log_files = __get_logs_after_timestamp(snapshot.taken_at.date() - dt.timedelta(days=1))
+    journals: dict[str, JournalMark] = {}
+    files_to_parse: list[tuple[Path, int, str]] = []
+
+    for log_file in log_files:
+        stat = log_file.stat()
+        mark = snapshot.journals.get(str(log_file))
+        if mark is None:
+            if stat.st_mtime_ns <= snapshot.taken_at_ns:
+                # Not modified since the Snapshot was taken, so it did not contribute any Event
+                continue
+            mark = (0, "")
+        offset, cmdr = mark
+        journals[str(log_file)] = mark
+        if stat.st_size == offset:
+            continue
+        # A Journal that has shrunk is not append-only after all, read it from the start
+        files_to_parse.append((log_file, offset if stat.st_size > offset else 0, cmdr))
+
+    def on_parsed(parsed: int):
+        if progress is not None:
+            progress(parsed, len(files_to_parse))
+
+    on_parsed(0)
+
+    scanned_journals = __scan_journals([log_file for log_file, _, _ in files_to_parse],
+                                       [offset for _, offset, _ in files_to_parse], parallel, on_parsed)
+    replayed = 0
+    completed = True
+    try:
+        for (log_file, _, known_cmdr), (cmdr, events, lifecycle_events, offset) in \
+                zip(files_to_parse, scanned_journals):
+            # A Journal read from an Offset does not contain its Commander-Event
+            cmdr = cmdr if cmdr != "" else known_cmdr
+            snapshot.lifecycle.apply_journal(cmdr, events, lifecycle_events)
+            journals[str(log_file)] = (offset, cmdr)
+            replayed += 1
+            if stop is not None and stop(snapshot.lifecycle) and replayed < len(files_to_parse):
+                logger.info(f"Stopped replaying Journals early after {replayed} of {len(files_to_parse)} Journals")
+                completed = False
+                break
+    finally:
+        scanned_journals.close()
+
+    logger.info(f"Replayed {replayed} Journals on top of the Mission Snapshot")
+    return journals, completed
+
+
+_checkpoint_journals: dict[str, JournalMark] = {}
+_checkpoint_taken_at_ns: int = 0
+"""
+High-Water Marks for the next Checkpoint of the live Mission State, see checkpoint_mission_state
+"""
+_measured_marks: Optional[tuple[dict[str, JournalMark], int, int]] = None
+"""
+Journal Marks measured by the last Checkpoint, when their Measurement started and when it ended (time.monotonic_ns).
+They replace the High-Water Marks once a Checkpoint is passed a State copied after that.
+"""
 
 
 # noinspection SpellCheckingInspection
-def get_missions_for_all_cmdrs(timestamp: dt.date) -> dict[str, dict[int, dict]]:
+def get_missions_for_all_cmdrs(timestamp: dt.date, parallel: bool = False,
+                               progress: Optional[Callable[[int, int], None]] = None,
+                               stop: Optional[StopCondition] = None) \
+        -> dict[str, dict[int, MissionRecord]]:
     """
-    Returns all Missions that a CMDR accepted after the provided timestamp
+    Returns all Missions that a CMDR accepted after the provided timestamp and that are neither finished
+    (see mission_lifecycle.FINISHING_EVENTS) nor expired yet
+
+    If there is a Mission Snapshot (or a Mission Database, see use_mission_database), only the Journal Lines written
+    since are replayed on top of it. Otherwise all Journals up to the provided timestamp are folded. The Mission Index
+    shortens this lookback to the oldest Journal that still holds open Missions (see
+    MissionIndex.lookback_for_open_missions). Either way, a new Snapshot is written afterwards.
 
     **NOTE**: These are not all current missions. Look into the "Missions"-Event under "Active" for active missions.
     Said array only contains mission UUIDs. So it is best to filter for UUIDs that are present in the Dict
     returned by this function.
 
-    :return: Dictionary [CMDR Name, Dictionary[Mission ID, Mission Object]]
+    :param parallel: Spread the Journals that need to be parsed across a Worker Pool
+    :param progress: Invoked with (parsed Journals, Journals to parse) while Journals are being parsed
+    :param stop: Asked with the Mission State folded so far after each Journal. Returning True stops reading any
+                 further Journals, e.g. because the Plugin is shutting down. The partial Result is returned, but no
+                 Snapshot is written for it.
+    :return: Dictionary [CMDR Name, Dictionary[Mission ID, Mission Record]]
+    """
+    global _checkpoint_journals, _checkpoint_taken_at_ns, _measured_marks
+    now = dt.datetime.now(tz=dt.timezone.utc)
+    # Taken before any Journal is read. Anything written after this is replayed again from the next Snapshot.
+    taken_at_ns = time.time_ns()
+
+    with metrics.timed("journal_scan"):
+        snapshot = __load_snapshot(now)
+        if snapshot is not None and snapshot.taken_at.date() <= timestamp:
+            logger.info("Mission Snapshot is older than the lookback. Discarding it.")
+            snapshot = None
+
+        if snapshot is not None:
+            lifecycle = snapshot.lifecycle
+            journals, completed = __replay_snapshot(snapshot, parallel, progress, stop)
+        else:
+            lifecycle, journals, completed = __fold_journals(timestamp, now, parallel, progress, stop)
+
+    # Expired Missions can never become active again, so there is no point in keeping them
+    expired_count = lifecycle.prune_expired(now, keep_active=False)
+    logger.info(f"Dropped {expired_count} expired Missions")
+
+    if completed:
+        __save_snapshot(MissionSnapshot(lifecycle, journals, taken_at_ns))
+        _checkpoint_journals, _checkpoint_taken_at_ns, _measured_marks = journals, taken_at_ns, None
+        if _mission_database is not None:
+            pruned_count = _mission_database.prune(now - HISTORY_RETENTION)
+            logger.info(f"Deleted {pruned_count} closed Missions from the Mission Database")
+
+    return lifecycle.mission_stores()
+
+
+def checkpoint_mission_state(lifecycle: MissionLifecycle, copied_at_ns: Optional[int] = None):
+    """
+    Write a Snapshot of a Copy of the live Mission State (see MissionRepository.set_checkpoint_handler). Within EDMC
+    it is called on the Checkpoint Thread, see checkpoint_writer.
+
+    EDMC does not tell at which Offset an Event was written, and may lag behind the Journal a bit. So the Journal
+    Offsets are only measured here, and used as High-Water Marks by the NEXT Checkpoint. By then all Events in
+    front of them have long been applied. The first Checkpoint uses the Offsets of get_missions_for_all_cmdrs.
+
+    :param copied_at_ns: When the State was copied (time.monotonic_ns). Marks measured after that may be ahead of
+                         the State, so they are left for a later Checkpoint. None uses them right away.
+    """
+    global _checkpoint_journals, _checkpoint_taken_at_ns, _measured_marks
+    with metrics.timed("checkpoint"):
+        if _measured_marks is not None and (copied_at_ns is None or _measured_marks[2] <= copied_at_ns):
+            _checkpoint_journals, _checkpoint_taken_at_ns, _ = _measured_marks
+            _measured_marks = None
+        __save_snapshot(MissionSnapshot(lifecycle, _checkpoint_journals, _checkpoint_taken_at_ns))
+
+        if _measured_marks is None:
+            taken_at_ns = time.time_ns()
+            journals = dict(_checkpoint_journals)
+            journals.update(measure_journal_marks(_checkpoint_taken_at_ns, journals))
+            _measured_marks = (journals, taken_at_ns, time.monotonic_ns())
+
+
+def measure_journal_marks(modified_after_ns: int,
+                          known: Optional[dict[str, JournalMark]] = None) -> dict[str, JournalMark]:
+    """
+    Journal Marks at the current End of every Journal that has been modified after the provided Point in Time.
+    The CMDR of a Journal is taken from known if possible, so that only new Journals have to be opened for it.
+    """
+    journals: dict[str, JournalMark] = {}
+    for log_file in Path(file_location).glob("*.log"):
+        try:
+            stat = log_file.stat()
+            if stat.st_mtime_ns <= modified_after_ns:
+                continue
+            cmdr = known.get(str(log_file), (0, ""))[1] if known is not None else ""
+            if cmdr == "":
+                cmdr = _journal_cmdrs.get(str(log_file)) or read_cmdr_from_log(log_file)
+            journals[str(log_file)] = (find_end_of_last_line(log_file), cmdr)
+        except OSError:
+            continue
+    return journals
+
+
+_journal_cmdrs: dict[str, str] = {}
+"""
+CMDR of each Journal that has been seen by get_journals_per_cmdr. The Commander-Event of a Journal never changes.
+"""
+
+
+def get_journals_per_cmdr(timestamp: dt.date, stop: Optional[Callable[[], bool]] = None) -> dict[str, list[Path]]:
+    """
+    Group the Journals after the provided timestamp by CMDR, oldest first. Only the Commander-Event of each Journal
+    is read, and only once per Journal. Journals without a Commander-Event (yet) are left out.
+
+    :param stop: Checked before each Journal. Once it returns True, no further Journals are read and the Journals
+                 grouped so far are returned.
+    """
+    journals_per_cmdr: dict[str, list[Path]] = {}
+    headers_read = 0
+    for log_file in __get_logs_after_timestamp(timestamp):
+        if stop is not None and stop():
+            logger.info("Stopped reading the Commander-Events of the Journals")
+            break
+        cmdr = _journal_cmdrs.get(str(log_file))
+        if cmdr is None:
+            try:
+                cmdr = read_cmdr_from_log(log_file)
+            except OSError:
+                logger.warning(f"Failed to open File {log_file}. Skipping...")
+                continue
+            headers_read += 1
+            if cmdr == "":
+                # Possibly a Journal that has just been created. Its Commander-Event is read next time.
+                continue
+            _journal_cmdrs[str(log_file)] = cmdr
+        journals_per_cmdr.setdefault(cmdr, []).append(log_file)
+    logger.info(f"Found Journals for {len(journals_per_cmdr)} CMDRs. Read {headers_read} Commander-Events")
+    return journals_per_cmdr
+
+
+def load_mission_partition(cmdr: str, timestamp: dt.date, parallel: bool = False,
+                           stop: Optional[StopCondition] = None) -> CmdrMissionState:
+    """
+    Partitioned Alternative to get_missions_for_all_cmdrs. Returns the Mission State of a single CMDR, by only
+    folding the Journals written by that CMDR (see get_journals_per_cmdr). The Mission Index is used and updated for
+    these Journals, but no Mission Snapshot is written, as it would only hold a single CMDR.
+
+    :param stop: See get_missions_for_all_cmdrs. The partial State is returned.
+    """
+    now = dt.datetime.now(tz=dt.timezone.utc)
+    log_files = get_journals_per_cmdr(timestamp).get(cmdr, [])
+    lifecycle, _, _ = __fold_journals(timestamp, now, parallel, None, stop, set(log_files))
+    lifecycle.prune_expired(now, keep_active=False)
+    state = lifecycle.state_of(cmdr)
+    logger.info(f"Loaded {len(state.missions)} Missions for CMDR {cmdr} from {len(log_files)} Journals")
+    return state
+
+
+def resolve_missions_for_cmdr(cmdr: str, mission_ids: set[int],
+                              timestamp: dt.date) -> dict[int, MissionRecord]:
+    """
+    Lazy Alternative to get_missions_for_all_cmdrs. Returns the MissionAccepted-Events for the provided Mission IDs.
+
+    The Journals are walked newest-first and each Journal is read from its end backwards. As soon as all Missions
+    have been found, no further Journals are read. For a Stack accepted today this usually means only one or two
+    Journals are touched. Missions that cannot be found after the provided timestamp are missing from the result.
+    """
+    remaining = set(mission_ids)
+    found: dict[int, MissionRecord] = {}
+    files_read = 0
+
+    for log_file in reversed(__get_logs_after_timestamp(timestamp)):
+        if len(remaining) == 0:
+            break
+        try:
+            if read_cmdr_from_log(log_file) != cmdr:
+                continue
+            files_read += 1
+            missions_in_file = find_mission_accepted_events_in_log(log_file, remaining)
+        except OSError:
+            logger.warning(f"Failed to open File {log_file}. Skipping...")
+            continue
+        found.update(missions_in_file)
+        remaining.difference_update(missions_in_file.keys())
+
+    logger.info(f"Resolved {len(found)} of {len(mission_ids)} Missions for CMDR {cmdr} by reading {files_read} Journals")
+    return found
+
+
+def build_resolver_worker(cmdr: str, mission_ids: set[int], timestamp: dt.date,
+                          callback: Callable[[dict[int, MissionRecord]], None],
+                          shutdown: Optional[threading.Event] = None) -> threading.Thread:
+    """
+    Creates a new Thread which looks up the provided Missions (see resolve_missions_for_cmdr), so that the
+    Missions-Event does not block EDMC. Does not start the thread.
+
+    The callback is invoked from the Worker Thread with the Missions that could be found, unless looking them up fails
+    or shutdown is set.
     """
+    def __worker():
+        try:
+            result = resolve_missions_for_cmdr(cmdr, mission_ids, timestamp)
+        except Exception:
+            logger.exception(f"Failed to look up the Missions of CMDR {cmdr}")
+            recorder.dump_on_exception("Mission Resolver")
+            return
+        if shutdown is not None and shutdown.is_set():
+            return
+        callback(result)
 
-    # This contains MissionAccepted-events from all CMDRs
-    all_mission_logs_after_timestamp_for_all_cmdrs = \
-        map(__extract_mission_accepted_events_from_log, __get_logs_after_timestamp(timestamp))
+    thread = threading.Thread(target=__worker)
+    thread.name = "Massacre Mission Resolver"
+    thread.daemon = True
 
-    return_list: dict[str, list[dict]] = {}
+    return thread
 
-    # This contains the events in a normal list
-    for cmdr_from_event, events in all_mission_logs_after_timestamp_for_all_cmdrs:
-        if cmdr_from_event not in return_list.keys():
-            return_list[cmdr_from_event] = []
 
-        return_list[cmdr_from_event].extend(events)
+def build_index_worker(timestamp: dt.date, parallel: bool, progress: Callable[[int, int], None],
+                       callback: Callable[[dict[str, dict[int, MissionRecord]]], None],
+                       shutdown: Optional[threading.Event] = None) -> threading.Thread:
+    """
+    Creates a new Thread used to build the Mission Index, so that EDMC's Startup is not blocked. Does not start
+    the thread.
+
+    The callback is invoked from the Worker Thread with the result of get_missions_for_all_cmdrs. If building the
+    Index fails, the callback is invoked with an empty Index. Once shutdown is set, no further Journals are read and
+    the callback is not invoked.
+    """
+    def __worker():
+        stop: Optional[StopCondition] = None
+        if shutdown is not None:
+            stop = lambda _: shutdown.is_set()
+        try:
+            result = get_missions_for_all_cmdrs(timestamp, parallel, progress, stop)
+        except Exception:
+            logger.exception("Failed to build the Mission Index")
+            recorder.dump_on_exception("Mission Index")
+            result = {}
+        if shutdown is not None and shutdown.is_set():
+            return
+        callback(result)
+
+    thread = threading.Thread(target=__worker)
+    thread.name = "Massacre Mission Index"
+    thread.daemon = True
+
+    return thread
+
+
+def build_partition_worker(cmdr: str, timestamp: dt.date, parallel: bool,
+                           callback: Callable[[Optional[CmdrMissionState]], None],
+                           shutdown: Optional[threading.Event] = None) -> threading.Thread:
+    """
+    Creates a new Thread which loads the Partition of the provided CMDR (see load_mission_partition), so that the
+    Missions-Event does not block EDMC. Does not start the thread.
+
+    The callback is invoked from the Worker Thread with the Partition, or with None if loading it fails. Once shutdown
+    is set, no further Journals are read and the callback is not invoked.
+    """
+    def __worker():
+        stop: Optional[StopCondition] = None
+        if shutdown is not None:
+            stop = lambda _: shutdown.is_set()
+        try:
+            result = load_mission_partition(cmdr, timestamp, parallel, stop)
+        except Exception:
+            logger.exception(f"Failed to load the Missions of CMDR {cmdr}")
+            recorder.dump_on_exception("Mission Partition")
+            result = None
+        if shutdown is not None and shutdown.is_set():
+            return
+        callback(result)
+
+    thread = threading.Thread(target=__worker)
+    thread.name = "Massacre Mission Partition"
+    thread.daemon = True
+
+    return thread
+
+
+def build_journal_header_worker(timestamp: dt.date,
+                                callback: Callable[[dict[str, list[Path]]], None],
+                                shutdown: Optional[threading.Event] = None) -> threading.Thread:
+    """
+    Creates a new Thread which reads the Commander-Event of each Journal (see get_journals_per_cmdr), so that loading
+    the first Partition does not have to. Does not start the thread.
+
+    The callback is invoked from the Worker Thread with the result of get_journals_per_cmdr. If reading the
+    Commander-Events fails, the callback is invoked with no Journals. Once shutdown is set, no further Journals are
+    read and the callback is not invoked.
+    """
+    def __worker():
+        stop: Optional[Callable[[], bool]] = None
+        if shutdown is not None:
+            stop = shutdown.is_set
+        try:
+            result = get_journals_per_cmdr(timestamp, stop)
+        except Exception:
+            logger.exception("Failed to read the Commander-Events of the Journals")
+            recorder.dump_on_exception("Journal Headers")
+            result = {}
+        if shutdown is not None and shutdown.is_set():
+            return
+        callback(result)
+
+    thread = threading.Thread(target=__worker)
+    thread.name = "Massacre Journal Headers"
+    thread.daemon = True
+
+    return thread
+
+
+WARM_START_LOOKBACK = dt.timedelta(days=1)
+"""
+Journals modified this long before Shutdown get a High-Water Mark in the Warm Start. Only the Journals that are still
+being written to at Shutdown really need one.
+"""
+
+
+def take_warm_start(cmdr: str, active_missions: dict[str, dict[int, MissionRecord]]) -> WarmStart:
+    """
+    Build a Warm Start of the provided active Missions, with the current End of each recent Journal as its
+    High-Water Mark. All Events in front of it have been passed to the Plugin by now.
+    """
+    taken_at_ns = time.time_ns()
+    modified_after_ns = taken_at_ns - int(WARM_START_LOOKBACK.total_seconds() * 1e9)
+    return WarmStart(cmdr, active_missions, measure_journal_marks(modified_after_ns), taken_at_ns)
+
+
+def reconcile_warm_start(warm_start: WarmStart, stop: Optional[StopCondition] = None) -> dict[int, MissionRecord]:
+    """
+    Replay everything that has been written to the Journals since the Warm Start was taken, and return the active
+    Missions of its CMDR afterwards
+    """
+    snapshot = warm_start.as_snapshot()
+    __replay_snapshot(snapshot, False, None, stop)
+    return snapshot.lifecycle.state_of(warm_start.cmdr).active_missions()
+
 
-    # Now create a UUID -> Mission Lookup for each CMDR
-    return_array: dict[str, dict[int, dict]] = {}
+def build_warm_start_worker(warm_start: WarmStart, callback: Callable[[dict[int, MissionRecord]], None],
+                            shutdown: Optional[threading.Event] = None) -> threading.Thread:
+    """
+    Creates a new Thread which reconciles the Warm Start (see reconcile_warm_start). Does not start the thread.
 
-    for cmdr in return_list.keys():
-        return_array[cmdr] = {}
-        for event in return_list[cmdr]:
-            return_array[cmdr][event["MissionID"]] = event
+    The callback is invoked from the Worker Thread with the reconciled active Missions of the Warm Start CMDR,
+    unless reconciling fails or shutdown is set.
+    """
+    def __worker():
+        stop: Optional[StopCondition] = None
+        if shutdown is not None:
+            stop = lambda _: shutdown.is_set()
+        try:
+            result = reconcile_warm_start(warm_start, stop)
+        except Exception:
+            logger.exception("Failed to reconcile the Warm Start")
+            return
+        if shutdown is not None and shutdown.is_set():
+            return
+        callback(result)
 
+    thread = threading.Thread(target=__worker)
+    thread.name = "Massacre Warm Start"
+    thread.daemon = True
 
-    return return_array
+    return thread
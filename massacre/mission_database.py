@@ -0,0 +1,243 @@
+"""
+This Module contains the optional SQLite Backend for the folded Mission State. By default the State is stored as a
+Mission Snapshot (see mission_snapshot), which is rewritten as a whole on every Checkpoint.
+
+The Database holds the same Information as the Snapshot, but keeps it in indexed Tables:
+
+- missions: One Row per CMDR and Mission. Finished Missions are not deleted, but closed, and only pruned once they
+  expired long enough ago (see MissionDatabase.prune)
+- active_missions: The active Mission IDs of each CMDR, in the Order reported by the Game
+- journals: The Journal Progress, see mission_snapshot.JournalMark
+- meta: When the Journal Progress was measured
+
+Loading the State on Start is an indexed Query for the open Missions that have not expired yet, along with the active
+Mission IDs of each CMDR.
+
+Like the Mission Index and the Snapshot, the Database is a Cache. It can be deleted at any time, and is rebuilt from
+the Journals if its Layout does not match DATABASE_FORMAT_VERSION. sqlite3 is part of the Standard Library.
+"""
+import datetime as dt
+import sqlite3
+from contextlib import closing
+from pathlib import Path
+from typing import Optional
+
+from massacre.logger_factory import logger
+from massacre.mission_lifecycle import CmdrMissionState, MissionLifecycle
+from massacre.mission_record import MissionRecord
+from massacre.mission_snapshot import JournalMark, MissionSnapshot
+
+DATABASE_FORMAT_VERSION = 1
+"""
+Stored as user_version. Bump this whenever the Schema changes. Databases with a different Version are rebuilt.
+"""
+
+HISTORY_RETENTION = dt.timedelta(weeks=8)
+"""
+Closed Missions are kept this long after they expired, see MissionDatabase.prune
+"""
+
+database_file_location = Path(__file__).parent.parent / "missions.sqlite"
+"""
+The Database is stored in the Plugin Directory, next to the Mission Index
+"""
+
+_RECORD_COLUMN_TYPES = {
+    "mission_id": "INTEGER NOT NULL",
+    "name": "TEXT",
+    "faction": "TEXT",
+    "target_faction": "TEXT",
+    "kill_count": "INTEGER",
+    "reward": "INTEGER",
+    "destination_system": "TEXT",
+    "target_type": "TEXT",
+    "wing": "INTEGER",
+    "expiry": "TEXT",
+    "timestamp": "TEXT"
+}
+"""
+The Fields of a MissionRecord, in the Order of MissionRecord.as_list
+"""
+
+_RECORD_COLUMNS = tuple(_RECORD_COLUMN_TYPES.keys())
+_WING_COLUMN = _RECORD_COLUMNS.index("wing")
+
+_UPSERTED_COLUMNS = tuple(column for column in _RECORD_COLUMNS if column != "mission_id") + \
+    ("journal_path", "journal_offset", "redirected")
+"""
+Replaced when a Mission is saved again. A Mission ID that has been accepted again keeps the Record of the last Accept,
+just like in the Mission Snapshot.
+"""
+
+_SCHEMA = [
+    f"""CREATE TABLE missions (
+        cmdr TEXT NOT NULL,
+        {", ".join(f"{column} {column_type}" for column, column_type in _RECORD_COLUMN_TYPES.items())},
+        journal_path TEXT,
+        journal_offset INTEGER,
+        redirected INTEGER NOT NULL DEFAULT 0,
+        closed_at_ns INTEGER,
+        PRIMARY KEY (cmdr, mission_id)
+    )""",
+    "CREATE INDEX missions_expiry ON missions (expiry)",
+    "CREATE INDEX missions_target_faction ON missions (cmdr, target_faction)",
+    """CREATE TABLE active_missions (
+        cmdr TEXT NOT NULL,
+        mission_id INTEGER NOT NULL,
+        position INTEGER NOT NULL,
+        PRIMARY KEY (cmdr, mission_id)
+    )""",
+    """CREATE TABLE journals (
+        path TEXT PRIMARY KEY,
+        offset INTEGER NOT NULL,
+        cmdr TEXT NOT NULL
+    )""",
+    "CREATE TABLE meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)"
+]
+
+_TABLES = ("missions", "active_missions", "journals", "meta")
+
+_JOURNAL_TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+"""
+Expiries are stored as written by the Game. In this Format they sort like the Points in Time they describe.
+"""
+
+
+def _record_from_row(row: tuple) -> MissionRecord:
+    """
+    Inverse of the Record Columns (see _RECORD_COLUMNS), followed by journal_path and journal_offset
+    """
+    values = list(row[:len(_RECORD_COLUMNS)])
+    if values[_WING_COLUMN] is not None:
+        # SQLite has no Booleans
+        values[_WING_COLUMN] = bool(values[_WING_COLUMN])
+    return MissionRecord.from_list(values + [row[-1]], row[-2])
+
+
+class MissionDatabase:
+    """
+    Reads and writes the Mission State (see mission_snapshot.MissionSnapshot) from and to a SQLite Database.
+
+    Every Call opens its own Connection, so the Database can be used from the Mission Index Thread and from the
+    Main Thread alike.
+    """
+
+    def __init__(self, location: Optional[Path] = None):
+        """
+        :param location: Defaults to database_file_location, resolved on every Call
+        """
+        self._location = location
+
+    @property
+    def location(self) -> Path:
+        return self._location if self._location is not None else database_file_location
+
+    def __connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(str(self.location))
+        try:
+            version = connection.execute("PRAGMA user_version").fetchone()[0]
+            if version != DATABASE_FORMAT_VERSION:
+                if version != 0:
+                    logger.info(f"Mission Database has Version {version}, expected {DATABASE_FORMAT_VERSION}. "
+                                f"Rebuilding it.")
+                with connection:
+                    for table in _TABLES:
+                        connection.execute(f"DROP TABLE IF EXISTS {table}")
+                    for statement in _SCHEMA:
+                        connection.execute(statement)
+                    connection.execute(f"PRAGMA user_version = {DATABASE_FORMAT_VERSION}")
+        except sqlite3.Error:
+            connection.close()
+            raise
+        return connection
+
+    def load_snapshot(self, now: dt.datetime) -> Optional[MissionSnapshot]:
+        """
+        Load the Mission State. Missions that have expired before now are left out. Returns None if the Database is
+        empty or unreadable, in which case the State has to be folded from the Journals.
+        """
+        try:
+            with closing(self.__connect()) as connection:
+                taken_at = connection.execute("SELECT value FROM meta WHERE key = 'taken_at_ns'").fetchone()
+                if taken_at is None:
+                    logger.info("Mission Database is empty")
+                    return None
+
+                states: dict[str, CmdrMissionState] = {}
+                rows = connection.execute(
+                    f"SELECT cmdr, redirected, {', '.join(_RECORD_COLUMNS)}, journal_path, journal_offset "
+                    f"FROM missions WHERE closed_at_ns IS NULL AND (expiry IS NULL OR expiry > ?)",
+                    (now.strftime(_JOURNAL_TIMESTAMP_FORMAT),))
+                for row in rows:
+                    state = states.setdefault(row[0], CmdrMissionState())
+                    record = _record_from_row(row[2:])
+                    state.missions[record.mission_id] = record
+                    if row[1]:
+                        state.redirected.add(record.mission_id)
+                for cmdr, mission_id in connection.execute(
+                        "SELECT cmdr, mission_id FROM active_missions ORDER BY cmdr, position"):
+                    states.setdefault(cmdr, CmdrMissionState()).active[mission_id] = None
+                journals: dict[str, JournalMark] = {
+                    path: (offset, cmdr)
+                    for path, offset, cmdr in connection.execute("SELECT path, offset, cmdr FROM journals")
+                }
+        except sqlite3.Error:
+            logger.exception("Failed to read the Mission Database. Discarding it.")
+            return None
+
+        snapshot = MissionSnapshot(MissionLifecycle(states), journals, int(taken_at[0]))
+        logger.info(f"Loaded Mission State taken at {snapshot.taken_at} from the Mission Database")
+        return snapshot
+
+    def save_snapshot(self, snapshot: MissionSnapshot):
+        """
+        Write the Mission State. Open Missions that are no longer part of the State are closed, not deleted.
+        """
+        try:
+            with closing(self.__connect()) as connection, connection:
+                open_missions: dict[str, set[int]] = {}
+                for cmdr, mission_id in connection.execute(
+                        "SELECT cmdr, mission_id FROM missions WHERE closed_at_ns IS NULL"):
+                    open_missions.setdefault(cmdr, set()).add(mission_id)
+
+                connection.executemany(
+                    f"INSERT INTO missions (cmdr, redirected, {', '.join(_RECORD_COLUMNS)}, journal_path, "
+                    f"journal_offset) VALUES ({', '.join('?' * (len(_RECORD_COLUMNS) + 4))}) "
+                    f"ON CONFLICT (cmdr, mission_id) DO UPDATE SET "
+                    f"{', '.join(f'{column} = excluded.{column}' for column in _UPSERTED_COLUMNS)}, closed_at_ns = NULL",
+                    [(cmdr, mission.mission_id in state.redirected, *mission.as_list()[:-1], mission.journal_path,
+                      mission.journal_offset)
+                     for cmdr, state in snapshot.lifecycle.states.items() for mission in state.missions.values()])
+
+                closed = [(snapshot.taken_at_ns, cmdr, mission_id)
+                          for cmdr, mission_ids in open_missions.items()
+                          for mission_id in mission_ids.difference(snapshot.lifecycle.states.get(
+                              cmdr, CmdrMissionState()).missions.keys())]
+                connection.executemany(
+                    "UPDATE missions SET closed_at_ns = ?, redirected = 0 WHERE cmdr = ? AND mission_id = ?", closed)
+
+                connection.execute("DELETE FROM active_missions")
+                connection.executemany(
+                    "INSERT INTO active_missions (cmdr, mission_id, position) VALUES (?, ?, ?)",
+                    [(cmdr, mission_id, position) for cmdr, state in snapshot.lifecycle.states.items()
+                     for position, mission_id in enumerate(state.active)])
+
+                connection.execute("DELETE FROM journals")
+                connection.executemany("INSERT INTO journals (path, offset, cmdr) VALUES (?, ?, ?)",
+                                       [(path, offset, cmdr) for path, (offset, cmdr) in snapshot.journals.items()])
+                connection.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('taken_at_ns', ?)",
+                                   (snapshot.taken_at_ns,))
+        except sqlite3.Error:
+            logger.exception("Failed to write the Mission Database")
+
+    def prune(self, before: dt.datetime) -> int:
+        """
+        Delete all closed Missions that expired before the provided Point in Time. Returns how many were deleted.
+        """
+        try:
+            with closing(self.__connect()) as connection, connection:
+                return connection.execute("DELETE FROM missions WHERE closed_at_ns IS NOT NULL AND expiry < ?",
+                                          (before.strftime(_JOURNAL_TIMESTAMP_FORMAT),)).rowcount
+        except sqlite3.Error:
+            logger.exception("Failed to delete closed Missions from the Mission Database")
+            return 0
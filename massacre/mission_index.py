@@ -0,0 +1,201 @@
+"""
+This Module contains a persistent Index of already parsed Journal Files.
+
+Parsing two weeks of Journals on every start is slow. The Index remembers the CMDR and the Mission Lifecycle Events
+(see mission_lifecycle) of each Journal File, keyed by its path, size and modification time. Only Journals that are new or have changed since
+the last start need to be parsed again. Journals are append-only, so a Journal that has grown is only parsed from
+the Offset it was read up to last time (see journal_scanner.LogCursor).
+"""
+import datetime as dt
+import json
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Optional
+
+from massacre.logger_factory import logger
+from massacre.mission_lifecycle import MissionLifecycleEvent
+from massacre.mission_record import MissionRecord
+
+INDEX_FORMAT_VERSION = 4
+"""
+Bump this whenever the layout of the Index File changes. Index Files with a different Version are discarded.
+"""
+
+index_file_location = Path(__file__).parent.parent / "mission_index.json"
+"""
+The Index is stored in the Plugin Directory
+"""
+
+
+@dataclass
+class JournalIndexEntry:
+    """
+    Everything that is remembered about a single Journal File
+    """
+    size: int
+    mtime_ns: int
+    offset: int
+    cmdr: str
+    events: list[MissionRecord]
+    lifecycle_events: list[MissionLifecycleEvent]
+    """All other Mission Lifecycle Events, e.g. MissionCompleted"""
+
+    def as_dict(self):
+        return {
+            "size": self.size,
+            "mtime_ns": self.mtime_ns,
+            "offset": self.offset,
+            "cmdr": self.cmdr,
+            "events": [event.as_list() for event in self.events],
+            "lifecycle": [list(event) for event in self.lifecycle_events]
+        }
+
+    @staticmethod
+    def from_dict(journal_path: str, data: dict) -> "JournalIndexEntry":
+        return JournalIndexEntry(
+            int(data["size"]),
+            int(data["mtime_ns"]),
+            int(data["offset"]),
+            str(data["cmdr"]),
+            [MissionRecord.from_list(event, journal_path) for event in data["events"]],
+            [MissionLifecycleEvent(str(event), int(mission_id), int(offset))
+             for event, mission_id, offset in data["lifecycle"]]
+        )
+
+
+class MissionIndex:
+    """
+    Journal Path -> Journal Index Entry.
+
+    An Entry is only valid as long as size and modification time of the Journal File did not change.
+    """
+
+    def __init__(self, location: Path, entries: Optional[dict[str, JournalIndexEntry]] = None):
+        self._location = location
+        self._entries: dict[str, JournalIndexEntry] = entries if entries is not None else {}
+        self._dirty = False
+
+    @staticmethod
+    def load(location: Optional[Path] = None) -> "MissionIndex":
+        """
+        Load the Index from disk. A missing, outdated or corrupted Index results in an empty Index which is
+        then rebuilt by the next scan.
+
+        :param location: Defaults to index_file_location
+        """
+        if location is None:
+            location = index_file_location
+        if not location.is_file():
+            logger.info("No Mission Index found. All Journals will be parsed.")
+            return MissionIndex(location)
+
+        try:
+            with open(location, "r", encoding="utf8") as index_file:
+                raw = json.load(index_file)
+            if raw.get("version") != INDEX_FORMAT_VERSION:
+                logger.info(f"Mission Index has Version {raw.get('version')}, expected {INDEX_FORMAT_VERSION}. "
+                            f"Rebuilding...")
+                return MissionIndex(location)
+            entries = {path: JournalIndexEntry.from_dict(path, entry) for path, entry in raw["files"].items()}
+        except Exception:
+            logger.warning("Mission Index is corrupted. Rebuilding...")
+            return MissionIndex(location)
+
+        logger.info(f"Loaded Mission Index with {len(entries)} Journals")
+        return MissionIndex(location, entries)
+
+    def lookup(self, log_file: Path, stat: os.stat_result) -> Optional[JournalIndexEntry]:
+        """
+        Return the Entry for this Journal, or None if the Journal is unknown or has changed since it was indexed
+        """
+        entry = self._entries.get(str(log_file))
+        if entry is None or entry.size != stat.st_size or entry.mtime_ns != stat.st_mtime_ns:
+            return None
+        return entry
+
+    def resumable_offset(self, log_file: Path, stat: os.stat_result) -> int:
+        """
+        Return the Offset from which a changed Journal can continue to be parsed. 0 if it needs to be parsed
+        from the start, e.g. because it is unknown or has shrunk (which an append-only Journal never does).
+        """
+        entry = self._entries.get(str(log_file))
+        if entry is None or stat.st_size < entry.offset:
+            return 0
+        return entry.offset
+
+    def update(self, log_file: Path, stat: os.stat_result, cmdr: str, events: list[MissionRecord],
+               lifecycle_events: list[MissionLifecycleEvent], offset: int, resumed_from: int = 0) -> JournalIndexEntry:
+        """
+        Store the parse result of a Journal. The stat must be taken BEFORE the file is parsed, so that a Journal
+        that grows while it is parsed is considered outdated on the next start.
+
+        If the Journal was parsed from resumed_from (see resumable_offset), the result is merged into the
+        existing Entry. Returns the resulting Entry.
+        """
+        previous = self._entries.get(str(log_file))
+        if resumed_from > 0 and previous is not None:
+            # A Line without a Line Break is parsed but not consumed, so it might be part of both results
+            merged_events = {event.mission_id: event for event in previous.events}
+            merged_events.update((event.mission_id, event) for event in events)
+            events = list(merged_events.values())
+            merged_lifecycle_events = {event.offset: event for event in previous.lifecycle_events}
+            merged_lifecycle_events.update((event.offset, event) for event in lifecycle_events)
+            lifecycle_events = sorted(merged_lifecycle_events.values(), key=lambda x: x.offset)
+            cmdr = cmdr if cmdr != "" else previous.cmdr
+
+        entry = JournalIndexEntry(stat.st_size, stat.st_mtime_ns, offset, cmdr, events, lifecycle_events)
+        self._entries[str(log_file)] = entry
+        self._dirty = True
+        return entry
+
+    def retain_only(self, log_files: Iterable[Path]):
+        """
+        Drop all Entries for Journals that are not part of the provided Files,
+        e.g. because they were deleted or are no longer inside the lookback window.
+        """
+        keep = set(map(str, log_files))
+        for path in list(self._entries.keys()):
+            if path not in keep:
+                del self._entries[path]
+                self._dirty = True
+
+    def lookback_for_open_missions(self, now: dt.datetime) -> Optional[dt.date]:
+        """
+        Derive how far back Journals need to be read from the Missions that have not expired yet.
+
+        A Journal whose Missions have all expired can never contribute an active Mission again. So the lookback only
+        has to reach the oldest Journal that still holds an open Mission. If there are none, only Journals written
+        since the newest indexed Journal are of interest. Returns None if the Index is empty, in which case nothing
+        can be derived.
+        """
+        if len(self._entries) == 0:
+            return None
+
+        newest_mtime_ns = max(entry.mtime_ns for entry in self._entries.values())
+        oldest_open_mtime_ns = min((entry.mtime_ns for entry in self._entries.values()
+                                    if any(not event.is_expired(now) for event in entry.events)),
+                                   default=newest_mtime_ns)
+        # Journals are filtered with "lookback < modification date", so go back one more day
+        oldest_open_date = dt.datetime.fromtimestamp(oldest_open_mtime_ns / 1e9, tz=dt.timezone.utc).date()
+        return oldest_open_date - dt.timedelta(days=1)
+
+    def save(self):
+        """
+        Write the Index to disk if it has changed. The File is replaced atomically so that a crash mid-write does
+        not leave a half-written Index behind.
+        """
+        if not self._dirty:
+            return
+
+        temp_location = self._location.with_suffix(".tmp")
+        try:
+            with open(temp_location, "w", encoding="utf8") as index_file:
+                json.dump({
+                    "version": INDEX_FORMAT_VERSION,
+                    "files": {path: entry.as_dict() for path, entry in self._entries.items()}
+                }, index_file)
+            os.replace(temp_location, self._location)
+            self._dirty = False
+        except OSError:
+            logger.exception("Failed to write Mission Index")
@@ -0,0 +1,191 @@
+"""
+This Module contains the Reducer that folds Mission Lifecycle Events into per-CMDR Mission State.
+
+Both the Startup Scan (see mission_aggregation_helper) and the live Journal Events (see mission_repository) go
+through the same Reducer, so a Mission ends up in the same State regardless of where its Events were read from.
+
+Every Event is a plain "set" or "remove" on a single Mission ID (or on the Active Missions, for the Missions-Event).
+This means that applying a suffix of the already applied Events a second time does not change the State. Replaying
+from a Snapshot whose Journal Offsets lag behind its State is therefore safe (see mission_snapshot).
+
+Like journal_scanner, this Module only depends on the Standard Library.
+"""
+import datetime as dt
+from typing import Iterable, NamedTuple, Optional, Union
+
+from massacre.mission_record import MissionRecord
+
+FINISHING_EVENTS = ("MissionCompleted", "MissionAbandoned", "MissionFailed")
+"""After any of these Events a Mission is gone for good"""
+
+LIFECYCLE_EVENTS = ("Missions", "MissionAccepted", "MissionRedirected") + FINISHING_EVENTS
+"""All Journal Events the Reducer understands"""
+
+
+class MissionLifecycleEvent(NamedTuple):
+    """
+    Compact Form of a Lifecycle Event other than MissionAccepted (see FINISHING_EVENTS and MissionRedirected),
+    as collected by the Journal Scan. The Offset of its Line orders it relative to the MissionAccepted-Events.
+    """
+    event: str
+    mission_id: int
+    offset: int
+
+
+ScannedEvent = Union[MissionRecord, MissionLifecycleEvent]
+
+
+class CmdrMissionState:
+    """
+    Everything that is known about the Missions of a single CMDR
+    """
+    __slots__ = ("missions", "active", "redirected")
+
+    def __init__(self, missions: Optional[dict[int, MissionRecord]] = None, active: Optional[Iterable[int]] = None,
+                 redirected: Optional[set[int]] = None):
+        self.missions: dict[int, MissionRecord] = missions if missions is not None else {}
+        """Missions that have been accepted and are not finished yet. Mission ID -> Mission"""
+        self.active: dict[int, None] = dict.fromkeys(active) if active is not None else {}
+        """
+        Mission IDs of the active Missions. Set by the Missions-Event and kept up to date by the Events after it.
+        Before the first Missions-Event it is derived from Missions being accepted and finished.
+        Used as an ordered Set: Lookups are constant-time and the Order of the Game is kept.
+        """
+        self.redirected: set[int] = redirected if redirected is not None else set()
+        """Active Missions whose Objective is done. They are still active until they are handed in."""
+
+    def copy(self) -> "CmdrMissionState":
+        """
+        A Copy that is not affected by any further Events. The Mission Records are shared, they are never modified.
+        """
+        return CmdrMissionState(dict(self.missions), self.active.keys(), set(self.redirected))
+
+    def active_missions(self) -> dict[int, MissionRecord]:
+        """
+        Active Missions, in the Order they were reported by the Game. Active Mission IDs without a known
+        MissionAccepted-Event are left out.
+        """
+        return {mission_id: self.missions[mission_id] for mission_id in self.active if mission_id in self.missions}
+
+
+class MissionLifecycle:
+    """
+    CMDR -> CMDR Mission State, plus the Logic to apply Lifecycle Events to it
+    """
+
+    def __init__(self, states: Optional[dict[str, CmdrMissionState]] = None):
+        self.states: dict[str, CmdrMissionState] = states if states is not None else {}
+
+    @staticmethod
+    def from_mission_stores(mission_stores: dict[str, dict[int, MissionRecord]]) -> "MissionLifecycle":
+        """
+        Build the State from the Result of mission_aggregation_helper.get_missions_for_all_cmdrs
+        """
+        return MissionLifecycle({cmdr: CmdrMissionState(missions) for cmdr, missions in mission_stores.items()})
+
+    def copy(self) -> "MissionLifecycle":
+        """
+        A Copy that is not affected by any further Events, e.g. to be written to disk on another Thread
+        """
+        return MissionLifecycle({cmdr: state.copy() for cmdr, state in self.states.items()})
+
+    def mission_stores(self) -> dict[str, dict[int, MissionRecord]]:
+        """
+        CMDR -> Mission ID -> Mission, for all Missions that are not finished. The Dicts are shared with the State.
+        """
+        return {cmdr: state.missions for cmdr, state in self.states.items()}
+
+    def state_of(self, cmdr: str) -> CmdrMissionState:
+        state = self.states.get(cmdr)
+        if state is None:
+            state = CmdrMissionState()
+            self.states[cmdr] = state
+        return state
+
+    def set_active(self, cmdr: str, mission_ids: list[int]):
+        """Missions-Event: The Game reports all active Missions"""
+        state = self.state_of(cmdr)
+        state.active = dict.fromkeys(mission_ids)
+        state.redirected.intersection_update(state.active)
+
+    def accept(self, cmdr: str, mission: MissionRecord):
+        """MissionAccepted-Event"""
+        state = self.state_of(cmdr)
+        state.missions[mission.mission_id] = mission
+        state.active.setdefault(mission.mission_id)
+
+    def redirect(self, cmdr: str, mission_id: int):
+        """MissionRedirected-Event: The Objective is done, but the Mission stays active until it is handed in"""
+        state = self.state_of(cmdr)
+        if mission_id in state.missions or mission_id in state.active:
+            state.redirected.add(mission_id)
+
+    def finish(self, cmdr: str, mission_id: int):
+        """MissionCompleted-, MissionAbandoned- or MissionFailed-Event"""
+        state = self.states.get(cmdr)
+        if state is None:
+            return
+        state.missions.pop(mission_id, None)
+        state.redirected.discard(mission_id)
+        state.active.pop(mission_id, None)
+
+    def apply(self, cmdr: str, entry: dict):
+        """
+        Apply a live Journal Event. Events that are not in LIFECYCLE_EVENTS are ignored.
+        """
+        event = entry.get("event")
+        if event == "Missions":
+            self.set_active(cmdr, [int(x["MissionID"]) for x in entry.get("Active", [])])
+        elif event == "MissionAccepted":
+            self.accept(cmdr, MissionRecord.from_event(entry))
+        elif event == "MissionRedirected":
+            self.redirect(cmdr, int(entry["MissionID"]))
+        elif event in FINISHING_EVENTS:
+            self.finish(cmdr, int(entry["MissionID"]))
+
+    def apply_scanned(self, cmdr: str, event: ScannedEvent):
+        """
+        Apply an Event as collected by the Journal Scan
+        """
+        if isinstance(event, MissionRecord):
+            self.accept(cmdr, event)
+        elif event.event == "MissionRedirected":
+            self.redirect(cmdr, event.mission_id)
+        elif event.event in FINISHING_EVENTS:
+            self.finish(cmdr, event.mission_id)
+
+    def apply_journal(self, cmdr: str, missions: list[MissionRecord], lifecycle_events: list[MissionLifecycleEvent]):
+        """
+        Apply everything the Journal Scan collected from a single Journal, in the Order it was written
+        """
+        for event in ordered_journal_events(missions, lifecycle_events):
+            self.apply_scanned(cmdr, event)
+
+    def prune_expired(self, now: dt.datetime, keep_active: bool = True) -> int:
+        """
+        Remove all expired Missions and return how many were removed. Active Missions are kept unless keep_active is
+        False, as only the Game decides when they are gone.
+        """
+        pruned_count = 0
+        for state in self.states.values():
+            for mission_id in [x.mission_id for x in state.missions.values() if x.is_expired(now)]:
+                if keep_active and mission_id in state.active:
+                    continue
+                del state.missions[mission_id]
+                pruned_count += 1
+                state.active.pop(mission_id, None)
+                state.redirected.discard(mission_id)
+        return pruned_count
+
+
+def ordered_journal_events(missions: list[MissionRecord],
+                           lifecycle_events: list[MissionLifecycleEvent]) -> list[ScannedEvent]:
+    """
+    Merge the MissionAccepted-Events and the other Lifecycle Events of a Journal by their Offset
+    """
+    if len(lifecycle_events) == 0:
+        return list(missions)
+    events: list[tuple[int, ScannedEvent]] = [(x.journal_offset or 0, x) for x in missions]
+    events.extend((x.offset, x) for x in lifecycle_events)
+    events.sort(key=lambda x: x[0])
+    return [event for _, event in events]
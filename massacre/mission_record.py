@@ -0,0 +1,192 @@
+"""
+This Module contains the compact Representation of a MissionAccepted-Event that is kept in the Mission Store.
+
+A MissionAccepted-Event has around 20 Fields, including localised Strings, of which the Plugin only reads a handful.
+Keeping thousands of them around for every CMDR adds up, so only the relevant Fields are kept. The full Event can
+still be loaded from the Journal on demand.
+
+Like journal_scanner, this Module only depends on the Standard Library.
+"""
+import datetime as dt
+import json
+import sys
+from typing import Any, Iterable, Optional, Union
+
+MissionSource = Union[dict, tuple[str, int], None]
+"""
+Where the full Event can be found: the Event itself (live Events), or Journal Path and Byte Offset of its Line
+"""
+
+_EVENT_KEY_TO_ATTRIBUTE = {
+    "MissionID": "mission_id",
+    "Name": "name",
+    "Faction": "faction",
+    "TargetFaction": "target_faction",
+    "KillCount": "kill_count",
+    "Reward": "reward",
+    "DestinationSystem": "destination_system",
+    "TargetType": "target_type",
+    "Wing": "wing",
+    "Expiry": "expiry",
+    "timestamp": "timestamp"
+}
+"""
+The Keys of the MissionAccepted-Event that are kept. Mind the Order, it is the Layout used by as_list / from_list.
+"""
+
+MISSION_ACCEPTED_KEYS = tuple(_EVENT_KEY_TO_ATTRIBUTE.keys())
+"""
+The Keys of the MissionAccepted-Event that are kept, in the Order expected by MissionRecord.from_values
+"""
+
+_MISSING = None
+"""Keys that are not present in the Event (e.g. non-Massacre Missions have no KillCount) are stored as None"""
+
+
+_JOURNAL_TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+
+
+def parse_journal_timestamp(value: Optional[str]) -> Optional[dt.datetime]:
+    """
+    Parse a Timestamp as written by the Game (always UTC). Returns None if it is missing or malformed.
+    """
+    if value is None:
+        return None
+    try:
+        return dt.datetime.strptime(value, _JOURNAL_TIMESTAMP_FORMAT).replace(tzinfo=dt.timezone.utc)
+    except ValueError:
+        return None
+
+
+def _intern(value: Any) -> Any:
+    """
+    Faction-, System- and Mission-Names repeat across many Missions. Only keep one Copy of each.
+    """
+    if type(value) is str:
+        return sys.intern(value)
+    return value
+
+
+class MissionRecord:
+    """
+    Compact, read-only Version of a MissionAccepted-Event.
+
+    Supports the subset of the dict-Interface the Plugin uses (record["Name"], record.get("TargetType")), so it can be
+    used wherever the Event was used before. Reading a Key that is not kept loads the full Event (see raw).
+    """
+    __slots__ = tuple(_EVENT_KEY_TO_ATTRIBUTE.values()) + ("_source",)
+
+    mission_id: int
+    name: Optional[str]
+    faction: Optional[str]
+    target_faction: Optional[str]
+    kill_count: Optional[int]
+    reward: Optional[int]
+    destination_system: Optional[str]
+    target_type: Optional[str]
+    wing: Optional[bool]
+    expiry: Optional[str]
+    timestamp: Optional[str]
+    _source: MissionSource
+
+    @staticmethod
+    def from_event(event: dict, source: MissionSource = None) -> "MissionRecord":
+        """
+        Build a Record from a MissionAccepted-Event. If no source is provided, the Event itself is kept as Source.
+        """
+        record = MissionRecord()
+        for key, attribute in _EVENT_KEY_TO_ATTRIBUTE.items():
+            setattr(record, attribute, _intern(event.get(key, _MISSING)))
+        record.mission_id = int(event["MissionID"])
+        record._source = source if source is not None else event
+        return record
+
+    @staticmethod
+    def from_values(values: Iterable[Any], source: MissionSource) -> "MissionRecord":
+        """
+        Build a Record from the Values of the MISSION_ACCEPTED_KEYS, e.g. as decoded by a typed JSON Decoder
+        (see json_decoder). Missing Keys are passed as None.
+        """
+        record = MissionRecord()
+        for attribute, value in zip(_EVENT_KEY_TO_ATTRIBUTE.values(), values):
+            setattr(record, attribute, _intern(value))
+        record.mission_id = int(record.mission_id)
+        record._source = source
+        return record
+
+    @staticmethod
+    def from_list(data: list, journal_path: Optional[str] = None) -> "MissionRecord":
+        """
+        Inverse of as_list. The Offset stored in the List refers to the provided Journal.
+        """
+        record = MissionRecord()
+        for attribute, value in zip(_EVENT_KEY_TO_ATTRIBUTE.values(), data):
+            setattr(record, attribute, _intern(value))
+        offset = data[len(_EVENT_KEY_TO_ATTRIBUTE)]
+        record._source = (journal_path, offset) if journal_path is not None and offset is not None else None
+        return record
+
+    def as_list(self) -> list:
+        """
+        Serializable Form used by the Mission Index. Only the Offset of the Source is kept, its Journal is implied.
+        """
+        return [getattr(self, attribute) for attribute in _EVENT_KEY_TO_ATTRIBUTE.values()] + [self.journal_offset]
+
+    @property
+    def journal_offset(self) -> Optional[int]:
+        """
+        Byte Offset of the Event in its Journal. None for live Events.
+        """
+        return self._source[1] if isinstance(self._source, tuple) else None
+
+    @property
+    def journal_path(self) -> Optional[str]:
+        return self._source[0] if isinstance(self._source, tuple) else None
+
+    def is_expired(self, now: dt.datetime) -> bool:
+        """
+        A Mission without a (readable) Expiry is never considered expired
+        """
+        expiry = parse_journal_timestamp(self.expiry)
+        return expiry is not None and expiry <= now
+
+    def raw(self) -> dict:
+        """
+        The full MissionAccepted-Event. Unless this is a live Event, it is read from the Journal.
+        If the Journal is gone, only the kept Fields are returned.
+        """
+        if isinstance(self._source, dict):
+            return self._source
+        if isinstance(self._source, tuple):
+            journal_path, offset = self._source
+            try:
+                with open(journal_path, "rb") as log_file:
+                    log_file.seek(offset)
+                    event = json.loads(log_file.readline().decode("utf8"))
+                if event.get("MissionID") == self.mission_id:
+                    return event
+            except (OSError, ValueError):
+                pass
+        return {key: getattr(self, attribute) for key, attribute in _EVENT_KEY_TO_ATTRIBUTE.items()
+                if getattr(self, attribute) is not _MISSING}
+
+    def __getitem__(self, key: str) -> Any:
+        attribute = _EVENT_KEY_TO_ATTRIBUTE.get(key)
+        if attribute is None:
+            return self.raw()[key]
+        value = getattr(self, attribute)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def get(self, key: str, default: Any = None) -> Any:
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __repr__(self):
+        return f"MissionRecord({self.mission_id}, {self.name!r})"
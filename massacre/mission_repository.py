@@ -1,14 +1,92 @@
+import functools
+import threading
+from collections import deque
+import datetime as dt
 from enum import Flag
-from typing import Callable, Optional
+from types import MappingProxyType
+from typing import Callable, Mapping, NamedTuple, Optional
 from massacre.logger_factory import logger
+from massacre.mission_lifecycle import FINISHING_EVENTS, LIFECYCLE_EVENTS, CmdrMissionState, MissionLifecycle
+from massacre.mission_record import MissionRecord
+
+MissionResolver = Callable[[str, set[int], Callable[[dict[int, MissionRecord]], None]], None]
+"""
+(CMDR, Mission UUIDs, Callback) -> void. Starts looking up the MissionAccepted-Events of the UUIDs, and passes the ones
+that could be found to the Callback once done, from any Thread. See mission_aggregation_helper.build_resolver_worker
+"""
+
+PartitionLoader = Callable[[str, Callable[[Optional[CmdrMissionState]], None]], None]
+"""
+(CMDR, Callback) -> void. Starts reading the Mission State of that CMDR from the Journals, and passes it to the
+Callback once done, from any Thread. None is passed if it could not be read.
+See mission_aggregation_helper.build_partition_worker
+"""
+
+
+class ActiveMissionsDelta(NamedTuple):
+    """
+    What changed about the active Missions of the current CMDR, see active_missions_delta_listeners
+    """
+    added: dict[int, MissionRecord]
+    """Missions that became active"""
+    removed: frozenset[int]
+    """Mission IDs that are no longer active"""
+    changed: dict[int, MissionRecord]
+    """Missions that are still active, but whose MissionAccepted-Event has been replaced"""
+
+    def is_empty(self) -> bool:
+        return len(self.added) == 0 and len(self.removed) == 0 and len(self.changed) == 0
+
+    def as_dict(self) -> dict:
+        return {
+            "added": {mission_id: mission.as_list() for mission_id, mission in self.added.items()},
+            "removed": sorted(self.removed),
+            "changed": {mission_id: mission.as_list() for mission_id, mission in self.changed.items()}
+        }
+
+
+def diff_active_missions(old: dict[int, MissionRecord], new: dict[int, MissionRecord]) -> ActiveMissionsDelta:
+    """
+    The Delta that turns the old active Missions into the new ones
+    """
+    added: dict[int, MissionRecord] = {}
+    changed: dict[int, MissionRecord] = {}
+    for mission_id, mission in new.items():
+        old_mission = old.get(mission_id)
+        if old_mission is None:
+            added[mission_id] = mission
+        elif old_mission is not mission:
+            changed[mission_id] = mission
+    return ActiveMissionsDelta(added, frozenset(old.keys() - new.keys()), changed)
+
+
+# All Listeners are invoked after the Repository Lock has been released, in the Order of the Changes. They run on
+# whichever Thread changed the Repository, or on another Thread that is notifying them at the same Time, so they must
+# be quick and must not touch Tk. Anything slow should be handed over (see massacre_mission_state.update_coalescer).
+# The Missions passed to them are read-only Snapshots, so they can be kept around.
 
-# The listeners are stored as a Tuple of Activator and Callback.
 # Callback: (mission as dict<mission_uuid, mission>) -> void
-active_missions_changed_event_listeners: list[Callable[[dict[int, dict]], None]] = []
-all_missions_changed_event_listeners: list[Callable[[dict[int, dict]], None]] = []
+active_missions_changed_event_listeners: list[Callable[[Mapping[int, MissionRecord]], None]] = []
+all_missions_changed_event_listeners: list[Callable[[Mapping[int, MissionRecord]], None]] = []
+
+# Callback: (delta, all active missions afterwards as dict<mission_uuid, mission>) -> void
+# Invoked whenever the active_missions_changed_event_listeners are, right before them. The Delta may be empty,
+# e.g. for a Missions-Event that confirms the known active Missions.
+active_missions_delta_listeners: list[Callable[[ActiveMissionsDelta, Mapping[int, MissionRecord]], None]] = []
 
 _active_uuids_init = False
 _active_uuids: list[int] = []
+_active_uuids_cmdr: Optional[str] = None
+
+MISSION_EVENTS = list(LIFECYCLE_EVENTS)
+"""
+Journal Events the Mission Repository is interested in. See MissionRepository.notify_about_journal_event
+"""
+
+CHECKPOINT_INTERVAL = 20
+"""
+Amount of Lifecycle Events after which the Mission State is checkpointed. See MissionRepository.set_checkpoint_handler
+"""
 
 
 class MissionRepoState(Flag):
@@ -18,6 +96,40 @@ class MissionRepoState(Flag):
     INITIALIZED = 0b11
 
 
+class RepositorySnapshot(NamedTuple):
+    """
+    Immutable View of the Mission Repository at one Point in Time. Can be read from any Thread without locking.
+    """
+    version: int
+    """Increases with every Change of the active Missions"""
+    cmdr: Optional[str]
+    state: MissionRepoState
+    active_missions: Mapping[int, MissionRecord]
+    """Read-only"""
+
+
+def _synchronized(method):
+    """
+    Run the Method while holding the Repository Lock. The Listeners notified by it are invoked once the outermost
+    synchronized Method has released the Lock again (see MissionRepository._deliver_notifications).
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        outermost = False
+        try:
+            with self._lock:
+                self._lock_depth += 1
+                try:
+                    return method(self, *args, **kwargs)
+                finally:
+                    self._lock_depth -= 1
+                    outermost = self._lock_depth == 0
+        finally:
+            if outermost:
+                self._deliver_notifications()
+    return wrapper
+
+
 class MissionRepository:
     """
     The Mission Repository contains the current "state" of missions.
@@ -26,6 +138,9 @@ class MissionRepository:
 
     This was written in a generic manner and as a result is not limited to Massacre Missions
     This was written with multi-cmdr-support in mind.
+
+    All Changes happen while holding the Repository Lock, so Journal Events, the Mission Index Thread and any other
+    Thread can safely feed it. Readers on other Threads should use snapshot().
     """
 
     @property
@@ -33,10 +148,16 @@ class MissionRepository:
         return self._state
 
     @property
-    def active_missions(self):
-        return self._active_missions
+    def active_missions(self) -> Mapping[int, MissionRecord]:
+        """Read-only, see snapshot"""
+        return self.snapshot().active_missions
+
+    @property
+    def lifecycle(self):
+        return self._lifecycle
 
-    def __init__(self, mission_store: dict[str, dict[int, dict]], cmdr: Optional[str] = None):
+    def __init__(self, mission_store: Optional[dict[str, dict[int, MissionRecord]]] = None,
+                 cmdr: Optional[str] = None):
         self._cmdr = cmdr
         self._state = MissionRepoState.AWAITING_INIT
         """
@@ -44,93 +165,450 @@ class MissionRepository:
         the Missions-Event (for specific CMDR) are passed.
         """
 
-        self._mission_store: dict[str, dict[int, dict]] = mission_store
+        self._lifecycle = MissionLifecycle()
         """
-        The Mission Store contains all missions - REGARDLESS OF IF THEY ARE ACTIVE OR NOT
+        The Mission State of all Commanders. All Lifecycle Events are folded into it (see mission_lifecycle).
         
-        Note that this contains Data for all Commanders.  
-        The first key is the CMDR, the second key is the Mission UUID
+        Its Mission Stores contain all missions that are not finished - REGARDLESS OF IF THEY ARE ACTIVE OR NOT
+        """
+
+        self._active_missions: dict[int, MissionRecord] = {}
+        """Active Missions are just for the current commander"""
+
+        self._buffered_events: list[tuple[dict, str]] = []
+        """
+        Journal Events (and their CMDR) that arrived while the Mission Aggregation or a Partition was still loading in
+        another thread. They are replayed once the Mission Data or the Partition is passed.
         """
+        self._lock = threading.RLock()
+        """
+        Guards all Changes, e.g. the Mission Data hand-over from the Mission Aggregation Thread against incoming
+        Journal Events
+        """
+        self._lock_depth = 0
+        self._pending_notifications: deque[Callable[[], None]] = deque()
+        """
+        Listener Calls queued while the Lock is held. Delivered in Order once it is released.
+        """
+        self._delivery_lock = threading.Lock()
+        self._delivering = False
+        """Whether a Thread is delivering the pending Notifications right now"""
+        self._version = 0
+        self._snapshot: Optional[RepositorySnapshot] = None
+        """Built on Demand, dropped on every Change"""
+
+        self._mission_resolver: Optional[MissionResolver] = None
+        """
+        Used to look up active Missions that are not in the Mission Store (yet).
+        See mission_aggregation_helper.build_resolver_worker
+        """
+
+        self._checkpoint_handler: Optional[Callable[[MissionLifecycle], None]] = None
+        self._events_since_checkpoint = 0
+
+        self._partition_loader: Optional[PartitionLoader] = None
+        self._partition_idle_timeout: Optional[dt.timedelta] = None
+        self._partitions_last_used: dict[str, dt.datetime] = {}
+        """
+        CMDRs whose Partition has been loaded, and when it was last used. See set_partition_loader
+        """
+        self._partitions_loading: set[str] = set()
+        self._partitions_failed: set[str] = set()
+        """CMDRs whose Partition could not be loaded. Tried again on their next Missions-Event."""
+
+        # Only replayed once every Attribute is set, the Replay goes through the same Paths as a live Event
+        global _active_uuids, _active_uuids_init, _active_uuids_cmdr
+        if _active_uuids_init and _active_uuids_cmdr is not None:
+            self.notify_about_journal_event(_build_missions_event(_active_uuids), _active_uuids_cmdr)
+        if mission_store is not None:
+            self.notify_about_mission_data(mission_store)
+
+    @_synchronized
+    def snapshot(self) -> RepositorySnapshot:
+        """
+        Immutable View of the current State. The same Snapshot is returned until something changes.
+        """
+        if self._snapshot is None:
+            self._snapshot = RepositorySnapshot(self._version, self._cmdr, self._state,
+                                                MappingProxyType(dict(self._active_missions)))
+        return self._snapshot
+
+    def set_mission_resolver(self, resolver: Optional[MissionResolver]):
+        """
+        Set a Resolver which is asked for any active Mission that is missing from the Mission Store. This allows
+        starting with an empty Mission Store, which is then filled on demand once the Missions-Event arrives.
+        The Missions that are already known are shown right away, the resolved ones are added once they are passed
+        back (see notify_about_resolved_missions).
+        """
+        self._mission_resolver = resolver
+
+    def set_partition_loader(self, loader: Optional[PartitionLoader], idle_timeout: Optional[dt.timedelta] = None):
+        """
+        Set a Loader which is asked for the Missions of a CMDR once that CMDR first appears in a Missions-Event. This
+        allows starting with an empty Mission Store that only ever holds the CMDRs that are actually played.
+        Until the Loader is done, all Journal Events are buffered, just like while the Mission Data is missing.
+
+        The Partitions of all other CMDRs are dropped once they have not been used for idle_timeout, and are loaded
+        again if the CMDR comes back. None keeps them forever.
+        """
+        self._partition_loader = loader
+        self._partition_idle_timeout = idle_timeout
+
+    def set_checkpoint_handler(self, handler: Optional[Callable[[MissionLifecycle], None]]):
+        """
+        Set a Handler which is passed a Copy of the Mission State on every Missions-Event and after every
+        CHECKPOINT_INTERVAL other Lifecycle Events, so that it can be written to disk. It is called while the
+        Repository Lock is held, so it should only hand the Copy over. See checkpoint_writer
+        """
+        self._checkpoint_handler = handler
+
+    @_synchronized
+    def notify_about_mission_data(self, mission_store: dict[str, dict[int, MissionRecord]]):
+        """
+        Pass the historic Mission Data (see Mission Aggregation Helper). May be called from another thread.
+        Any Journal Events buffered until now are replayed afterwards.
+        """
+        self._lifecycle = MissionLifecycle.from_mission_stores(mission_store)
         self._state |= MissionRepoState.HAS_MISSION_DATA
+        self._snapshot = None
+
+        if len(self._buffered_events) > 0:
+            logger.info(f"Replaying {len(self._buffered_events)} Journal Events received while building the Index")
+        self.__replay_buffered_events()
+
+    @_synchronized
+    def notify_about_partition(self, cmdr: str, loaded: Optional[CmdrMissionState]):
         """
-        Preparations for when and if the Mission Aggregation happens in another thread
+        Pass the Partition of a CMDR, as requested from the Partition Loader (see set_partition_loader). May be called
+        from another thread. Any Journal Events buffered while it was loading are replayed afterwards.
         """
+        self._partitions_loading.discard(cmdr)
+        if loaded is None:
+            self._partitions_failed.add(cmdr)
+        else:
+            state = self._lifecycle.state_of(cmdr)
+            # Events that arrived before the Partition was requested are newer than anything read from the Journals
+            for mission_id, mission in loaded.missions.items():
+                state.missions.setdefault(mission_id, mission)
+            state.redirected.update(x for x in loaded.redirected if x in state.missions)
+            self._partitions_last_used[cmdr] = dt.datetime.now(tz=dt.timezone.utc)
+            logger.info(f"Loaded the Partition of CMDR {cmdr} with {len(loaded.missions)} Missions")
 
-        self._active_missions: dict[int, dict] = {}
-        """Active Missions are just for the current commander"""
+        if len(self._buffered_events) > 0:
+            logger.info(f"Replaying {len(self._buffered_events)} Journal Events received while loading the Partition")
+        self.__replay_buffered_events()
 
-        global _active_uuids, _active_uuids_init
-        if _active_uuids_init:
-            self.notify_about_active_mission_uuids(_active_uuids, cmdr)
+    @_synchronized
+    def notify_about_journal_event(self, entry: dict, cmdr: str):
+        """
+        Pass a Journal Event (see MISSION_EVENTS). If the Mission Data or a Partition is not yet available, the Event
+        is buffered.
+        """
+        self.__handle_journal_event(entry, cmdr)
+
+    def __replay_buffered_events(self):
+        buffered_events = self._buffered_events
+        self._buffered_events = []
+        for entry, cmdr in buffered_events:
+            # Buffered again if they lead to another Partition being loaded
+            self.__handle_journal_event(entry, cmdr)
+
+    def __handle_journal_event(self, entry: dict, cmdr: str):
+        if MissionRepoState.HAS_MISSION_DATA not in self._state or len(self._partitions_loading) > 0:
+            self._buffered_events.append((entry, cmdr))
+            return
+        if entry["event"] == "Missions" and self.__needs_partition(cmdr):
+            # Replayed once the Partition has been passed, see notify_about_partition
+            self._buffered_events.append((entry, cmdr))
+            self.__load_partition(cmdr)
+            return
+        self.__apply_journal_event(entry, cmdr)
+
+    def __apply_journal_event(self, entry: dict, cmdr: str):
+        if entry["event"] == "Missions":
+            # Fetch the currently active missions
+            active_mission_uuids = map(lambda x: int(x["MissionID"]), entry["Active"])
+            self.notify_about_active_mission_uuids(list(active_mission_uuids), cmdr)
+
+        elif entry["event"] == "MissionAccepted":
+            self.notify_about_new_mission_accepted(MissionRecord.from_event(entry), cmdr)
+
+        elif entry["event"] in FINISHING_EVENTS:
+            # Mission has been completed, abandoned or failed -> It is no longer active
+            self.notify_about_mission_gone(int(entry["MissionID"]), cmdr)
+
+        else:
+            # MissionRedirected: The Kills are done, but the Mission is active until it is handed in. The Stack
+            # does not change, so the Listeners are not notified.
+            self._lifecycle.apply(cmdr, entry)
+
+        self.__count_towards_checkpoint(entry["event"] == "Missions")
+        self.__evict_idle_partitions(dt.datetime.now(tz=dt.timezone.utc))
+
+    def __needs_partition(self, cmdr: str) -> bool:
+        if self._partition_loader is None or cmdr in self._partitions_last_used:
+            return False
+        if cmdr in self._partitions_failed:
+            # This Missions-Event goes ahead without it. The next one tries again.
+            self._partitions_failed.discard(cmdr)
+            return False
+        return True
+
+    def __load_partition(self, cmdr: str):
+        logger.info(f"Loading the Partition of CMDR {cmdr}. Buffering Journal Events until it is loaded")
+        self._partitions_loading.add(cmdr)
+        try:
+            self._partition_loader(cmdr, lambda loaded: self.notify_about_partition(cmdr, loaded))
+        except Exception:
+            logger.exception(f"Failed to start loading the Missions of CMDR {cmdr}")
+            self.notify_about_partition(cmdr, None)
+
+    def __use_partition(self, cmdr: str, now: dt.datetime):
+        """
+        Mark the Partition of the provided CMDR as used, if it is loaded
+        """
+        if self._cmdr is not None and self._cmdr in self._partitions_last_used:
+            # The previous CMDR has been in use up until now
+            self._partitions_last_used[self._cmdr] = now
+        if cmdr in self._partitions_last_used:
+            self._partitions_last_used[cmdr] = now
+
+    def __evict_idle_partitions(self, now: dt.datetime):
+        if self._partition_idle_timeout is None:
+            return
+        for cmdr, last_used in list(self._partitions_last_used.items()):
+            if cmdr == self._cmdr or now - last_used <= self._partition_idle_timeout:
+                continue
+            del self._partitions_last_used[cmdr]
+            self._lifecycle.states.pop(cmdr, None)
+            logger.info(f"Dropped the Partition of CMDR {cmdr}. It has not been used since {last_used}")
+
+    @_synchronized
+    def checkpoint(self):
+        """
+        Checkpoint the Mission State right away, e.g. on Shutdown. Does nothing until the Mission Data has been passed,
+        as the State would be incomplete.
+        """
+        if MissionRepoState.HAS_MISSION_DATA in self._state:
+            self.__count_towards_checkpoint(True)
+
+    def __count_towards_checkpoint(self, force: bool):
+        self._events_since_checkpoint += 1
+        if self._checkpoint_handler is None:
+            return
+        if force or self._events_since_checkpoint >= CHECKPOINT_INTERVAL:
+            self._events_since_checkpoint = 0
+            try:
+                self._checkpoint_handler(self._lifecycle.copy())
+            except Exception:
+                logger.exception("Failed to checkpoint the Mission State")
 
+    @_synchronized
     def notify_about_active_mission_uuids(self, uuids: list[int], cmdr: str):
         """
         When a "Missions"-Event is found, this should be triggered.
         It should only contain active missions.
         active missions define the intersection between the provided uuids and all missions
         """
-        self._cmdr = cmdr
-
         if cmdr is None:
             logger.error("Passed CMDR is None! Aborting")
             return
 
-        if self._state & MissionRepoState.HAS_MISSIONS_EVENT == 0:
+        self.__use_partition(cmdr, dt.datetime.now(tz=dt.timezone.utc))
+        self._cmdr = cmdr
+
+        if MissionRepoState.HAS_MISSIONS_EVENT not in self._state:
             self._state |= MissionRepoState.HAS_MISSIONS_EVENT
         else:
             logger.warning("Mission UUIDs were passed even though the State is already initialized")
             pass
 
-        self._active_missions = {}
+        self._lifecycle.set_active(cmdr, uuids)
+        self.prune_expired_missions()
 
-        all_known_uuids = list(self._mission_store[cmdr].keys())
-        for uuid in uuids:
-            if uuid in all_known_uuids:
-                self._active_missions[uuid] = self._mission_store[cmdr][uuid]
-            else:
+        cmdr_state = self._lifecycle.state_of(cmdr)
+        missing_uuids = set(uuids).difference(cmdr_state.missions.keys())
+        if len(missing_uuids) > 0 and self._mission_resolver is not None:
+            self.__resolve_missions(cmdr, missing_uuids)
+        else:
+            for _ in range(len(missing_uuids)):
                 logger.warning("A Mission could not be found in the Store even though the UUID is present")
-                pass
+
+        active_missions = cmdr_state.active_missions()
 
         #  Emit an Event notifying that the pool of active missions has changed
         #  The listeners should be CMDR-agnostic. They just get the active mission list.
-        for listener in active_missions_changed_event_listeners:
-            listener(self._active_missions)
+        delta = diff_active_missions(self._active_missions, active_missions)
+        self._active_missions = active_missions
+        self.__notify_active_missions_changed(delta)
+
+    def __resolve_missions(self, cmdr: str, mission_ids: set[int]):
+        logger.info(f"Looking up {len(mission_ids)} active Missions of CMDR {cmdr}")
+        try:
+            self._mission_resolver(cmdr, mission_ids, lambda found: self.notify_about_resolved_missions(cmdr, found))
+        except Exception:
+            logger.exception(f"Failed to start looking up the Missions of CMDR {cmdr}")
+
+    @_synchronized
+    def notify_about_resolved_missions(self, cmdr: str, missions: dict[int, MissionRecord]):
+        """
+        Pass the Missions found by the Mission Resolver (see set_mission_resolver). May be called from another thread.
+        Missions that are no longer active, or that have been accepted again in the meantime, are left out.
+        """
+        state = self._lifecycle.state_of(cmdr)
+        resolved = [x for x in missions.values() if x.mission_id in state.active and x.mission_id not in state.missions]
+        for mission in resolved:
+            self._lifecycle.accept(cmdr, mission)
+        for _ in [x for x in state.active if x not in state.missions]:
+            logger.warning("A Mission could not be found in the Store even though the UUID is present")
+        if cmdr != self._cmdr or len(resolved) == 0:
+            return
+
+        active_missions = state.active_missions()
+        delta = diff_active_missions(self._active_missions, active_missions)
+        self._active_missions = active_missions
+        self.__notify_active_missions_changed(delta)
+
+    @_synchronized
+    def notify_about_restored_missions(self, cmdr: str, missions: dict[int, MissionRecord]):
+        """
+        Show active Missions restored from the last Shutdown (see warm_start) until the Game sends the
+        Missions-Event. Ignored once it has been received, as it is always more recent.
+        """
+        if MissionRepoState.HAS_MISSIONS_EVENT in self._state:
+            logger.info("Ignoring restored Missions, the Missions-Event has already been received")
+            return
+        logger.info(f"Restored {len(missions)} active Missions of CMDR {cmdr}")
+        self._cmdr = cmdr
+        delta = diff_active_missions(self._active_missions, missions)
+        self._active_missions = dict(missions)
+        self.__notify_active_missions_changed(delta)
+
+    @_synchronized
+    def active_missions_per_cmdr(self) -> dict[str, dict[int, MissionRecord]]:
+        """
+        The active Missions of every known CMDR. For the current CMDR these are the ones reported by the Game, for all
+        others the ones folded from the Journals.
+        """
+        active_missions = {cmdr: state.active_missions() for cmdr, state in self._lifecycle.states.items()}
+        if self._cmdr is not None:
+            active_missions[self._cmdr] = dict(self._active_missions)
+        return active_missions
 
-    def notify_about_new_mission_accepted(self, mission: dict, cmdr: str):
-        logger.info(f"New Mission with ID {mission['MissionID']} has been accepted")
-        self._mission_store[cmdr][mission["MissionID"]] = mission
-        self._active_missions[mission["MissionID"]] = mission
-        self.update_all_listeners()
+    @_synchronized
+    def notify_about_new_mission_accepted(self, mission: MissionRecord, cmdr: str):
+        logger.info(f"New Mission with ID {mission.mission_id} has been accepted")
+        self._lifecycle.accept(cmdr, mission)
+        replaced = self._active_missions.get(mission.mission_id)
+        self._active_missions[mission.mission_id] = mission
+        if replaced is None:
+            delta = ActiveMissionsDelta({mission.mission_id: mission}, frozenset(), {})
+        else:
+            delta = ActiveMissionsDelta({}, frozenset(), {mission.mission_id: mission})
+        self.__notify_active_missions_changed(delta)
+        self.__notify_all_missions_changed()
 
-    def notify_about_mission_gone(self, mission_uuid: int):
+    @_synchronized
+    def notify_about_mission_gone(self, mission_uuid: int, cmdr: Optional[str] = None):
         # Should be called when the Mission is handed in or when the Mission has failed
         logger.info(f"Mission with ID {mission_uuid} has been removed")
-        del self._active_missions[mission_uuid]
-        global active_missions_changed_event_listeners
-        for listener in active_missions_changed_event_listeners:
-            listener(self._active_missions)
+        removed = self._active_missions.pop(mission_uuid, None)
+        # A Mission that is gone never comes back, so it is no longer needed in the Store either
+        self._lifecycle.finish(cmdr if cmdr is not None else self._cmdr, mission_uuid)
+        self.__notify_active_missions_changed(
+            ActiveMissionsDelta({}, frozenset() if removed is None else frozenset((mission_uuid,)), {}))
+
+    def __notify_active_missions_changed(self, delta: ActiveMissionsDelta):
+        self._version += 1
+        self._snapshot = None
+        active_missions = self.snapshot().active_missions
+
+        def notify():
+            for delta_listener in active_missions_delta_listeners:
+                delta_listener(delta, active_missions)
+            for listener in active_missions_changed_event_listeners:
+                listener(active_missions)
+        self._pending_notifications.append(notify)
+
+    def __notify_all_missions_changed(self):
+        if len(all_missions_changed_event_listeners) == 0:
+            return
+        all_missions = MappingProxyType(dict(self._lifecycle.mission_stores().get(self._cmdr, {})))
+
+        def notify():
+            for listener in all_missions_changed_event_listeners:
+                listener(all_missions)
+        self._pending_notifications.append(notify)
+
+    def _deliver_notifications(self):
+        """
+        Invoke the Listeners for every Change queued so far, in Order. Must be called without holding the Repository
+        Lock. If another Thread is delivering already, it delivers the queued Changes as well, so that no Thread ever
+        waits for the Listeners of another one.
+        """
+        with self._delivery_lock:
+            if self._delivering:
+                return
+            self._delivering = True
+        try:
+            while True:
+                with self._delivery_lock:
+                    if len(self._pending_notifications) == 0:
+                        self._delivering = False
+                        return
+                    notify = self._pending_notifications.popleft()
+                notify()
+        except BaseException:
+            with self._delivery_lock:
+                self._delivering = False
+            raise
+
+    @_synchronized
+    def prune_expired_missions(self, now: Optional[dt.datetime] = None):
+        """
+        Remove all Missions from the Store that have expired. Active Missions are kept until the next Missions-Event,
+        as only the Game decides when they are gone.
+        """
+        if now is None:
+            now = dt.datetime.now(tz=dt.timezone.utc)
+        pruned_count = self._lifecycle.prune_expired(now)
+        if pruned_count > 0:
+            logger.info(f"Pruned {pruned_count} expired Missions from the Store")
 
+    @_synchronized
     def update_all_listeners(self):
-        global active_missions_changed_event_listeners, all_missions_changed_event_listeners
-        for listener in active_missions_changed_event_listeners:
-            listener(self._active_missions)
-        for listener in all_missions_changed_event_listeners:
-            listener(self._mission_store[self._cmdr])
+        """
+        Push the current State to all Listeners. The Delta Listeners are passed all active Missions as changed.
+        """
+        self.__notify_active_missions_changed(ActiveMissionsDelta({}, frozenset(), dict(self._active_missions)))
+        self.__notify_all_missions_changed()
 
 
 mission_repository: Optional[MissionRepository] = None
 
 
-def set_new_repo(missions: dict[str, dict[int, dict]]):
+def set_new_repo(missions: Optional[dict[str, dict[int, MissionRecord]]] = None):
+    """
+    Create a new Mission Repository. If no Missions are passed, the Repository buffers all Journal Events
+    until the Missions are passed via MissionRepository.notify_about_mission_data
+    """
     global mission_repository
     mission_repository = MissionRepository(missions)
 
 
+def _build_missions_event(uuids: list[int]) -> dict:
+    """
+    Build a minimal "Missions"-Event containing the provided active Mission UUIDs
+    """
+    return {"event": "Missions", "Active": [{"MissionID": uuid} for uuid in uuids]}
+
+
 def set_active_uuids(uuids: list[int], cmdr: str):
-    global _active_uuids, _active_uuids_init
+    global _active_uuids, _active_uuids_init, _active_uuids_cmdr
     _active_uuids.clear()
     _active_uuids.extend(uuids)
     _active_uuids_init = True
+    _active_uuids_cmdr = cmdr
 
     if mission_repository is not None:
-        mission_repository.notify_about_active_mission_uuids(_active_uuids, cmdr)
+        mission_repository.notify_about_journal_event(_build_missions_event(_active_uuids), cmdr)
@@ -0,0 +1,115 @@
+"""
+This Module contains Snapshots of the folded Mission State (see mission_lifecycle).
+
+A Snapshot stores the Mission State of all CMDRs together with a High-Water Mark per Journal: the Offset up to which
+the Journal was read when the State was taken. Rebuilding the State then means loading the Snapshot and only
+replaying the Journal Lines behind these Offsets, instead of folding all Journals of the last two weeks again.
+
+The Offsets may lag behind the State (see mission_aggregation_helper.checkpoint_mission_state), which only means that
+some Events are applied a second time. The Reducer is built so that this does not change the State.
+"""
+import datetime as dt
+import json
+import os
+from pathlib import Path
+from typing import Optional
+
+from massacre.logger_factory import logger
+from massacre.mission_lifecycle import CmdrMissionState, MissionLifecycle
+from massacre.mission_record import MissionRecord
+
+SNAPSHOT_FORMAT_VERSION = 1
+"""
+Bump this whenever the layout of the Snapshot File changes. Snapshot Files with a different Version are discarded.
+"""
+
+snapshot_file_location = Path(__file__).parent.parent / "mission_snapshot.json"
+"""
+The Snapshot is stored in the Plugin Directory, next to the Mission Index
+"""
+
+JournalMark = tuple[int, str]
+"""
+Offset up to which the Journal has been read, and the CMDR of the Journal
+"""
+
+
+class MissionSnapshot:
+    """
+    Mission State of all CMDRs, and the Journal Offsets it is based on
+    """
+
+    def __init__(self, lifecycle: MissionLifecycle, journals: dict[str, JournalMark], taken_at_ns: int):
+        """
+        :param journals: Journal Path -> Journal Mark. Every Event in front of the Offset is part of the State.
+        :param taken_at_ns: When the Offsets were measured. A Journal that is not part of journals and has not been
+                            modified since can not contain any Event that is missing from the State.
+        """
+        self.lifecycle = lifecycle
+        self.journals = journals
+        self.taken_at_ns = taken_at_ns
+
+    @property
+    def taken_at(self) -> dt.datetime:
+        return dt.datetime.fromtimestamp(self.taken_at_ns / 1e9, tz=dt.timezone.utc)
+
+    @staticmethod
+    def load(location: Optional[Path] = None) -> Optional["MissionSnapshot"]:
+        """
+        Load the Snapshot from disk. Returns None if it is missing, outdated or corrupted, in which case the State
+        has to be folded from the Journals.
+
+        :param location: Defaults to snapshot_file_location
+        """
+        if location is None:
+            location = snapshot_file_location
+        if not location.is_file():
+            logger.info("No Mission Snapshot found")
+            return None
+
+        try:
+            with open(location, "r", encoding="utf8") as snapshot_file:
+                raw = json.load(snapshot_file)
+            if raw.get("version") != SNAPSHOT_FORMAT_VERSION:
+                logger.info(f"Mission Snapshot has Version {raw.get('version')}, expected {SNAPSHOT_FORMAT_VERSION}. "
+                            f"Discarding it.")
+                return None
+            states: dict[str, CmdrMissionState] = {}
+            for cmdr, state in raw["cmdrs"].items():
+                missions = [MissionRecord.from_list(mission[1:], mission[0]) for mission in state["missions"]]
+                states[cmdr] = CmdrMissionState({x.mission_id: x for x in missions},
+                                                [int(x) for x in state["active"]],
+                                                {int(x) for x in state["redirected"]})
+            journals = {path: (int(offset), str(cmdr)) for path, (offset, cmdr) in raw["journals"].items()}
+            snapshot = MissionSnapshot(MissionLifecycle(states), journals, int(raw["taken_at_ns"]))
+        except Exception:
+            logger.warning("Mission Snapshot is corrupted. Discarding it.")
+            return None
+
+        logger.info(f"Loaded Mission Snapshot taken at {snapshot.taken_at}")
+        return snapshot
+
+    def save(self, location: Optional[Path] = None):
+        """
+        Write the Snapshot to disk. The File is replaced atomically, just like the Mission Index.
+
+        :param location: Defaults to snapshot_file_location
+        """
+        if location is None:
+            location = snapshot_file_location
+        temp_location = location.with_suffix(".tmp")
+        try:
+            with open(temp_location, "w", encoding="utf8") as snapshot_file:
+                json.dump({
+                    "version": SNAPSHOT_FORMAT_VERSION,
+                    "taken_at_ns": self.taken_at_ns,
+                    "journals": {path: list(mark) for path, mark in self.journals.items()},
+                    "cmdrs": {cmdr: {
+                        "missions": [[x.journal_path] + x.as_list() for x in state.missions.values()],
+                        "active": list(state.active),
+                        "redirected": sorted(state.redirected)
+                    } for cmdr, state in self.lifecycle.states.items()}
+                }, snapshot_file)
+            os.replace(temp_location, location)
+        except OSError:
+            logger.exception("Failed to write Mission Snapshot")
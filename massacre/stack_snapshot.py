@@ -0,0 +1,85 @@
+"""
+This Module contains the Stack Snapshot: the active Massacre Missions together with their Data-View (see
+massacre_mission_data), built once per Change and shared by the UI, the Overlay and all Integrations.
+
+Whenever the Massacre Missions change, a single Aggregator (see MassacreMissionAggregator) applies the Changes passed
+along by massacre_mission_state, without looking at the other Missions, and a new Snapshot with the next Version is passed to the stack_snapshot_listeners. If nothing changed (e.g. a Missions-Event
+that confirms the known Missions), the previous Snapshot is passed again, so that Consumers can skip it by its Version.
+
+A Snapshot is never modified after it has been built. It can be handed to Worker Threads without copying it.
+"""
+import threading
+from types import MappingProxyType
+from typing import Callable, Mapping, NamedTuple, Optional
+
+from massacre.diagnostic_recorder import recorder
+from massacre.massacre_mission_data import MassacreMissionAggregator, MassacreMissionData
+from massacre.massacre_mission_state import MassacreMission, MassacreMissionChanges, massacre_mission_listeners
+
+
+class StackSnapshot(NamedTuple):
+    version: int
+    """
+    Grows with every Change of the Stack. A Consumer can skip a Snapshot with the Version it has handled last.
+    """
+    missions: Mapping[int, MassacreMission]
+    """The active Massacre Missions. Read-only."""
+    data: MassacreMissionData
+    """The Data-View of the Missions. Must not be modified."""
+
+    def as_dict(self) -> dict:
+        return {
+            "version": self.version,
+            "missions": [mission.as_dict() for mission in self.missions.values()],
+            "stack_height": self.data.stack_height,
+            "warnings": list(self.data.warnings)
+        }
+
+
+# Callback: (snapshot) -> void
+# Invoked from whichever Thread the Update Coalescer flushes on (the Main Thread once the UI is set up).
+stack_snapshot_listeners: list[Callable[[StackSnapshot], None]] = []
+
+_aggregator = MassacreMissionAggregator()
+_latest: Optional[StackSnapshot] = None
+_applied_sequence = 0
+"""The last Flush of massacre_mission_state whose Changes the Aggregator has applied"""
+_lock = threading.Lock()
+"""
+Guards the Aggregator and the latest Snapshot. The Coalescer may flush on another Thread before the UI is set up.
+"""
+
+
+def latest_stack_snapshot() -> Optional[StackSnapshot]:
+    """
+    The Snapshot passed to the Listeners last, e.g. for a Consumer that starts listening late.
+    None until the Massacre Missions are known.
+    """
+    return _latest
+
+
+def __handle_new_massacre_mission_state(massacre_missions: dict[int, MassacreMission],
+                                        changes: MassacreMissionChanges):
+    global _latest, _applied_sequence
+    with _lock:
+        if changes.sequence <= _applied_sequence:
+            # A later Flush on another Thread overtook this one, its Missions are already applied
+            changed = False
+        elif changes.sequence == _applied_sequence + 1:
+            changed = _aggregator.apply(changes.changes)
+        else:
+            # An earlier Flush is still on its way. Its Changes are part of these Missions.
+            changed = _aggregator.sync(massacre_missions)
+        _applied_sequence = max(_applied_sequence, changes.sequence)
+        if _latest is None or changed:
+            version = 1 if _latest is None else _latest.version + 1
+            # The Dict is a Copy made for the Listeners of massacre_mission_state, it is not modified afterwards
+            _latest = StackSnapshot(version, MappingProxyType(massacre_missions),
+                                    MassacreMissionData(massacre_missions, _aggregator))
+            recorder.record("stack_snapshot", _latest)
+        snapshot = _latest
+    for listener in stack_snapshot_listeners:
+        listener(snapshot)
+
+
+massacre_mission_listeners.append(__handle_new_massacre_mission_state)
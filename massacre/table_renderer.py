@@ -0,0 +1,81 @@
+"""
+This Module contains the Renderer that puts the Rows described in ui_layout on the Screen.
+
+Instead of destroying and recreating every Label on every Update, the Labels are kept in a Pool keyed by Row Key and
+Column. An Update only reconfigures the Labels whose Text changed, moves those whose Row changed (e.g. when a Faction
+is added above them), and creates or destroys Labels for Rows that appeared or disappeared.
+"""
+import tkinter as tk
+from typing import Callable, Hashable, NamedTuple, Optional
+
+from massacre.ui_layout import Cell, Row
+
+
+class _PooledCell(NamedTuple):
+    label: tk.Label
+    cell: Cell
+    row: int
+    column: int
+
+
+class TableRenderer:
+    """
+    Retained-Mode Renderer for a Grid of Labels inside a single Frame. Must only be used from the Main Thread.
+    """
+
+    def __init__(self, frame: tk.Misc, on_new_widget: Optional[Callable[[tk.Widget], None]] = None):
+        """
+        :param on_new_widget: Called for every Label that has been created, e.g. to apply the Theme. Labels that are
+                              reused are not passed again.
+        """
+        self._frame = frame
+        self._on_new_widget = on_new_widget
+        self._pool: dict[tuple[Hashable, int], _PooledCell] = {}
+
+    def render(self, rows: list[Row]) -> int:
+        """
+        Show the provided Rows, starting at Row 0 of the Frame.
+
+        Return Row-Pointer for next row
+        """
+        rendered: set[tuple[Hashable, int]] = set()
+        for row, (key, cells) in enumerate(rows):
+            column = 0
+            for index, cell in enumerate(cells):
+                pool_key = (key, index)
+                rendered.add(pool_key)
+                self._pool[pool_key] = self.__render_cell(self._pool.get(pool_key), cell, row, column)
+                column += cell.columnspan
+
+        for pool_key in [x for x in self._pool.keys() if x not in rendered]:
+            self._pool.pop(pool_key).label.destroy()
+        return len(rows)
+
+    def clear(self):
+        """
+        Destroy all Labels
+        """
+        self.render([])
+
+    def __render_cell(self, pooled: Optional[_PooledCell], cell: Cell, row: int, column: int) -> _PooledCell:
+        if pooled is not None and pooled.cell.fg != cell.fg:
+            # The Theme remembers the Colour a Label had when it was themed, so it is not recoloured in place
+            pooled.label.destroy()
+            pooled = None
+
+        if pooled is None:
+            label = tk.Label(self._frame, text=cell.text)
+            if cell.fg is not None:
+                label.config(fg=cell.fg)
+            label.grid(row=row, column=column, columnspan=cell.columnspan, sticky=cell.sticky)
+            if self._on_new_widget is not None:
+                self._on_new_widget(label)
+            return _PooledCell(label, cell, row, column)
+
+        label = pooled.label
+        if pooled.cell.text != cell.text:
+            label.config(text=cell.text)
+        if (pooled.row, pooled.column, pooled.cell.columnspan, pooled.cell.sticky) != \
+                (row, column, cell.columnspan, cell.sticky):
+            label.grid(row=row, column=column, columnspan=cell.columnspan, sticky=cell.sticky)
+        return _PooledCell(label, cell, row, column)
@@ -0,0 +1,147 @@
+"""
+This Module describes what the Table in the Main Window shows, as Rows of Cells. It does not create any Widgets,
+that is up to the TableRenderer (see table_renderer), which only touches the Cells that changed.
+
+It does not depend on EDMC, so that the Layout can also be used outside of it (see benchmarks.bench_ui_render).
+"""
+from typing import TYPE_CHECKING, Hashable, NamedTuple, Optional
+
+from massacre.massacre_mission_data import MassacreMissionData
+
+if TYPE_CHECKING:
+    from massacre.massacre_settings import Configuration
+
+
+class Cell(NamedTuple):
+    """
+    A single Label of the Table. The Column is given by the Cells in front of it in the same Row.
+    """
+    text: str
+    fg: Optional[str] = None
+    """None keeps the Colour of the Theme"""
+    columnspan: int = 1
+    sticky: str = "w"
+
+
+class Row(NamedTuple):
+    key: Hashable
+    """
+    Identifies the Row across Updates, e.g. the Faction it shows. Rows with the same Key reuse their Widgets.
+    """
+    cells: list[Cell]
+
+
+class GridUiSettings:
+    """
+    Subset of the entire Configuration that focuses on which information is displayed
+    """
+    def __init__(self, config: "Configuration"):
+        self.sum = config.display_delta_column
+        self.delta = config.display_delta_column
+        self.summary = config.display_ratio_and_cr_per_kill_row
+        self.mission_count = config.display_mission_count
+
+
+def row_width(settings: GridUiSettings) -> int:
+    """
+    Return how many columns wide the Table is.
+    This depends on if the delta-Column should be displayed
+    """
+    if settings.delta:
+        return 4
+    return 3
+
+
+def no_data_rows() -> list[Row]:
+    """
+    The warning that is displayed if the Missions-Event has yet to be received.
+    """
+    return [Row("no_data", [Cell("Missing Active Mission Data.\nIf you are in game, go to main menu and come back",
+                                 fg="yellow", sticky="")])]
+
+
+def indexing_rows(progress: tuple[int, int]) -> list[Row]:
+    """
+    The info that is displayed while the Mission Index is built in the background.
+    """
+    parsed, total = progress
+    text = "Indexing Journals…"
+    if total > 0:
+        text = f"Indexing Journals… {parsed}/{total}"
+    return [Row("indexing", [Cell(text, sticky="")])]
+
+
+def waiting_for_missions_rows() -> list[Row]:
+    return [Row("waiting", [Cell("Massacre Plugin is ready.", sticky="")])]
+
+
+def __header_row(settings: GridUiSettings) -> Row:
+    """
+    The Labels of the Table
+    """
+    cells = [Cell("Faction"), Cell("Kills"), Cell("Reward (Wing)")]
+    if settings.delta:
+        # noinspection SpellCheckingInspection
+        cells.append(Cell("Δmax"))
+    return Row("header", cells)
+
+
+def __faction_row(faction: str, data: MassacreMissionData.FactionState, max_count: int, settings: GridUiSettings,
+                  second_largest_count: int) -> Row:
+    """
+    One Data-Row for the Table
+    """
+    reward_str = "{:.1f}".format(float(data.reward) / 1_000_000)
+    shareable_reward_str = "{:.1f}".format(float(data.shareable_reward) / 1_000_000)
+
+    cells = [Cell(faction), Cell(str(data.killcount)), Cell(f"{reward_str} ({shareable_reward_str})")]
+
+    if settings.delta:
+        # Calculate difference
+        delta = max_count - data.killcount
+        text = delta if delta > 0 else second_largest_count - max_count
+        cells.append(Cell(str(text)))
+
+    return Row(("faction", faction), cells)
+
+
+def __sum_row(data: MassacreMissionData) -> Row:
+    """
+    The Sum-Row containing the Reward-Sum and the amount of Kills required.
+    """
+    reward_sum_normal = "{:.1f}".format(float(data.reward) / 1_000_000)
+    reward_sum_wing = "{:.1f}".format(float(data.shareable_reward) / 1_000_000)
+    return Row("sum", [Cell("Sum", fg="green"), Cell(str(data.stack_height), fg="green"),
+                       Cell(f"{reward_sum_normal} ({reward_sum_wing})", fg="green")])
+
+
+def __summary_row(data: MassacreMissionData, settings: GridUiSettings) -> Row:
+    ratio_text = "{:.2f}".format(float(data.target_sum)/float(data.stack_height))
+    reward_in_millions = float(data.reward) / 1_000_000
+    wing_reward_in_millions = float(data.shareable_reward) / 1_000_000
+    reward_text = "{:.2f}".format(reward_in_millions/data.stack_height)
+    wing_reward_text = "{:.2f}".format(wing_reward_in_millions/data.stack_height)
+    label_text = f"Ratio: {ratio_text}, Reward: {reward_text} ({wing_reward_text}) M CR/Kill. {data.target_sum} Kills."
+    return Row("summary", [Cell(label_text, fg="green", columnspan=row_width(settings))])
+
+
+def data_rows(data: MassacreMissionData, settings: GridUiSettings) -> list[Row]:
+    rows = [__header_row(settings)]
+    for faction in sorted(data.faction_to_count_lookup.keys()):
+        rows.append(__faction_row(faction, data.faction_to_count_lookup[faction], data.stack_height, settings,
+                                  data.before_stack_height))
+
+    if settings.sum:
+        rows.append(__sum_row(data))
+
+    if settings.summary:
+        rows.append(__summary_row(data, settings))
+    full_width = row_width(settings)
+    if settings.mission_count:
+        rows.append(Row("mission_count", [Cell(f"Mission Count: {data.mission_count}/20", fg="white",
+                                               columnspan=full_width)]))
+
+    for i, warning in enumerate(data.warnings):
+        rows.append(Row(("warning", i), [Cell(warning, fg="yellow", columnspan=full_width)]))
+
+    return rows
@@ -0,0 +1,86 @@
+"""
+This Module contains the Coalescer that merges Bursts of Mission Updates into a single Recompute and Redraw.
+
+Accepting a Stack of Missions at a Station writes one MissionAccepted-Event per Mission within a few Seconds. Instead
+of recomputing and redrawing for each of them, the State is only marked dirty, and the Listeners are run once the
+Scheduler decides to flush (see UI.schedule_update, which waits for a short Window or the next Tk Idle Tick).
+
+Without a Scheduler (e.g. in Headless Mode) every Update is flushed right away.
+"""
+import threading
+from typing import Callable, Optional
+
+from massacre.logger_factory import logger
+
+Scheduler = Callable[[Callable[[], None]], None]
+"""
+Runs the passed Flush once, at some later Point. Must be safe to be called from any Thread.
+"""
+
+
+class UpdateCoalescer:
+    """
+    Merges all Updates marked between two Flushes into one. Counts how many Updates were requested and flushed.
+    """
+
+    def __init__(self, flush: Callable[[], None], name: str, scheduler: Optional[Scheduler] = None):
+        self._flush = flush
+        self._name = name
+        self._scheduler = scheduler
+        self._lock = threading.Lock()
+        self._pending = False
+        self._requested = 0
+        self._flushed = 0
+
+    @property
+    def requested(self) -> int:
+        """How many Updates have been marked"""
+        return self._requested
+
+    @property
+    def flushed(self) -> int:
+        """How many Flushes have been run"""
+        return self._flushed
+
+    @property
+    def merged(self) -> int:
+        """How many Updates did not need a Flush of their own, as they were merged into another one"""
+        with self._lock:
+            return self._requested - self._flushed - (1 if self._pending else 0)
+
+    def counters(self) -> dict[str, int]:
+        return {"requested": self.requested, "flushed": self.flushed, "merged": self.merged}
+
+    def set_scheduler(self, scheduler: Optional[Scheduler]):
+        """
+        None flushes every Update right away
+        """
+        self._scheduler = scheduler
+
+    def mark_dirty(self):
+        """
+        Request a Flush. If one is already pending, this Update is merged into it.
+        """
+        with self._lock:
+            self._requested += 1
+            if self._pending:
+                return
+            self._pending = True
+            scheduler = self._scheduler
+        if scheduler is None:
+            self.flush()
+        else:
+            scheduler(self.flush)
+
+    def flush(self):
+        """
+        Run the pending Flush now. Does nothing if there is none.
+        """
+        with self._lock:
+            if not self._pending:
+                return
+            self._pending = False
+            self._flushed += 1
+            merged = self._requested - self._flushed
+        logger.debug(f"Flushing {self._name}. {merged} of {self._requested} Updates merged so far")
+        self._flush()
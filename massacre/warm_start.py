@@ -0,0 +1,118 @@
+"""
+This Module contains the Warm Start, written when EDMC shuts down (see load.plugin_stop).
+
+It holds the active Massacre Missions of each CMDR, which CMDR was logged in last, and the Journal High-Water Marks
+at Shutdown. On the next Start, the Missions of that CMDR are shown right away, instead of waiting for the Mission
+Index and for the Game to send the Missions-Event. In the background, whatever has been written to the Journals
+since (e.g. by a Session without EDMC) is replayed on top (see mission_aggregation_helper.reconcile_warm_start).
+Once the Missions-Event arrives, it replaces the restored Missions for good.
+
+Like the Mission Snapshot, the File can be deleted at any time.
+"""
+import datetime as dt
+import json
+import os
+from pathlib import Path
+from typing import Optional
+
+from massacre.logger_factory import logger
+from massacre.mission_lifecycle import CmdrMissionState, MissionLifecycle
+from massacre.mission_record import MissionRecord
+from massacre.mission_snapshot import JournalMark, MissionSnapshot
+
+WARM_START_FORMAT_VERSION = 1
+"""
+Bump this whenever the layout of the Warm Start File changes. Files with a different Version are discarded.
+"""
+
+warm_start_file_location = Path(__file__).parent.parent / "warm_start.json"
+"""
+The Warm Start is stored in the Plugin Directory, next to the Mission Index
+"""
+
+
+class WarmStart:
+    """
+    Active Massacre Missions of each CMDR at Shutdown, and the Journal Offsets they are based on
+    """
+
+    def __init__(self, cmdr: str, active_missions: dict[str, dict[int, MissionRecord]],
+                 journals: dict[str, JournalMark], taken_at_ns: int):
+        """
+        :param cmdr: The CMDR that was logged in last
+        :param active_missions: CMDR -> Mission ID -> Mission, in the Order reported by the Game
+        :param journals: See mission_snapshot.MissionSnapshot
+        """
+        self.cmdr = cmdr
+        self.active_missions = active_missions
+        self.journals = journals
+        self.taken_at_ns = taken_at_ns
+
+    @property
+    def taken_at(self) -> dt.datetime:
+        return dt.datetime.fromtimestamp(self.taken_at_ns / 1e9, tz=dt.timezone.utc)
+
+    def as_snapshot(self) -> MissionSnapshot:
+        """
+        The Warm Start as a Mission Snapshot that only knows about the active Missions, so that the Journal Lines
+        written since can be replayed on top of it
+        """
+        return MissionSnapshot(MissionLifecycle({
+            cmdr: CmdrMissionState(dict(missions), missions.keys()) for cmdr, missions in self.active_missions.items()
+        }), dict(self.journals), self.taken_at_ns)
+
+    @staticmethod
+    def load(location: Optional[Path] = None) -> Optional["WarmStart"]:
+        """
+        Load the Warm Start from disk. Returns None if it is missing, outdated or corrupted.
+
+        :param location: Defaults to warm_start_file_location
+        """
+        if location is None:
+            location = warm_start_file_location
+        if not location.is_file():
+            logger.info("No Warm Start found")
+            return None
+
+        try:
+            with open(location, "r", encoding="utf8") as warm_start_file:
+                raw = json.load(warm_start_file)
+            if raw.get("version") != WARM_START_FORMAT_VERSION:
+                logger.info(f"Warm Start has Version {raw.get('version')}, expected {WARM_START_FORMAT_VERSION}. "
+                            f"Discarding it.")
+                return None
+            active_missions: dict[str, dict[int, MissionRecord]] = {}
+            for cmdr, missions in raw["cmdrs"].items():
+                records = [MissionRecord.from_list(mission[1:], mission[0]) for mission in missions]
+                active_missions[cmdr] = {x.mission_id: x for x in records}
+            journals = {path: (int(offset), str(cmdr)) for path, (offset, cmdr) in raw["journals"].items()}
+            warm_start = WarmStart(str(raw["cmdr"]), active_missions, journals, int(raw["taken_at_ns"]))
+        except Exception:
+            logger.warning("Warm Start is corrupted. Discarding it.")
+            return None
+
+        logger.info(f"Loaded Warm Start of CMDR {warm_start.cmdr} taken at {warm_start.taken_at}")
+        return warm_start
+
+    def save(self, location: Optional[Path] = None):
+        """
+        Write the Warm Start to disk. The File is replaced atomically, just like the Mission Snapshot.
+
+        :param location: Defaults to warm_start_file_location
+        """
+        if location is None:
+            location = warm_start_file_location
+        temp_location = location.with_suffix(".tmp")
+        try:
+            with open(temp_location, "w", encoding="utf8") as warm_start_file:
+                json.dump({
+                    "version": WARM_START_FORMAT_VERSION,
+                    "cmdr": self.cmdr,
+                    "taken_at_ns": self.taken_at_ns,
+                    "journals": {path: list(mark) for path, mark in self.journals.items()},
+                    "cmdrs": {cmdr: [[x.journal_path] + x.as_list() for x in missions.values()]
+                              for cmdr, missions in self.active_missions.items()}
+                }, warm_start_file)
+            os.replace(temp_location, location)
+        except OSError:
+            logger.exception("Failed to write Warm Start")
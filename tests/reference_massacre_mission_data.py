@@ -0,0 +1,138 @@
+"""
+Frozen Copy of massacre_mission_data as it was before the Data-View was aggregated incrementally (see
+MassacreMissionAggregator). It recomputes everything from all Missions on every Call, which makes it the Reference
+for test_massacre_mission_data. Only the Class has been renamed. Do not change it along with massacre_mission_data.
+"""
+import json
+from dataclasses import dataclass
+
+from massacre.massacre_mission_state import MassacreMission
+from massacre.logger_factory import logger
+
+
+class ReferenceMissionData:
+    """
+    Creates a "data-view" for the UI from all massacre missions. Will be used to create a table-like UI
+    Done to split the calculations from the UI.
+    """
+
+    @dataclass
+    class FactionState:
+        killcount: int
+        reward: int 
+        shareable_reward: int
+
+
+    def __init__(self, massacre_state: dict[int, MassacreMission]):
+        self.warnings: list[str] = []
+        # if Log Level is set to DEBUG, this will output the current Massacre Mission State to the Log File.
+        # for easy searching, you can Ctrl+F for "MASSACRE_MISSION_DATA_INPUT" and get the line below that.
+        logger.debug("ReferenceMissionData input below: MASSACRE_MISSION_DATA_INPUT")
+        try:
+            debug_message_state: dict[int, dict] = {}
+            for k in massacre_state.keys():
+                v = massacre_state[k]
+                debug_message_state[k] = v.as_dict()
+            logger.debug(json.dumps(debug_message_state))
+        except Exception:
+            logger.error("Failed to Log debug_message_state")
+            pass
+        # Faction -> <Count, Reward, ShareableReward, DistanceToMax>
+        target_factions: list[str] = []
+        """
+        A list containing all Target Factions, as in Factions you are meant to 
+        kill as part of the mission. This is used to warn the User that they
+        have multiple targets and should recheck their stack.
+        """
+        target_types: list[str] = []
+        """
+        List of all target types (like Civilian, Pirates, etc). Will warn the User if they 
+        have separate stacks.
+        """
+        target_systems: list[str] = []
+        """
+        List of all target systems - as in locations where the targets need to be killed.
+        This will warn the player that they should recheck their stack.
+        """
+        self.faction_to_count_lookup: dict[str, ReferenceMissionData.FactionState] = {}
+        self.stack_height = 0
+        """
+        The highest amount of kills needed per faction in this stack.
+        """
+        self.before_stack_height = 0
+        """
+        The SECOND-highest amount of kills needed per faction in this stack.
+        This is used for the delta-Column of the highest Stack to show the negative
+        delta towards the second-highest stack.
+        """
+        self.target_sum = 0
+        """
+        The amount of total mission kills (not total required kills (see stack_height))
+        """
+        self.reward = 0
+        """
+        How much the player should expect in Wing- and Non-Wing Missions
+        """
+        self.shareable_reward = 0
+        """
+        How much the player should expect in Wing-Missions
+        """
+        self.mission_count = len(massacre_state.values())
+        """
+        How many (massacre) missions does the user currently have.
+        """
+
+        for mission in massacre_state.values():
+            mission_giver = mission.source_faction
+            """This is the Faction that handed out the mission"""
+
+            if mission_giver not in self.faction_to_count_lookup.keys():
+                """If no Mission from that Faction is known yet, it will first be initialized"""
+                self.faction_to_count_lookup[mission_giver] = ReferenceMissionData.FactionState(0, 0, 0)
+
+            faction_state = self.faction_to_count_lookup[mission_giver]
+            """
+            Get the currently summed kill count and rewards from this faction. This might contain data
+            from previous Missions from that faction, or 0,0,0 if this is the first mission.
+            """
+            faction_state.killcount += mission.count
+            self.target_sum += mission.count
+            faction_state.reward += mission.reward
+            # Only wing missions are considered for shareable rewards
+            if mission.is_wing:
+                faction_state.shareable_reward += mission.reward
+
+            ### Add Faction, Target Type and Target System to the list if they are not 
+            ### yet present. This will be later used to generate a warning if more than 
+            ### one of a type is present. See "Check for Warnings block below"
+            if mission.target_faction not in target_factions:
+                target_factions.append(mission.target_faction)
+
+            if mission.target_type not in target_types:
+                target_types.append(mission.target_type)
+
+            if mission.target_system not in target_systems:
+                target_systems.append(mission.target_system)
+
+            if faction_state.killcount > self.stack_height:
+                self.stack_height = faction_state.killcount
+
+        # After all Missions have been handled, iterate through the faction_to_count_lookup to calculate the Total Rewards   
+        for faction_state in self.faction_to_count_lookup.values():
+            self.reward += faction_state.reward
+            self.shareable_reward += faction_state.shareable_reward
+
+        # Check for Warnings
+        if len(target_factions) > 1:
+            self.warnings.append(f"Multiple Target Factions: {', '.join(target_factions)}!")
+        if len(target_types) > 1:
+            self.warnings.append(f"Multiple Target Types: {', '.join(target_types)}!")
+        if len(target_systems) > 1:
+            self.warnings.append(f"Multiple Target Systems: {', '.join(target_systems)}!")
+
+        # Calculate before_stack_height
+        for faction_state in self.faction_to_count_lookup.values():
+            if faction_state.killcount > self.before_stack_height and faction_state.killcount != self.stack_height:
+                self.before_stack_height = faction_state.killcount
+        if self.before_stack_height == 0:  # No other elements. All at max value.
+            self.before_stack_height = self.stack_height
@@ -0,0 +1,98 @@
+"""
+Parity Test of the Prefilter in journal_scanner against the Parser it replaced, which decoded every Line of a Journal
+with json.loads (see _readline_parser).
+
+Both have to find the same CMDR and the same MissionAccepted-Events in each Journal of a small Corpus, with every
+available Decoder Backend (see json_decoder).
+"""
+import json
+from pathlib import Path
+
+import pytest
+
+import massacre.json_decoder as json_decoder
+from massacre.journal_scanner import extract_mission_accepted_events_from_log
+from massacre.mission_record import MissionRecord
+
+
+def _readline_parser(file_path: Path) -> tuple[str, list[dict]]:
+    """
+    The Parser as it was before the Prefilter, without counting the failed Lines
+    """
+    cmdr = ""
+    return_list = []
+    with open(file_path, "r", encoding="utf8") as current_log_file:
+        line = current_log_file.readline()
+        while line != "":
+            try:
+                line_as_json = json.loads(line)
+                if line_as_json["event"] == "Commander":
+                    cmdr = str(line_as_json["Name"])
+                if line_as_json["event"] == "MissionAccepted":
+                    return_list.append(line_as_json)
+            except Exception:
+                pass
+            finally:
+                line = current_log_file.readline()
+    return cmdr, return_list
+
+
+def _accepted(mission_id: int, separator: str = ":") -> str:
+    return '{"timestamp":"2026-10-01T12:00:00Z", "event"' + separator + '"MissionAccepted", "Faction":"Söurce", ' \
+           '"Name":"Mission_Massacre", "TargetFaction":"Target", "KillCount":12, ' \
+           '"TargetType":"$MissionUtil_FactionTag_Pirate;", "DestinationSystem":"System", ' \
+           '"Expiry":"2026-10-08T12:00:00Z", "Wing":false, "Reward":1000000, "MissionID":' + str(mission_id) + '}'
+
+
+_COMMANDER = '{"timestamp":"2026-10-01T11:00:00Z", "event":"Commander", "FID":"F1", "Name":"CMDR A"}'
+_LOAD_GAME = '{"timestamp":"2026-10-01T11:00:01Z", "event":"LoadGame", "Commander":"CMDR B", "Ship":"Python"}'
+
+_CORPUS: dict[str, str] = {
+    "spaces after event": "\n".join([
+        '{"timestamp":"2026-10-01T11:00:00Z", "event":   "Commander", "Name":"CMDR A"}',
+        _accepted(1, ":  "),
+        _accepted(2, " : "),
+        _accepted(3, ":\t"),
+    ]) + "\n",
+    "crlf": "\r\n".join([_COMMANDER, _LOAD_GAME, _accepted(1), "", _accepted(2), _accepted(3, ": ")]) + "\r\n",
+    "mixed line endings": _COMMANDER + "\r\n" + _accepted(1) + "\n" + _accepted(2) + "\r\n\n",
+    "truncated final line": "\n".join([_COMMANDER, _accepted(1), _accepted(2)[:60]]),
+    "final line without line break": "\n".join([_COMMANDER, _accepted(1), _accepted(2)]),
+    "marker in other events": "\n".join([
+        _COMMANDER,
+        '{"timestamp":"2026-10-01T11:00:02Z", "event":"ReceiveText", "From":"", "Message":"MissionAccepted"}',
+        '{"timestamp":"2026-10-01T11:00:03Z", "event":"Music", "MusicTrack":"\\"MissionAccepted\\""}',
+        '{"timestamp":"2026-10-01T11:00:04Z", "event":"SendText", "To":"local", "Message":"MissionAccepted for 12"}',
+        _LOAD_GAME,
+        _accepted(1),
+        '{"timestamp":"2026-10-01T11:00:05Z", "event":"MissionAccepted", "MissionID":',
+        '{"timestamp":"2026-10-01T11:00:06Z", "event":"Missions", "Active":[{"Name":"MissionAccepted"}]}',
+    ]) + "\n",
+    "no commander": "\n".join([_LOAD_GAME, _accepted(1), "not json at all", ""]) + "\n",
+    "commander changes": "\n".join([_COMMANDER, _accepted(1), _COMMANDER.replace("CMDR A", "CMDR C"),
+                                    _accepted(2)]) + "\n",
+}
+
+
+@pytest.fixture(params=json_decoder.available_backends())
+def decoder_backend(request, monkeypatch) -> str:
+    # Restored after the Test
+    monkeypatch.setattr(json_decoder, "decoder", json_decoder.decoder)
+    json_decoder.set_backend(request.param)
+    return request.param
+
+
+@pytest.mark.parametrize("name", list(_CORPUS))
+def test_matches_readline_parser(decoder_backend: str, name: str, tmp_path: Path):
+    journal = tmp_path / "Journal.2026-10-01T110000.01.log"
+    journal.write_bytes(_CORPUS[name].encode("utf8"))
+
+    expected_cmdr, expected_events = _readline_parser(journal)
+    cmdr, missions, _, _, _ = extract_mission_accepted_events_from_log(journal)
+
+    assert cmdr == expected_cmdr
+    assert [x.mission_id for x in missions] == [int(x["MissionID"]) for x in expected_events]
+    assert [x.as_list()[:-1] for x in missions] == [x.as_list()[:-1] for x in
+                                                    map(MissionRecord.from_event, expected_events)]
+    # The Offsets point at the Lines the Events were read from
+    assert [x.raw() for x in missions] == expected_events
@@ -0,0 +1,89 @@
+"""
+Differential Test of MassacreMissionData and its MassacreMissionAggregator against the previous Implementation, which
+recomputed the Data-View from all Missions (see reference_massacre_mission_data).
+
+Random Sequences of Missions being accepted, replaced, finished and accepted again are applied to a Mission Store.
+After every Step, the Data-View has to match the Reference, whether the Aggregator followed the Store with sync, with
+put and remove, applied the Changes of each Step, or was built from scratch.
+"""
+import random
+
+import pytest
+
+from massacre.massacre_mission_data import MassacreMissionAggregator, MassacreMissionData
+from massacre.massacre_mission_state import MassacreMission
+from tests.reference_massacre_mission_data import ReferenceMissionData
+
+_STEPS = 120
+
+
+def _data_view(data) -> tuple:
+    """
+    Everything the UI and the Overlay read from a Data-View. The Order of the Factions is part of it.
+    """
+    factions = [(faction, state.killcount, state.reward, state.shareable_reward)
+                for faction, state in data.faction_to_count_lookup.items()]
+    return (factions, list(data.warnings), data.stack_height, data.before_stack_height, data.target_sum, data.reward,
+            data.shareable_reward, data.mission_count)
+
+
+def _random_mission(rnd: random.Random, mission_id: int, faction_count: int) -> MassacreMission:
+    return MassacreMission(rnd.choice("TUV"[:rnd.randint(1, 3)]), rnd.randint(0, 30), rnd.randint(0, 10 ** 7),
+                           rnd.choice(["System 1", "System 2"]), rnd.choice(["Pirates", "Civilians"]),
+                           f"Faction {rnd.randrange(faction_count)}", rnd.random() < 0.5, mission_id)
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_matches_reference(seed: int):
+    rnd = random.Random(seed)
+    faction_count = rnd.randint(1, 6)
+    store: dict[int, MassacreMission] = {}
+    synced = MassacreMissionAggregator()
+    incremental = MassacreMissionAggregator()
+    applied = MassacreMissionAggregator()
+
+    for step in range(_STEPS):
+        changes = []
+        for _ in range(rnd.randint(1, 4)):
+            roll = rnd.random()
+            if roll < 0.4 or len(store) == 0:
+                # Accepted, or replaced if the ID is taken
+                mission = _random_mission(rnd, rnd.randrange(40), faction_count)
+                store[mission.id] = mission
+                incremental.put(mission)
+                changes.append((mission.id, mission))
+            elif roll < 0.7:
+                mission_id = rnd.choice(list(store))
+                del store[mission_id]
+                incremental.remove(mission_id)
+                changes.append((mission_id, None))
+            elif roll < 0.85:
+                mission_id = rnd.choice(list(store))
+                store[mission_id] = _random_mission(rnd, mission_id, faction_count)
+                incremental.put(store[mission_id])
+                changes.append((mission_id, store[mission_id]))
+            else:
+                # Finished and accepted again, so that it moves to the End of the Store
+                mission_id = rnd.choice(list(store))
+                del store[mission_id]
+                incremental.remove(mission_id)
+                store[mission_id] = _random_mission(rnd, mission_id, faction_count)
+                incremental.put(store[mission_id])
+                changes += [(mission_id, None), (mission_id, store[mission_id])]
+
+        missions = dict(store)
+        synced.sync(missions)
+        assert applied.apply(changes)
+        expected = _data_view(ReferenceMissionData(missions))
+        assert _data_view(MassacreMissionData(missions, synced)) == expected, step
+        assert _data_view(MassacreMissionData(missions, incremental)) == expected, step
+        assert _data_view(MassacreMissionData(missions, applied)) == expected, step
+        assert _data_view(MassacreMissionData(missions)) == expected, step
+
+
+def test_sync_reports_changes():
+    aggregator = MassacreMissionAggregator()
+    mission = MassacreMission("Target", 10, 1_000_000, "System", "Pirates", "Faction", True, 1)
+    assert aggregator.sync({1: mission})
+    assert not aggregator.sync({1: mission})
+    assert aggregator.sync({})
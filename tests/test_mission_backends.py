@@ -0,0 +1,202 @@
+"""
+Runs the Fold, the Replay on top of a stored Mission State and the Snapshot Round-Trip against both State Backends:
+the Mission Snapshot File (see mission_snapshot) and the Mission Database (see mission_database). Both have to end up
+with the same Missions as folding every Journal from scratch.
+"""
+import datetime as dt
+import json
+import os
+import random
+import time
+from pathlib import Path
+
+import pytest
+
+import massacre.mission_aggregation_helper as aggregation_helper
+import massacre.mission_database
+import massacre.mission_index
+import massacre.mission_snapshot
+import massacre.warm_start
+from massacre.mission_database import MissionDatabase
+from massacre.mission_lifecycle import CmdrMissionState, MissionLifecycle
+from massacre.mission_record import MissionRecord
+from massacre.mission_snapshot import MissionSnapshot
+
+_TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+_FINISHING_EVENTS = ("MissionCompleted", "MissionAbandoned", "MissionFailed")
+
+
+@pytest.fixture(params=["snapshot", "database"])
+def backend(request, tmp_path: Path, monkeypatch) -> str:
+    """
+    Points the Journals, the Mission Index and the chosen Backend at a temporary Directory
+    """
+    for module, attribute in ((massacre.mission_index, "index_file_location"),
+                              (massacre.mission_snapshot, "snapshot_file_location"),
+                              (massacre.mission_database, "database_file_location"),
+                              (massacre.warm_start, "warm_start_file_location"),
+                              (aggregation_helper, "file_location")):
+        # Restored after the Test
+        monkeypatch.setattr(module, attribute, getattr(module, attribute))
+    (tmp_path / "journals").mkdir()
+    aggregation_helper.set_journal_location(str(tmp_path / "journals"))
+    aggregation_helper.set_cache_location(tmp_path)
+    aggregation_helper.use_mission_database(MissionDatabase() if request.param == "database" else None)
+    yield request.param
+    aggregation_helper.use_mission_database(None)
+
+
+def _stored_state_location() -> Path:
+    if aggregation_helper.get_mission_database() is not None:
+        return massacre.mission_database.database_file_location
+    return massacre.mission_snapshot.snapshot_file_location
+
+
+def _save(snapshot: MissionSnapshot):
+    database = aggregation_helper.get_mission_database()
+    if database is not None:
+        database.save_snapshot(snapshot)
+    else:
+        snapshot.save()
+
+
+def _load() -> MissionSnapshot:
+    database = aggregation_helper.get_mission_database()
+    snapshot = database.load_snapshot(dt.datetime.now(tz=dt.timezone.utc)) if database is not None \
+        else MissionSnapshot.load()
+    assert snapshot is not None
+    return snapshot
+
+
+def _expiry(days: float) -> str:
+    return (dt.datetime.now(tz=dt.timezone.utc) + dt.timedelta(days=days)).strftime(_TIMESTAMP_FORMAT)
+
+
+def _accepted(mission_id: int, expiry: str, kill_count: int = 3, reward: int = 1_000_000) -> dict:
+    return {"timestamp": _expiry(-0.1), "event": "MissionAccepted", "MissionID": mission_id,
+            "Name": "Mission_Massacre", "Faction": "Source", "TargetFaction": "Target", "KillCount": kill_count,
+            "Reward": reward, "TargetType": "$MissionUtil_FactionTag_Pirate;", "DestinationSystem": "System",
+            "Expiry": expiry, "Wing": False}
+
+
+def _write_journal(index: int, lines: list[dict], mtime: float):
+    location = Path(aggregation_helper.file_location) / f"Journal.{index:03}.log"
+    with open(location, "w", encoding="utf8") as journal:
+        for line in lines:
+            journal.write(json.dumps(line) + "\n")
+    os.utime(location, (mtime, mtime))
+
+
+def _fold() -> dict[str, list[int]]:
+    """
+    The open, unexpired Mission IDs of each CMDR that has any
+    """
+    mission_stores = aggregation_helper.get_missions_for_all_cmdrs(dt.date.today() - dt.timedelta(days=14))
+    return {cmdr: sorted(missions) for cmdr, missions in mission_stores.items() if len(missions) > 0}
+
+
+def _generate_journals(rnd: random.Random) -> list[list[dict]]:
+    valid, expired = _expiry(3), _expiry(-1)
+    journals = []
+    next_id = 1
+    open_ids: dict[str, list[int]] = {}
+    for _ in range(rnd.randint(1, 6)):
+        cmdr = rnd.choice(["A", "B"])
+        ids = open_ids.setdefault(cmdr, [])
+        lines = [{"event": "Fileheader"}, {"event": "Commander", "Name": cmdr}]
+        for _ in range(rnd.randint(0, 30)):
+            roll = rnd.random()
+            if roll < 0.4 or len(ids) == 0:
+                lines.append(_accepted(next_id, rnd.choice([valid, valid, expired])))
+                ids.append(next_id)
+                next_id += 1
+            elif roll < 0.7:
+                mission_id = ids.pop(rnd.randrange(len(ids)))
+                lines.append({"event": rnd.choice(_FINISHING_EVENTS), "MissionID": mission_id})
+            elif roll < 0.8:
+                lines.append({"event": "MissionRedirected", "MissionID": rnd.choice(ids)})
+            else:
+                lines.append({"event": "Music", "MusicTrack": "Exploration"})
+        journals.append(lines)
+    return journals
+
+
+def _reference(journals: list[list[dict]]) -> dict[str, list[int]]:
+    now = dt.datetime.now(tz=dt.timezone.utc).strftime(_TIMESTAMP_FORMAT)
+    missions: dict[str, dict[int, dict]] = {}
+    for lines in journals:
+        cmdr = lines[1]["Name"]
+        for line in lines:
+            if line["event"] == "MissionAccepted":
+                missions.setdefault(cmdr, {})[line["MissionID"]] = line
+            elif line["event"] in _FINISHING_EVENTS:
+                missions.get(cmdr, {}).pop(line["MissionID"], None)
+    open_missions = {cmdr: sorted(x for x, line in cmdr_missions.items() if line["Expiry"] > now)
+                     for cmdr, cmdr_missions in missions.items()}
+    return {cmdr: mission_ids for cmdr, mission_ids in open_missions.items() if len(mission_ids) > 0}
+
+
+@pytest.mark.parametrize("seed", range(25))
+def test_replay_matches_full_fold(backend: str, seed: int):
+    rnd = random.Random(seed)
+    journals = _generate_journals(rnd)
+    # The Game was still writing the last Journal when the State was stored
+    last = rnd.randrange(len(journals))
+    cut = rnd.randint(2, len(journals[last]))
+    start = time.time() - 1000
+    for index, lines in enumerate(journals[:last + 1]):
+        _write_journal(index, lines[:cut] if index == last else lines, start + index)
+    _fold()
+    assert _stored_state_location().exists()
+
+    for index, lines in enumerate(journals):
+        if index >= last:
+            _write_journal(index, lines, time.time() + index)
+    replayed = _fold()
+    _stored_state_location().unlink()
+    folded = _fold()
+
+    expected = _reference(journals)
+    assert replayed == expected
+    assert folded == expected
+
+
+def test_reaccepted_mission_keeps_last_accept(backend: str):
+    start = time.time() - 1000
+    first_accept = _accepted(1, _expiry(3), kill_count=10, reward=100)
+    _write_journal(0, [{"event": "Commander", "Name": "A"}, first_accept], start)
+    _fold()
+
+    _write_journal(0, [{"event": "Commander", "Name": "A"}, first_accept,
+                       _accepted(1, _expiry(3), kill_count=20, reward=999)], time.time())
+    replayed = aggregation_helper.get_missions_for_all_cmdrs(dt.date.today() - dt.timedelta(days=14))
+    assert (replayed["A"][1].kill_count, replayed["A"][1].reward) == (20, 999)
+
+    stored = _load().lifecycle.state_of("A").missions[1]
+    assert (stored.kill_count, stored.reward) == (20, 999)
+    assert stored.journal_offset == replayed["A"][1].journal_offset
+
+
+def test_snapshot_round_trip(backend: str):
+    rnd = random.Random(0)
+    states = {}
+    for cmdr in ("A", "B"):
+        missions = {mission_id: MissionRecord.from_event(_accepted(mission_id, _expiry(3), rnd.randint(1, 60),
+                                                                   rnd.randint(1, 50) * 100_000),
+                                                         ("Journal.000.log", mission_id * 100))
+                    for mission_id in rnd.sample(range(1, 1000), 20)}
+        active = rnd.sample(list(missions), 10)
+        states[cmdr] = CmdrMissionState(missions, active, set(active[:3]))
+    snapshot = MissionSnapshot(MissionLifecycle(states), {"Journal.000.log": (4096, "A")}, time.time_ns())
+
+    _save(snapshot)
+    loaded = _load()
+
+    assert loaded.taken_at_ns == snapshot.taken_at_ns
+    assert loaded.journals == snapshot.journals
+    for cmdr, state in states.items():
+        loaded_state = loaded.lifecycle.state_of(cmdr)
+        assert {x: mission.as_list() for x, mission in loaded_state.missions.items()} == \
+               {x: mission.as_list() for x, mission in state.missions.items()}
+        assert list(loaded_state.active) == list(state.active)
+        assert loaded_state.redirected == state.redirected